@@ -0,0 +1,72 @@
+# Benchmark of queue and priority-queue programs written over arrays and over
+# the deque and heap builtins, on the evaluator: a breadth-first traversal,
+# and a scan that always takes the smallest of the pending values.
+#
+#   python bench_containers.py
+
+import time
+
+import lexer
+import parser
+import evaluator
+import monkey_object as mobject
+
+N = 2000
+# The sorted array is quadratic, so the priority programs do fewer steps.
+STEPS = 500
+
+CASES = [
+    ("queue: array push/rest", f"""
+        let q = [0]; let n = 0;
+        while (len(q) > 0) {{
+            let x = first(q); q = rest(q); n = n + 1;
+            if (x < {N}) {{ q = push(q, x * 2 + 1); q = push(q, x * 2 + 2); }}
+        }}; n"""),
+    ("queue: deque", f"""
+        let q = deque([0]); let n = 0;
+        while (len(q) > 0) {{
+            let x = pop_front(q); n = n + 1;
+            if (x < {N}) {{ push_back(q, x * 2 + 1); push_back(q, x * 2 + 2); }}
+        }}; n"""),
+    # The array keeps the pending values sorted: insertion finds the place
+    # with a scan and rebuilds the array.
+    ("priority: sorted array", f"""
+        let insert = fn(a, v) {{
+            let i = 0;
+            while (i < len(a)) {{ if (a[i] < v) {{ i = i + 1 }} else {{ break }} }};
+            let b = slice(a, 0, i); b = push(b, v);
+            for (x in slice(a, i, len(a))) {{ b = push(b, x) }};
+            b
+        }};
+        let q = [0]; let n = 0;
+        while (len(q) > 0) {{
+            let x = first(q); q = rest(q); n = n + 1;
+            if (n < {STEPS}) {{ q = insert(q, x + 3); q = insert(q, x + 7); }}
+        }}; n"""),
+    ("priority: heap", f"""
+        let q = heap([0]); let n = 0;
+        while (len(q) > 0) {{
+            let x = heap_pop(q); n = n + 1;
+            if (n < {STEPS}) {{ heap_push(q, x + 3); heap_push(q, x + 7); }}
+        }}; n"""),
+]
+
+def bench(source: str, repeat: int = 3) -> float:
+    p = parser.Parser(lexer.Lexer(source))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        evaluator.eval(program, mobject.Environment())
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+def main():
+    print(f"{'program':<28}{'ms':>10}")
+    for name, source in CASES:
+        print(f"{name:<28}{bench(source):>10.1f}")
+
+if __name__ == "__main__":
+    main()
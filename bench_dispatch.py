@@ -0,0 +1,47 @@
+# Microbenchmark of the evaluator's per-node cost: evaluates a single node of
+# each kind many times and prints the time per evaluation.
+#
+#   python bench_dispatch.py
+
+import time
+import timeit
+
+import lexer
+import parser
+import evaluator
+import monkey_object as mobject
+
+SETUP = "let x = 3; let s = \"a\"; let a = [1, 2]; let h = {1: 2}; let f = fn(y){y};"
+
+CASES = [
+    ("IntegerLiteral", "5"),
+    ("StringLiteral", '"a"'),
+    ("Boolean", "true"),
+    ("Identifier", "x"),
+    ("PrefixExpression", "-x"),
+    ("InfixExpression +", "x + 1"),
+    ("InfixExpression <", "x < 1"),
+    ("InfixExpression string", "s + s"),
+    ("ArrayLiteral", "[x]"),
+    ("HashLiteral", "{1: x}"),
+    ("IndexExpression", "a[0]"),
+    ("IfExpression", "if(true){x}"),
+    ("CallExpression", "f(x)"),
+]
+
+def bench(source: str, number: int) -> float:
+    env = mobject.Environment()
+    program = parser.Parser(lexer.Lexer(SETUP + source)).parse_program()
+    evaluator.eval(program, env)
+    node = program.statements[-1].expression
+    eval = evaluator.eval
+    best = min(timeit.repeat(lambda: eval(node, env), number=number, repeat=11, timer=time.process_time))
+    return best / number * 1e9
+
+def main(number: int = 50000):
+    print(f"{'node':<24}{'ns/eval':>10}")
+    for name, source in CASES:
+        print(f"{name:<24}{bench(source, number):>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Memory benchmark: bytes allocated per Integer, Environment, AST node, hash
+# and record, measured with tracemalloc over many instances.
+#
+#   python bench_memory.py
+
+import tracemalloc
+
+import lexer
+import parser
+import monkey_object as mobject
+
+def bytes_per_object(make, number: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [make(i) for i in range(number)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the objects is not counted.
+    return (after - before - objects.__sizeof__()) / number
+
+def parse_nodes(number: int):
+    source = "x + y * 2;" * number
+    program = parser.Parser(lexer.Lexer(source)).parse_program()
+    # Each statement is 6 nodes (ExpressionStatement, 2 InfixExpressions,
+    # 2 Identifiers and an IntegerLiteral) plus their tokens.
+    return program, 6 * number
+
+def ast_bytes_per_node(number: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    program, nodes = parse_nodes(number)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before - program.statements.__sizeof__()) / nodes
+
+KEYS = [mobject.String(value=name) for name in ("x", "y", "z")]
+POINT = mobject.RecordType(("x", "y", "z"), "Point")
+
+def make_hash(i: int) -> mobject.Hash:
+    # The field values are shared, as in the record case.
+    return mobject.Hash(storage=mobject.hash_storage((key, mobject.NULL) for key in KEYS))
+
+CASES = [
+    ("Integer", lambda number: bytes_per_object(lambda i: mobject.Integer(value=i + 10**6), number)),
+    ("String", lambda number: bytes_per_object(lambda i: mobject.String(value="s"), number)),
+    ("Environment", lambda number: bytes_per_object(lambda i: mobject.Environment(), number)),
+    ("Environment (slots)", lambda number: bytes_per_object(lambda i: mobject.Environment(slots=[None]), number)),
+    ("AST node", ast_bytes_per_node),
+    ("Hash {x, y, z}", lambda number: bytes_per_object(lambda i: make_hash(i), number)),
+    ("Record (x, y, z)", lambda number: bytes_per_object(lambda i: mobject.Record(POINT, (mobject.NULL,)*3), number)),
+]
+
+def main(number: int = 100000):
+    print(f"{'object':<24}{'bytes':>10}")
+    for name, bench in CASES:
+        print(f"{name:<24}{bench(number):>10.1f}")
+
+if __name__ == "__main__":
+    main()
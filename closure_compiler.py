@@ -0,0 +1,417 @@
+import monkey_object as mobject
+from monkey_object import MonkeyObject, NULL, TRUE, FALSE
+import monkey_ast as ast
+from monkey_builtins import builtins
+import resolver
+from evaluator_utils import new_error, check, stack_overflow_error, ReturnSignal, BreakSignal, ContinueSignal, ErrorSignal
+from evaluator import arithmetic_operators, comparison_operators
+from evaluator import eval_infix_expression, eval_prefix_expression, eval_index_expression, eval_index_assignment, eval_bang_operator_expression, is_truthy
+from evaluator import eval_field_expression, new_record
+
+from dataclasses import dataclass
+from typing import List, Dict, Callable
+
+# Every AST node is turned into a Python closure taking the environment and
+# returning the node's value. Non-local exits and errors travel as the
+# exceptions in evaluator_utils, like in the evaluator.
+#
+# The program is resolved first only for its tail calls: `return f(...)`
+# in a function produces a TailCall, which the trampoline in apply_function
+# runs without growing the Python stack, like in the evaluator.
+
+Code = Callable[[mobject.Environment], MonkeyObject]
+
+@dataclass
+class ClosureFunction(mobject.Function):
+    code: Code
+    parameter_names: List[str]
+
+class LoopContext:
+    def __init__(self):
+        self.has_break = False
+        self.has_continue = False
+
+class ClosureCompiler:
+    def __init__(self):
+        self.errors: List[str] = []
+        # None marks a function boundary: break/continue cannot cross it.
+        self.loops: List[LoopContext] = [None]
+
+        self.compile_functions: Dict[type, Callable] = {
+            ast.ExpressionStatement: self.compile_expression_statement,
+            ast.LetStatement: self.compile_let_statement,
+            ast.ReturnStatement: self.compile_return_statement,
+            ast.BreakStatement: self.compile_break_statement,
+            ast.ContinueStatement: self.compile_continue_statement,
+            ast.IntegerLiteral: self.compile_integer_literal,
+            ast.StringLiteral: self.compile_string_literal,
+            ast.Constant: self.compile_constant,
+            ast.Boolean: self.compile_boolean,
+            ast.Identifier: self.compile_identifier,
+            ast.PrefixExpression: self.compile_prefix_expression,
+            ast.InfixExpression: self.compile_infix_expression,
+            ast.AssignExpression: self.compile_assign_expression,
+            ast.IfExpression: self.compile_if_expression,
+            ast.ForExpression: self.compile_for_expression,
+            ast.WhileExpression: self.compile_while_expression,
+            ast.FunctionLiteral: self.compile_function_literal,
+            ast.CallExpression: self.compile_call_expression,
+            ast.ArrayLiteral: self.compile_array_literal,
+            ast.IndexExpression: self.compile_index_expression,
+            ast.HashLiteral: self.compile_hash_literal,
+            ast.RecordLiteral: self.compile_record_literal,
+            ast.FieldExpression: self.compile_field_expression,
+        }
+
+    def compile_program(self, program: ast.Program) -> Code:
+        if not program.statements:
+            return lambda env: None
+        resolver.resolve(program)
+        return self.compile_statements(program.statements, tail=True)
+
+    def compile_statements(self, statements: List[ast.Statement], tail: bool = False) -> Code:
+        # "tail" marks the last statement of a function body, where a return
+        # statement can simply produce its value instead of unwinding.
+        if not statements:
+            return lambda env: NULL
+        codes = [self.compile_node(statement) for statement in statements[:-1]]
+        last = self.compile_node(statements[-1], tail=tail)
+        if not codes:
+            return last
+        if len(codes) == 1:
+            first = codes[0]
+            def block_2(env):
+                first(env)
+                return last(env)
+            return block_2
+        def block(env):
+            for code in codes:
+                code(env)
+            return last(env)
+        return block
+
+    def compile_block_statement(self, block: ast.BlockStatement, tail: bool = False) -> Code:
+        return self.compile_statements(block.statements if block is not None else [], tail=tail)
+
+    def compile_node(self, node: ast.Node, tail: bool = False) -> Code:
+        compile_function = self.compile_functions.get(type(node))
+        if compile_function is None:
+            self.errors.append(f"cannot compile node: {node}")
+            return lambda env: NULL
+        if tail:
+            return compile_function(node, tail=True)
+        return compile_function(node)
+
+    def compile_expression_statement(self, statement: ast.ExpressionStatement, tail: bool = False) -> Code:
+        if statement.expression is None:
+            return lambda env: None
+        if tail and type(statement.expression) == ast.IfExpression:
+            return self.compile_if_expression(statement.expression, tail=True)
+        return self.compile_node(statement.expression)
+
+    def compile_let_statement(self, statement: ast.LetStatement, tail: bool = False) -> Code:
+        name = statement.name.value
+        value = self.compile_node(statement.value)
+        def let(env):
+            env.store[name] = value(env)
+        return let
+
+    def compile_return_statement(self, statement: ast.ReturnStatement, tail: bool = False) -> Code:
+        if statement.tail_call:
+            value = self.compile_tail_call(statement.return_value)
+        else:
+            value = self.compile_node(statement.return_value)
+        if tail:
+            return value
+        def return_(env):
+            raise ReturnSignal(value(env))
+        return return_
+
+    def compile_tail_call(self, node: ast.CallExpression) -> Code:
+        # The call itself is left to the trampoline in apply_function.
+        function = self.compile_node(node.function)
+        arguments = [self.compile_node(arg) for arg in node.arguments]
+        TailCall = mobject.TailCall
+        return lambda env: TailCall(fn=function(env), args=[arg(env) for arg in arguments])
+
+    def compile_break_statement(self, statement: ast.BreakStatement, tail: bool = False) -> Code:
+        loop = self.loops[-1]
+        if loop is None:
+            self.errors.append("break cannot be used outside of a loop")
+        else:
+            loop.has_break = True
+        def break_(env):
+            raise BreakSignal()
+        return break_
+
+    def compile_continue_statement(self, statement: ast.ContinueStatement, tail: bool = False) -> Code:
+        loop = self.loops[-1]
+        if loop is None:
+            self.errors.append("continue cannot be used outside of a loop")
+        else:
+            loop.has_continue = True
+        def continue_(env):
+            raise ContinueSignal()
+        return continue_
+
+    def compile_integer_literal(self, node: ast.IntegerLiteral) -> Code:
+        value = node.constant
+        return lambda env: value
+
+    def compile_string_literal(self, node: ast.StringLiteral) -> Code:
+        value = node.constant
+        return lambda env: value
+
+    def compile_constant(self, node: ast.Constant) -> Code:
+        value = node.value
+        return lambda env: value
+
+    def compile_boolean(self, node: ast.Boolean) -> Code:
+        value = TRUE if node.value else FALSE
+        return lambda env: value
+
+    def compile_identifier(self, node: ast.Identifier) -> Code:
+        name = node.value
+        def identifier(env):
+            e = env
+            while e is not None:
+                val = e.store.get(name)
+                if val is not None:
+                    return val
+                e = e.outer
+            val = builtins.get(name)
+            if val is None:
+                raise ErrorSignal(new_error("identifier not found: {}", name))
+            return val
+        return identifier
+
+    def compile_prefix_expression(self, node: ast.PrefixExpression) -> Code:
+        right = self.compile_node(node.right)
+        if node.operator == "!":
+            return lambda env: eval_bang_operator_expression(right(env))
+        elif node.operator == "-":
+            Integer = mobject.Integer
+            integer = mobject.integer
+            def minus(env):
+                value = right(env)
+                if type(value) is Integer:
+                    return integer(-value.value)
+                return check(eval_prefix_expression("-", value))
+            return minus
+        op = node.operator
+        return lambda env: check(eval_prefix_expression(op, right(env)))
+
+    def compile_infix_expression(self, node: ast.InfixExpression) -> Code:
+        left = self.compile_node(node.left)
+        right = self.compile_node(node.right)
+        op = node.operator
+        Integer = mobject.Integer
+        integer = mobject.integer
+        if op in arithmetic_operators:
+            native = arithmetic_operators[op]
+            def arithmetic(env):
+                l = left(env)
+                r = right(env)
+                if type(l) is Integer and type(r) is Integer:
+                    return integer(native(l.value, r.value))
+                return check(eval_infix_expression(op, l, r))
+            return arithmetic
+        elif op in comparison_operators:
+            native = comparison_operators[op]
+            def comparison(env):
+                l = left(env)
+                r = right(env)
+                if type(l) is Integer and type(r) is Integer:
+                    return TRUE if native(l.value, r.value) else FALSE
+                return check(eval_infix_expression(op, l, r))
+            return comparison
+        return lambda env: check(eval_infix_expression(op, left(env), right(env)))
+
+    def compile_assign_expression(self, node: ast.AssignExpression) -> Code:
+        if type(node.name) == ast.IndexExpression:
+            left = self.compile_node(node.name.left)
+            index = self.compile_node(node.name.index)
+            value = self.compile_node(node.value)
+            return lambda env: check(eval_index_assignment(left(env), index(env), value(env)))
+        if type(node.name) != ast.Identifier:
+            self.errors.append(f"invalid assignment target: {node.name}")
+            return lambda env: NULL
+        name = node.name.value
+        value = self.compile_node(node.value)
+        def assign(env):
+            val = env.reset(name, value(env))
+            if val is None:
+                raise ErrorSignal(new_error("variable '{}' does not exist. Can't reassign", name))
+            return val
+        return assign
+
+    def compile_if_expression(self, node: ast.IfExpression, tail: bool = False) -> Code:
+        condition = self.compile_node(node.condition)
+        consequence = self.compile_block_statement(node.consequence, tail=tail)
+        if node.alternative is not None:
+            alternative = self.compile_block_statement(node.alternative, tail=tail)
+        else:
+            alternative = lambda env: NULL
+        def if_(env):
+            c = condition(env)
+            if c is TRUE or (c is not FALSE and is_truthy(c)):
+                return consequence(env)
+            return alternative(env)
+        return if_
+
+    def compile_loop_body(self, body: ast.BlockStatement):
+        loop = LoopContext()
+        self.loops.append(loop)
+        code = self.compile_block_statement(body)
+        self.loops.pop()
+        return code, loop
+
+    def compile_while_expression(self, node: ast.WhileExpression) -> Code:
+        condition = self.compile_node(node.condition)
+        body, loop = self.compile_loop_body(node.body)
+        Environment = mobject.Environment
+        if not (loop.has_break or loop.has_continue):
+            def while_(env):
+                result = NULL
+                while True:
+                    c = condition(env)
+                    if not (c is TRUE or (c is not FALSE and is_truthy(c))):
+                        return result
+                    result = body(Environment(outer=env))
+            return while_
+        def while_with_exits(env):
+            result = NULL
+            while True:
+                c = condition(env)
+                if not (c is TRUE or (c is not FALSE and is_truthy(c))):
+                    return result
+                try:
+                    result = body(Environment(outer=env))
+                except ContinueSignal:
+                    result = NULL
+                except BreakSignal:
+                    return NULL
+        return while_with_exits
+
+    def compile_for_expression(self, node: ast.ForExpression) -> Code:
+        iterator = self.compile_node(node.iterator)
+        name = node.element.value
+        body, loop = self.compile_loop_body(node.body)
+        Environment = mobject.Environment
+        def elements(env):
+            it = iterator(env)
+            elements = it.iterate()
+            if elements is None:
+                raise ErrorSignal(new_error("cannot iterate over {}", it.typ))
+            return elements
+        if not (loop.has_break or loop.has_continue):
+            def for_(env):
+                result = NULL
+                for value in elements(env):
+                    result = body(Environment(store={name: value}, outer=env))
+                return result
+            return for_
+        def for_with_exits(env):
+            result = NULL
+            for value in elements(env):
+                try:
+                    result = body(Environment(store={name: value}, outer=env))
+                except ContinueSignal:
+                    result = NULL
+                except BreakSignal:
+                    return NULL
+            return result
+        return for_with_exits
+
+    def compile_function_literal(self, node: ast.FunctionLiteral) -> Code:
+        self.loops.append(None)
+        code = self.compile_block_statement(node.body, tail=True)
+        self.loops.pop()
+        parameters = node.parameters
+        body = node.body
+        names = [param.value for param in parameters]
+        def function(env):
+            return ClosureFunction(parameters=parameters, body=body, env=env, code=code, parameter_names=names)
+        return function
+
+    def compile_call_expression(self, node: ast.CallExpression) -> Code:
+        function = self.compile_node(node.function)
+        arguments = [self.compile_node(arg) for arg in node.arguments]
+        def call(env):
+            fn = function(env)
+            return apply_function(fn, [arg(env) for arg in arguments])
+        return call
+
+    def compile_array_literal(self, node: ast.ArrayLiteral) -> Code:
+        elements = [self.compile_node(element) for element in node.elements]
+        return lambda env: mobject.Array(elements=[element(env) for element in elements])
+
+    def compile_index_expression(self, node: ast.IndexExpression) -> Code:
+        left = self.compile_node(node.left)
+        index = self.compile_node(node.index)
+        return lambda env: check(eval_index_expression(left(env), index(env)))
+
+    def compile_hash_literal(self, node: ast.HashLiteral) -> Code:
+        pairs = [(self.compile_node(k), self.compile_node(v)) for k, v in node.pairs]
+        def hash_literal(env):
+            items = []
+            for key_code, value_code in pairs:
+                key = key_code(env)
+                if not isinstance(key, mobject.Hashable):
+                    raise ErrorSignal(new_error("unusable as hash key: {}", key.typ))
+                items.append((key, value_code(env)))
+            return mobject.Hash(storage=mobject.hash_storage(items))
+        return hash_literal
+
+    def compile_record_literal(self, node: ast.RecordLiteral) -> Code:
+        record_type = node.constant
+        return lambda env: record_type
+
+    def compile_field_expression(self, node: ast.FieldExpression) -> Code:
+        left = self.compile_node(node.left)
+        name = node.name
+        # The record type last seen here and the offset of the field in it.
+        cache = [None, 0]
+        def field(env):
+            record = left(env)
+            if type(record) is mobject.Record and record.record_type is cache[0]:
+                return record.values[cache[1]]
+            value = check(eval_field_expression(record, name))
+            cache[0] = record.record_type
+            cache[1] = record.record_type.offsets[name]
+            return value
+        return field
+
+def apply_function(fn: MonkeyObject, args: List[MonkeyObject]) -> MonkeyObject:
+    while True:
+        if type(fn) is ClosureFunction:
+            names = fn.parameter_names
+            if len(names) > len(args):
+                raise ErrorSignal(new_error("function call missing required arguments: {}", ', '.join(names[len(args):])))
+            try:
+                result = fn.code(mobject.Environment(store=dict(zip(names, args)), outer=fn.env))
+            except ReturnSignal as r:
+                result = r.value
+            if type(result) is not mobject.TailCall:
+                return result
+            fn, args = result.fn, result.args
+        elif type(fn) is mobject.Builtin:
+            return check(fn.fn(*args))
+        elif type(fn) is mobject.RecordType:
+            return check(new_record(fn, args))
+        else:
+            raise ErrorSignal(new_error("not a function: {}", fn.typ))
+
+def run(program: ast.Program, env: mobject.Environment) -> MonkeyObject:
+    c = ClosureCompiler()
+    code = c.compile_program(program)
+    if len(c.errors) != 0:
+        return new_error(c.errors[0])
+    try:
+        return code(env)
+    except ReturnSignal as r:
+        return r.value
+    except ErrorSignal as e:
+        return e.error
+    except RecursionError:
+        return stack_overflow_error()
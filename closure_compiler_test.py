@@ -0,0 +1,186 @@
+import lexer
+import parser
+import monkey_object as mobject
+from monkey_object import MonkeyObject
+import closure_compiler
+from evaluator_test import integer_object_test, boolean_object_test, string_object_test, null_object_test, error_test
+
+def run_test(input: str) -> MonkeyObject:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    program = p.parse_program()
+    env = mobject.Environment()
+
+    return closure_compiler.run(program, env)
+
+def test_integer_arithmetic():
+    tests = [
+        ("5", 5),
+        ("-10", -10),
+        ("5 + 5 + 2", 12),
+        ("(5+10*2+15/3)*2+-10", 50),
+        ("let a = 2; a = 3;", 3),
+        ("let a = 5; 5+10*(a=2);", 25),
+        ("let a = 3; let f = fn(){a=1;}; f(); a;", 1),
+    ]
+
+    for input, expected in tests:
+        integer_object_test(run_test(input), expected)
+
+def test_boolean_expressions():
+    tests = [
+        ("true", True),
+        ("1 < 2", True),
+        ("1 != 1", False),
+        ("true != false", True),
+        ("(1<2) == true", True),
+        ("!5", False),
+        ("!!true", True),
+    ]
+
+    for input, expected in tests:
+        boolean_object_test(run_test(input), expected)
+
+def test_conditionals_and_loops():
+    tests = [
+        ("if(1>2){10}else{2}", 2),
+        ("if(false){10}", None),
+        ("for(x in []){1}", None),
+        ("let n = 0; for(c in \"abc\"){n = n + len(c)}; n;", 3),
+        ("let s = 0; for(k in {1: 10, 2: 20}){s = s + k}; s;", 3),
+        ("let s = 0; for(p in pairs({1: 10, 2: 20})){s = s + p[0] * p[1]}; s;", 50),
+        ("let s = 0; for(x in union(to_set([1, 2]), to_set([2, 3]))){s = s + x}; s;", 6),
+        ("let h = heap([3, 1]); let q = deque([]); for(x in h){push_front(q, x)}; pop_front(q) * 10 + heap_pop(h);", 31),
+        ("let s = 0; for(x in slice(range(1000000), 10, 13)){s = s + x}; s;", 33),
+        ("for(x in [1,2,3]){x;}", 3),
+        ("let a = 5; for(x in range(10)){a=x; break;}; a;", 0),
+        ("for(x in range(10)){continue}", None),
+        ("let sum=0; for(x in range(5)){if(x==2){continue; sum = 100;}; sum = sum + x;}; sum;", 8),
+        ("let a = for(x in range(5)){x}; a;", 4),
+        ("let i = 2; while(i>0){i = i-1; i;}", 0),
+        ("let i = 0; while(i<10){if(i==5){return 8;}; i = i+1;}", 8),
+        ("let i = 0; while(i<10){if(i==5){break; i = 6;}; i = i+1;}; i;", 5),
+        ("let i = 0; let a = while(i<10){i = i+1; i;}; a;", 10),
+        ("let n = 0; for(x in range(3)){for(y in range(3)){if(y==1){break;}; n = n + 1;}}; n;", 3),
+        ("let x = 1; for(i in range(3)){let x = 10;}; x;", 1),
+        ("let f = fn(){for(x in range(10)){if(x==3){return x;}}}; f() + 1;", 4),
+        ("let i = 0; [10, while(true){i = i + 1; if(i>2){break;}}][0] + i;", 13),
+    ]
+
+    for input, expected in tests:
+        evaluated = run_test(input)
+        if expected is not None:
+            integer_object_test(evaluated, expected)
+        else:
+            null_object_test(evaluated)
+
+def test_functions_and_closures():
+    tests = [
+        ("let identity = fn(x){return x;}; identity(5);", 5),
+        ("let add = fn(x, y){x + y}; add(5, 2);", 7),
+        ("let new_adder = fn(x){fn(y){x + y}}; let add_two = new_adder(2); add_two(2);", 4),
+        ("let fact = fn(n){if(n<2){return 1;}; n * fact(n-1)}; fact(5);", 120),
+        ("let counter = fn(){let c = 0; fn(){c = c + 1}}; let inc = counter(); inc(); inc();", 2),
+    ]
+
+    for input, expected in tests:
+        integer_object_test(run_test(input), expected)
+
+def test_strings_arrays_and_hashes():
+    string_object_test(run_test('"Hello " + "World!"'), "Hello World!")
+    integer_object_test(run_test("[1, 2*2, 3+3][1]"), 4)
+    integer_object_test(run_test('let two = "two"; {"one": 1, two: 2}["two"]'), 2)
+    integer_object_test(run_test("len(push([1, 2], 3))"), 3)
+    null_object_test(run_test('{"foo": 5}["bar"]'))
+
+def test_error_handling():
+    tests = [
+        ("5 + true; 5;", "type mismatch: INTEGER + BOOLEAN"),
+        ("-true", "unknown operator: -BOOLEAN"),
+        ("if(10>1){true+false;}", "unknown operator: BOOLEAN + BOOLEAN"),
+        ("foobar", "identifier not found: foobar"),
+        ('fn(x,y,z){}(2)', "function call missing required arguments: y, z"),
+        ('{"name": "monkey"}[fn(x){x}];', "unusable as hash key: FUNCTION"),
+        ("a = 3;", "variable 'a' does not exist. Can't reassign"),
+        ("break;", "break cannot be used outside of a loop"),
+        ("for(x in 5){1}", "cannot iterate over INTEGER"),
+        ('len("one", "two")', "wrong number of arguments. got 2, want 1"),
+    ]
+
+    for input, expected in tests:
+        error_test(run_test(input), expected)
+
+def test_stack_overflow():
+    input = "let f = fn(n){ if (n == 0) { 0 } else { 1 + f(n - 1) } }; f(5000);"
+    error_test(run_test(input), "stack overflow: too many nested calls, the vm engine supports deeper recursion")
+
+def test_tail_calls():
+    tests = [
+        ("let count = fn(n, acc){ if(n == 0){ return acc; }; return count(n - 1, acc + 1); }; count(20000, 0);", 20000),
+        ("""
+        let is_even = fn(n){ if(n == 0){ return 1; }; return is_odd(n - 1); };
+        let is_odd = fn(n){ if(n == 0){ return 0; }; return is_even(n - 1); };
+        is_even(10001);
+        """, 0),
+        ("let f = fn(n){ for(x in range(3)){ return g(n + x); }; 0 }; let g = fn(x){ x * 2 }; f(5);", 10),
+        ("let f = fn(n){ while(n > 0){ return f(n - 1); }; 7 }; f(3000);", 7),
+        ("let f = fn(x){ return len(x); }; f([1, 2]);", 2),
+        ("let f = fn(n){ if(n == 0){ return 1; }; return n * f(n - 1); }; f(5);", 120),
+    ]
+
+    for input, expected in tests:
+        integer_object_test(run_test(input), expected)
+
+def test_return_statements():
+    tests = [
+        ("return 10; 9;", 10),
+        ("9; return 2*5; 9;", 10),
+        ("if (true){ if(true){ return 1; } return 2; }", 1),
+        ("let f = fn(x){if(x>1){return 1;}; return 2;}; f(5) + f(0);", 3),
+        ("let f = fn(){for(x in range(3)){ return 7; }; 0}; f();", 7),
+    ]
+
+    for input, expected in tests:
+        integer_object_test(run_test(input), expected)
+
+def test_index_assignment():
+    tests = [
+        ("let a = [1, 2, 3]; a[1] = 5; a[1];", 5),
+        ("let a = [1, 2]; a[0] = 3;", 3),
+        ("let a = [1, 2, 3]; let b = a; b[0] = 7; a[0];", 7),
+        ("let a = [1, 2, 3]; let b = push(a, 4); b[0] = 9; a[0];", 1),
+        ("let a = range(5); a[4] = 10; a[4] + len(a);", 15),
+        ("let f = fn(a){ a[0] = 1 }; let b = [0]; f(b); b[0];", 1),
+        ("let a = [[1], [2]]; a[1][0] = 5; a[1][0];", 5),
+        ('let h = {}; h["a"] = 1; h["b"] = 2; h["a"] + h["b"];', 3),
+        ('let h = {"a": 1}; let g = h; g["a"] = 5; size(h) + h["a"];', 6),
+        ("let h = {1: 1, 2: 2, 3: 3}; for (k in h) { delete(h, k) }; size(h);", 0),
+        ("let a = [1]; a[1] = 2;", "index out of range: 1"),
+        ('let a = [1]; a["x"] = 2;', "index must be INTEGER, got STRING"),
+        ("let a = 1; a[0] = 2;", "index assignment not supported: INTEGER"),
+        ("let h = {}; h[[1]] = 2;", "unusable as hash key: ARRAY"),
+    ]
+
+    for input, expected in tests:
+        if type(expected) == int:
+            integer_object_test(run_test(input), expected)
+        else:
+            error_test(run_test(input), expected)
+
+def test_records():
+    tests = [
+        ("let P = record(x, y); let p = P(1, 2); p.x * 10 + p.y;", 12),
+        ("let P = record(x); let Q = record(p); Q(P(5)).p.x;", 5),
+        ("let A = record(x, y); let B = record(y); let f = fn(r){ r.y }; f(A(1, 2)) + f(B(3)) + f(A(4, 5));", 10),
+        ("let P = record(x); let ps = []; for(i in range(3)){ ps = push(ps, P(i)) }; ps[2].x;", 2),
+        ("let P = record(x); let f = fn(n){ return P(n); }; f(7).x;", 7),
+        ("let P = record(x); P(1).z;", "P has no field z"),
+        ("let P = record(x); P(1, 2);", "wrong number of fields for P. got 2, want 1"),
+        ("let a = 5; a.x;", "field access not supported: INTEGER"),
+    ]
+
+    for input, expected in tests:
+        if type(expected) == int:
+            integer_object_test(run_test(input), expected)
+        else:
+            error_test(run_test(input), expected)
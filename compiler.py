@@ -0,0 +1,395 @@
+import monkey_ast as ast
+import monkey_object as mobject
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Callable, NamedTuple
+
+# Opcodes. Instructions are stored as a flat list of ints: each opcode is
+# followed by its operands, one list entry per operand.
+
+OP_CONSTANT = 0
+OP_POP = 1
+OP_NULL = 2
+OP_NONE = 3
+OP_TRUE = 4
+OP_FALSE = 5
+OP_ADD = 6
+OP_SUB = 7
+OP_MUL = 8
+OP_DIV = 9
+OP_EQUAL = 10
+OP_NOT_EQUAL = 11
+OP_GREATER_THAN = 12
+OP_LESS_THAN = 13
+OP_MINUS = 14
+OP_BANG = 15
+OP_JUMP = 16
+OP_JUMP_NOT_TRUTHY = 17
+OP_GET_NAME = 18
+OP_SET_NAME = 19
+OP_ASSIGN_NAME = 20
+OP_ARRAY = 21
+OP_HASH = 22
+OP_INDEX = 23
+OP_CLOSURE = 24
+OP_CALL = 25
+OP_RETURN_VALUE = 26
+OP_PUSH_SCOPE = 27
+OP_POP_SCOPE = 28
+OP_SETUP_LOOP = 29
+OP_SETUP_FOR = 30
+OP_POP_BLOCK = 31
+OP_GET_ITER = 32
+OP_FOR_ITER = 33
+OP_BREAK = 34
+OP_CONTINUE = 35
+OP_HALT = 36
+OP_SET_INDEX = 37
+OP_GET_FIELD = 38
+
+class Definition(NamedTuple):
+    name: str
+    operand_count: int
+
+definitions: Dict[int, Definition] = {
+    OP_CONSTANT: Definition("OpConstant", 1),
+    OP_POP: Definition("OpPop", 0),
+    OP_NULL: Definition("OpNull", 0),
+    OP_NONE: Definition("OpNone", 0),
+    OP_TRUE: Definition("OpTrue", 0),
+    OP_FALSE: Definition("OpFalse", 0),
+    OP_ADD: Definition("OpAdd", 0),
+    OP_SUB: Definition("OpSub", 0),
+    OP_MUL: Definition("OpMul", 0),
+    OP_DIV: Definition("OpDiv", 0),
+    OP_EQUAL: Definition("OpEqual", 0),
+    OP_NOT_EQUAL: Definition("OpNotEqual", 0),
+    OP_GREATER_THAN: Definition("OpGreaterThan", 0),
+    OP_LESS_THAN: Definition("OpLessThan", 0),
+    OP_MINUS: Definition("OpMinus", 0),
+    OP_BANG: Definition("OpBang", 0),
+    OP_JUMP: Definition("OpJump", 1),
+    OP_JUMP_NOT_TRUTHY: Definition("OpJumpNotTruthy", 1),
+    OP_GET_NAME: Definition("OpGetName", 1),
+    OP_SET_NAME: Definition("OpSetName", 1),
+    OP_ASSIGN_NAME: Definition("OpAssignName", 1),
+    OP_ARRAY: Definition("OpArray", 1),
+    OP_HASH: Definition("OpHash", 1),
+    OP_INDEX: Definition("OpIndex", 0),
+    OP_CLOSURE: Definition("OpClosure", 1),
+    OP_CALL: Definition("OpCall", 1),
+    OP_RETURN_VALUE: Definition("OpReturnValue", 0),
+    OP_PUSH_SCOPE: Definition("OpPushScope", 0),
+    OP_POP_SCOPE: Definition("OpPopScope", 0),
+    OP_SETUP_LOOP: Definition("OpSetupLoop", 2),
+    OP_SETUP_FOR: Definition("OpSetupFor", 2),
+    OP_POP_BLOCK: Definition("OpPopBlock", 0),
+    OP_GET_ITER: Definition("OpGetIter", 0),
+    OP_FOR_ITER: Definition("OpForIter", 2),
+    OP_BREAK: Definition("OpBreak", 0),
+    OP_CONTINUE: Definition("OpContinue", 0),
+    OP_HALT: Definition("OpHalt", 0),
+    OP_SET_INDEX: Definition("OpSetIndex", 0),
+    OP_GET_FIELD: Definition("OpGetField", 1),
+}
+
+infix_opcodes: Dict[str, int] = {
+    "+": OP_ADD,
+    "-": OP_SUB,
+    "*": OP_MUL,
+    "/": OP_DIV,
+    "==": OP_EQUAL,
+    "!=": OP_NOT_EQUAL,
+    ">": OP_GREATER_THAN,
+    "<": OP_LESS_THAN,
+}
+
+prefix_opcodes: Dict[str, int] = {
+    "-": OP_MINUS,
+    "!": OP_BANG,
+}
+
+def make(op: int, *operands: int) -> List[int]:
+    return [op, *operands]
+
+def disassemble(instructions: List[int]) -> str:
+    lines = []
+    i = 0
+    while i < len(instructions):
+        definition = definitions.get(instructions[i])
+        if definition is None:
+            lines.append(f"{i:04d} ERROR: undefined opcode {instructions[i]}")
+            i += 1
+            continue
+        operands = instructions[i+1:i+1+definition.operand_count]
+        lines.append(" ".join([f"{i:04d}", definition.name] + [str(o) for o in operands]))
+        i += 1 + definition.operand_count
+    return "\n".join(lines)
+
+@dataclass
+class Bytecode:
+    instructions: List[int]
+    constants: List[object]
+
+@dataclass
+class CompilationScope:
+    instructions: List[int] = field(default_factory=lambda: [])
+    loop_depth: int = 0
+
+class Compiler:
+    def __init__(self, constants: List[object] = None):
+        self.constants: List[object] = constants if constants is not None else []
+        self.constant_indices: Dict[tuple, int] = {}
+        self.scopes: List[CompilationScope] = [CompilationScope()]
+        self.errors: List[str] = []
+
+        self.compile_functions: Dict[type, Callable] = {
+            ast.ExpressionStatement: self.compile_expression_statement,
+            ast.LetStatement: self.compile_let_statement,
+            ast.ReturnStatement: self.compile_return_statement,
+            ast.BreakStatement: self.compile_break_statement,
+            ast.ContinueStatement: self.compile_continue_statement,
+            ast.IntegerLiteral: self.compile_integer_literal,
+            ast.StringLiteral: self.compile_string_literal,
+            ast.Constant: self.compile_constant,
+            ast.Boolean: self.compile_boolean,
+            ast.Identifier: self.compile_identifier,
+            ast.PrefixExpression: self.compile_prefix_expression,
+            ast.InfixExpression: self.compile_infix_expression,
+            ast.AssignExpression: self.compile_assign_expression,
+            ast.IfExpression: self.compile_if_expression,
+            ast.ForExpression: self.compile_for_expression,
+            ast.WhileExpression: self.compile_while_expression,
+            ast.FunctionLiteral: self.compile_function_literal,
+            ast.CallExpression: self.compile_call_expression,
+            ast.ArrayLiteral: self.compile_array_literal,
+            ast.IndexExpression: self.compile_index_expression,
+            ast.HashLiteral: self.compile_hash_literal,
+            ast.RecordLiteral: self.compile_record_literal,
+            ast.FieldExpression: self.compile_field_expression,
+        }
+
+    @property
+    def scope(self) -> CompilationScope:
+        return self.scopes[-1]
+
+    def bytecode(self) -> Bytecode:
+        return Bytecode(instructions=self.scope.instructions, constants=self.constants)
+
+    def emit(self, op: int, *operands: int) -> int:
+        position = len(self.scope.instructions)
+        self.scope.instructions.extend(make(op, *operands))
+        return position
+
+    def change_operand(self, position: int, operand: int, offset: int = 1):
+        self.scope.instructions[position + offset] = operand
+
+    def add_constant(self, kind: str, value, obj=None) -> int:
+        key = (kind, value)
+        idx = self.constant_indices.get(key)
+        if idx is None:
+            idx = len(self.constants)
+            self.constants.append(obj if obj is not None else value)
+            self.constant_indices[key] = idx
+        return idx
+
+    def name_constant(self, name: str) -> int:
+        return self.add_constant("name", name)
+
+    def compile_program(self, program: ast.Program) -> Bytecode:
+        self.compile_statements(program.statements, empty_value=OP_NONE)
+        self.emit(OP_HALT)
+        return self.bytecode()
+
+    def compile_statements(self, statements: List[ast.Statement], empty_value: int = OP_NULL):
+        # Leaves exactly one value on the stack: the value of the last
+        # statement, like eval_block_statement does.
+        if not statements:
+            self.emit(empty_value)
+            return
+        for i, statement in enumerate(statements):
+            pushed = self.compile_statement(statement)
+            if i < len(statements) - 1:
+                if pushed:
+                    self.emit(OP_POP)
+            elif not pushed:
+                self.emit(OP_NONE)
+
+    def compile_statement(self, statement: ast.Statement) -> bool:
+        return self.compile_functions[type(statement)](statement)
+
+    def compile_block_statement(self, block: ast.BlockStatement):
+        self.compile_statements(block.statements if block is not None else [])
+
+    def compile_expression(self, node: ast.Expression):
+        compile_function = self.compile_functions.get(type(node))
+        if compile_function is None:
+            self.errors.append(f"cannot compile node: {node}")
+            self.emit(OP_NULL)
+            return
+        compile_function(node)
+
+    def compile_expression_statement(self, statement: ast.ExpressionStatement) -> bool:
+        if statement.expression is None:
+            return False
+        self.compile_expression(statement.expression)
+        return True
+
+    def compile_let_statement(self, statement: ast.LetStatement) -> bool:
+        self.compile_expression(statement.value)
+        self.emit(OP_SET_NAME, self.name_constant(statement.name.value))
+        return False
+
+    def compile_return_statement(self, statement: ast.ReturnStatement) -> bool:
+        self.compile_expression(statement.return_value)
+        self.emit(OP_RETURN_VALUE)
+        return True
+
+    def compile_break_statement(self, statement: ast.BreakStatement) -> bool:
+        if self.scope.loop_depth == 0:
+            self.errors.append("break cannot be used outside of a loop")
+        self.emit(OP_BREAK)
+        return True
+
+    def compile_continue_statement(self, statement: ast.ContinueStatement) -> bool:
+        if self.scope.loop_depth == 0:
+            self.errors.append("continue cannot be used outside of a loop")
+        self.emit(OP_CONTINUE)
+        return True
+
+    def compile_integer_literal(self, node: ast.IntegerLiteral):
+        self.emit(OP_CONSTANT, self.add_constant("int", node.value, node.constant))
+
+    def compile_string_literal(self, node: ast.StringLiteral):
+        self.emit(OP_CONSTANT, self.add_constant("str", node.value, node.constant))
+
+    def compile_constant(self, node: ast.Constant):
+        self.emit(OP_CONSTANT, self.add_constant("obj", id(node.value), node.value))
+
+    def compile_boolean(self, node: ast.Boolean):
+        self.emit(OP_TRUE if node.value else OP_FALSE)
+
+    def compile_identifier(self, node: ast.Identifier):
+        self.emit(OP_GET_NAME, self.name_constant(node.value))
+
+    def compile_prefix_expression(self, node: ast.PrefixExpression):
+        self.compile_expression(node.right)
+        op = prefix_opcodes.get(node.operator)
+        if op is None:
+            self.errors.append(f"unknown operator: {node.operator}")
+            return
+        self.emit(op)
+
+    def compile_infix_expression(self, node: ast.InfixExpression):
+        self.compile_expression(node.left)
+        self.compile_expression(node.right)
+        op = infix_opcodes.get(node.operator)
+        if op is None:
+            self.errors.append(f"unknown operator: {node.operator}")
+            return
+        self.emit(op)
+
+    def compile_assign_expression(self, node: ast.AssignExpression):
+        if type(node.name) == ast.IndexExpression:
+            self.compile_expression(node.name.left)
+            self.compile_expression(node.name.index)
+            self.compile_expression(node.value)
+            self.emit(OP_SET_INDEX)
+            return
+        if type(node.name) != ast.Identifier:
+            self.errors.append(f"invalid assignment target: {node.name}")
+            return
+        self.compile_expression(node.value)
+        self.emit(OP_ASSIGN_NAME, self.name_constant(node.name.value))
+
+    def compile_if_expression(self, node: ast.IfExpression):
+        self.compile_expression(node.condition)
+        jump_not_truthy = self.emit(OP_JUMP_NOT_TRUTHY, 0)
+        self.compile_block_statement(node.consequence)
+        jump = self.emit(OP_JUMP, 0)
+        self.change_operand(jump_not_truthy, len(self.scope.instructions))
+        if node.alternative is not None:
+            self.compile_block_statement(node.alternative)
+        else:
+            self.emit(OP_NULL)
+        self.change_operand(jump, len(self.scope.instructions))
+
+    def compile_loop_body(self, body: ast.BlockStatement):
+        self.scope.loop_depth += 1
+        self.compile_block_statement(body)
+        self.scope.loop_depth -= 1
+
+    def compile_while_expression(self, node: ast.WhileExpression):
+        # The loop keeps its current result on the stack; the body replaces it
+        # on every iteration.
+        setup = self.emit(OP_SETUP_LOOP, 0, 0)
+        self.emit(OP_NULL)
+        condition = len(self.scope.instructions)
+        self.compile_expression(node.condition)
+        jump_not_truthy = self.emit(OP_JUMP_NOT_TRUTHY, 0)
+        self.emit(OP_POP)
+        self.emit(OP_PUSH_SCOPE)
+        self.compile_loop_body(node.body)
+        self.emit(OP_POP_SCOPE)
+        self.emit(OP_JUMP, condition)
+        self.change_operand(jump_not_truthy, len(self.scope.instructions))
+        self.emit(OP_POP_BLOCK)
+        self.change_operand(setup, len(self.scope.instructions))
+        self.change_operand(setup, condition, offset=2)
+
+    def compile_for_expression(self, node: ast.ForExpression):
+        self.compile_expression(node.iterator)
+        self.emit(OP_GET_ITER)
+        setup = self.emit(OP_SETUP_FOR, 0, 0)
+        self.emit(OP_NULL)
+        for_iter = self.emit(OP_FOR_ITER, self.name_constant(node.element.value), 0)
+        self.compile_loop_body(node.body)
+        self.emit(OP_POP_SCOPE)
+        self.emit(OP_JUMP, for_iter)
+        end = len(self.scope.instructions)
+        self.change_operand(for_iter, end, offset=2)
+        self.change_operand(setup, end)
+        self.change_operand(setup, for_iter, offset=2)
+
+    def compile_function_literal(self, node: ast.FunctionLiteral):
+        self.scopes.append(CompilationScope())
+        self.compile_block_statement(node.body)
+        self.emit(OP_RETURN_VALUE)
+        instructions = self.scopes.pop().instructions
+        compiled = mobject.CompiledFunction(
+            instructions=instructions,
+            constants=self.constants,
+            parameters=node.parameters,
+            body=node.body,
+        )
+        self.constants.append(compiled)
+        self.emit(OP_CLOSURE, len(self.constants) - 1)
+
+    def compile_call_expression(self, node: ast.CallExpression):
+        self.compile_expression(node.function)
+        for arg in node.arguments:
+            self.compile_expression(arg)
+        self.emit(OP_CALL, len(node.arguments))
+
+    def compile_array_literal(self, node: ast.ArrayLiteral):
+        for element in node.elements:
+            self.compile_expression(element)
+        self.emit(OP_ARRAY, len(node.elements))
+
+    def compile_index_expression(self, node: ast.IndexExpression):
+        self.compile_expression(node.left)
+        self.compile_expression(node.index)
+        self.emit(OP_INDEX)
+
+    def compile_hash_literal(self, node: ast.HashLiteral):
+        for key, value in node.pairs:
+            self.compile_expression(key)
+            self.compile_expression(value)
+        self.emit(OP_HASH, len(node.pairs))
+
+    def compile_record_literal(self, node: ast.RecordLiteral):
+        self.emit(OP_CONSTANT, self.add_constant("obj", id(node.constant), node.constant))
+
+    def compile_field_expression(self, node: ast.FieldExpression):
+        self.compile_expression(node.left)
+        self.emit(OP_GET_FIELD, self.name_constant(node.name))
@@ -0,0 +1,123 @@
+import lexer
+import parser
+import compiler
+from compiler import make
+import monkey_object as mobject
+from typing import List
+
+def parse(input: str):
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    return p.parse_program()
+
+def concat_instructions(instructions: List[List[int]]) -> List[int]:
+    return [ins for instruction in instructions for ins in instruction]
+
+def compile_test(input: str) -> compiler.Bytecode:
+    c = compiler.Compiler()
+    bytecode = c.compile_program(parse(input))
+    assert len(c.errors) == 0, f"compiler has errors: {c.errors}"
+    return bytecode
+
+def instructions_test(actual: List[int], expected: List[List[int]]):
+    expected = concat_instructions(expected)
+    assert actual == expected, f"wrong instructions.\nwant:\n{compiler.disassemble(expected)}\ngot:\n{compiler.disassemble(actual)}"
+
+def test_integer_arithmetic():
+    tests = [
+        ("1 + 2", [1, 2], [
+            make(compiler.OP_CONSTANT, 0),
+            make(compiler.OP_CONSTANT, 1),
+            make(compiler.OP_ADD),
+            make(compiler.OP_HALT),
+        ]),
+        ("1; 2", [1, 2], [
+            make(compiler.OP_CONSTANT, 0),
+            make(compiler.OP_POP),
+            make(compiler.OP_CONSTANT, 1),
+            make(compiler.OP_HALT),
+        ]),
+        ("2 * 2 - 2", [2], [
+            make(compiler.OP_CONSTANT, 0),
+            make(compiler.OP_CONSTANT, 0),
+            make(compiler.OP_MUL),
+            make(compiler.OP_CONSTANT, 0),
+            make(compiler.OP_SUB),
+            make(compiler.OP_HALT),
+        ]),
+        ("-1", [1], [
+            make(compiler.OP_CONSTANT, 0),
+            make(compiler.OP_MINUS),
+            make(compiler.OP_HALT),
+        ]),
+    ]
+
+    for input, expected_constants, expected_instructions in tests:
+        bytecode = compile_test(input)
+        instructions_test(bytecode.instructions, expected_instructions)
+        assert [c.value for c in bytecode.constants] == expected_constants, f"wrong constants. got {bytecode.constants}"
+
+def test_conditionals():
+    bytecode = compile_test("if (true) { 10 }; 3333;")
+    instructions_test(bytecode.instructions, [
+        make(compiler.OP_TRUE),
+        make(compiler.OP_JUMP_NOT_TRUTHY, 7),
+        make(compiler.OP_CONSTANT, 0),
+        make(compiler.OP_JUMP, 8),
+        make(compiler.OP_NULL),
+        make(compiler.OP_POP),
+        make(compiler.OP_CONSTANT, 1),
+        make(compiler.OP_HALT),
+    ])
+
+def test_let_statements():
+    bytecode = compile_test("let one = 1; one;")
+    instructions_test(bytecode.instructions, [
+        make(compiler.OP_CONSTANT, 0),
+        make(compiler.OP_SET_NAME, 1),
+        make(compiler.OP_GET_NAME, 1),
+        make(compiler.OP_HALT),
+    ])
+    assert bytecode.constants[1] == "one", f"wrong name constant. got {bytecode.constants[1]}"
+
+def test_functions():
+    bytecode = compile_test("fn(){ return 5 + 10 }")
+    instructions_test(bytecode.instructions, [
+        make(compiler.OP_CLOSURE, 2),
+        make(compiler.OP_HALT),
+    ])
+    fn = bytecode.constants[2]
+    assert isinstance(fn, mobject.CompiledFunction), f"constant is not CompiledFunction. got {type(fn)}"
+    instructions_test(fn.instructions, [
+        make(compiler.OP_CONSTANT, 0),
+        make(compiler.OP_CONSTANT, 1),
+        make(compiler.OP_ADD),
+        make(compiler.OP_RETURN_VALUE),
+        make(compiler.OP_RETURN_VALUE),
+    ])
+
+def test_compiler_errors():
+    tests = [
+        ("break;", "break cannot be used outside of a loop"),
+        ("continue;", "continue cannot be used outside of a loop"),
+        ("fn(){break;}", "break cannot be used outside of a loop"),
+    ]
+
+    for input, expected in tests:
+        c = compiler.Compiler()
+        c.compile_program(parse(input))
+        assert c.errors == [expected], f"wrong compiler errors. expected {[expected]}, got {c.errors}"
+
+def test_records():
+    bytecode = compile_test("record(x, y)(1, 2).y")
+    record_type = bytecode.constants[0]
+    assert type(record_type) == mobject.RecordType, f"constant is not RecordType. got {type(record_type)}"
+    instructions_test(bytecode.instructions, [
+        make(compiler.OP_CONSTANT, 0),
+        make(compiler.OP_CONSTANT, 1),
+        make(compiler.OP_CONSTANT, 2),
+        make(compiler.OP_CALL, 2),
+        make(compiler.OP_GET_FIELD, 3),
+        make(compiler.OP_HALT),
+    ])
+    assert bytecode.constants[3] == "y", f"wrong field name constant. got {bytecode.constants[3]}"
@@ -2,113 +2,125 @@ import monkey_object as mobject
 from monkey_object import MonkeyObject, NULL, TRUE, FALSE
 import monkey_ast as ast
 from monkey_builtins import builtins
-from evaluator_utils import new_error, is_error, is_return, is_break, is_continue
+import resolver
+from evaluator_utils import new_error, check, stack_overflow_error, ReturnSignal, BreakSignal, ContinueSignal, ErrorSignal
 
-from typing import List, Dict
+import operator
+from dataclasses import dataclass
+from typing import List, Dict, Callable, Tuple
 
 
 def eval(node: ast.Node, env: mobject.Environment) -> MonkeyObject:
-    typ = type(node)
-    if typ == ast.Program:
-        return eval_program(node, env)
-    elif typ == ast.ExpressionStatement:
-        return eval(node.expression, env)
-    elif typ == ast.IntegerLiteral:
-        return mobject.Integer(value=node.value)
-    elif typ == ast.Boolean:
-        return native_bool_to_boolean_object(node.value)
-    elif typ == ast.StringLiteral:
-        return mobject.String(value=node.value)
-    elif typ == ast.Identifier:
-        return eval_identifier(node, env)
-    elif typ == ast.PrefixExpression:
-        right = eval(node.right, env)
-        if is_error(right):
-            return right
-        return eval_prefix_expression(node.operator, right)
-    elif typ == ast.InfixExpression:
-        left = eval(node.left, env)
-        if is_error(left):
-            return left
-        right = eval(node.right, env)
-        if is_error(right):
-            return right
-        return eval_infix_expression(node.operator, left, right)
-    elif typ == ast.AssignExpression:
-        value = eval(node.value, env)
-        if is_error(value):
-            return value
-        val = env.reset(node.name.value, value)
-        if val is None:
-            return new_error("variable '{}' does not exist. Can't reassign", node.name.value)
-        return val
-    elif typ == ast.BlockStatement:
-        return eval_block_statement(node, env)
-    elif typ == ast.IfExpression:
-        return eval_if_expression(node, env)
-    elif typ == ast.ForExpression:
-        return eval_for_expression(node, env)
-    elif typ == ast.WhileExpression:
-        return eval_while_expression(node, env)
-    elif typ == ast.ReturnStatement:
+    return eval_functions.get(type(node), eval_unknown)(node, env)
+
+def eval_unknown(node: ast.Node, env: mobject.Environment) -> MonkeyObject:
+    return NULL
+
+def eval_expression_statement(node: ast.ExpressionStatement, env: mobject.Environment) -> MonkeyObject:
+    return eval(node.expression, env)
+
+def eval_integer_literal(node: ast.IntegerLiteral, env: mobject.Environment) -> MonkeyObject:
+    return node.constant
+
+def eval_boolean(node: ast.Boolean, env: mobject.Environment) -> MonkeyObject:
+    return TRUE if node.value else FALSE
+
+def eval_string_literal(node: ast.StringLiteral, env: mobject.Environment) -> MonkeyObject:
+    return node.constant
+
+def eval_constant(node: ast.Constant, env: mobject.Environment) -> MonkeyObject:
+    return node.value
+
+def eval_prefix_node(node: ast.PrefixExpression, env: mobject.Environment) -> MonkeyObject:
+    right = eval(node.right, env)
+    handler = node.handler
+    if handler is None:
+        handler = node.handler = prefix_handler(node.operator)
+    return check(handler(right))
+
+def eval_infix_node(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+    handler = node.handler
+    if handler is None:
+        return quicken_infix_node(node, env)
+    return handler(node, env)
+
+def eval_return_statement(node: ast.ReturnStatement, env: mobject.Environment) -> MonkeyObject:
+    if node.tail_call:
+        val = eval_tail_call(node.return_value, env)
+    else:
         val = eval(node.return_value, env)
-        if is_error(val):
-            return val
-        return mobject.ReturnValue(val)
-    elif typ == ast.BreakStatement:
-        return mobject.Break()
-    elif typ == ast.ContinueStatement:
-        return mobject.Continue()
-    elif typ == ast.LetStatement:
-        val = eval(node.value, env)
-        if is_error(val):
-            return val
+    # A return in tail position is already the value of the function body.
+    if node.tail:
+        return val
+    raise ReturnSignal(val)
+
+def eval_break_statement(node: ast.BreakStatement, env: mobject.Environment) -> MonkeyObject:
+    raise BreakSignal()
+
+def eval_continue_statement(node: ast.ContinueStatement, env: mobject.Environment) -> MonkeyObject:
+    raise ContinueSignal()
+
+def eval_let_statement(node: ast.LetStatement, env: mobject.Environment) -> MonkeyObject:
+    val = eval(node.value, env)
+    if node.slot is None:
         env.set(node.name.value, val)
-    elif typ == ast.FunctionLiteral:
-        params = node.parameters
-        body = node.body
-        return mobject.Function(parameters=params, body=body, env=env)
-    elif typ == ast.CallExpression:
-        function = eval(node.function, env)
-        if is_error(function):
-            return function
-        args = eval_expressions(node.arguments, env)
-        if len(args) == 1 and is_error(args[0]):
-            return args[0]
-        return apply_function(function, args)
-    elif typ == ast.ArrayLiteral:
-        elements = eval_expressions(node.elements, env)
-        if len(elements) == 1 and is_error(elements[0]):
-            return elements[0]
-        return mobject.Array(elements=elements)
-    elif typ == ast.IndexExpression:
-        left = eval(node.left, env)
-        if is_error(left):
-            return left
-        index = eval(node.index, env)
-        if is_error(index):
-            return index
-        return eval_index_expression(left, index)
-    elif typ == ast.HashLiteral:
-        return eval_hash_literal(node, env)
     else:
-        return NULL
+        env.slots[node.slot] = val
+
+def eval_function_literal(node: ast.FunctionLiteral, env: mobject.Environment) -> MonkeyObject:
+    return mobject.Function(parameters=node.parameters, body=node.body, env=env)
+
+def eval_call_expression(node: ast.CallExpression, env: mobject.Environment) -> MonkeyObject:
+    function = eval(node.function, env)
+    args = eval_expressions(node.arguments, env)
+    return apply_function(function, args)
+
+def eval_tail_call(node: ast.CallExpression, env: mobject.Environment) -> MonkeyObject:
+    # Evaluates the callee and arguments but leaves the call itself to the
+    # trampoline in apply_function, so the Python stack does not grow.
+    function = eval(node.function, env)
+    args = eval_expressions(node.arguments, env)
+    return mobject.TailCall(fn=function, args=args)
+
+def eval_array_literal(node: ast.ArrayLiteral, env: mobject.Environment) -> MonkeyObject:
+    elements = eval_expressions(node.elements, env)
+    return mobject.Array(elements=elements)
+
+def eval_index_node(node: ast.IndexExpression, env: mobject.Environment) -> MonkeyObject:
+    left = eval(node.left, env)
+    index = eval(node.index, env)
+    return check(eval_index_expression(left, index))
+
+def eval_record_literal(node: ast.RecordLiteral, env: mobject.Environment) -> MonkeyObject:
+    return node.constant
+
+def eval_field_node(node: ast.FieldExpression, env: mobject.Environment) -> MonkeyObject:
+    left = eval(node.left, env)
+    if type(left) is mobject.Record and left.record_type is node.record_type:
+        return left.values[node.offset]
+    value = check(eval_field_expression(left, node.name))
+    node.record_type = left.record_type
+    node.offset = left.record_type.offsets[node.name]
+    return value
 
 def eval_program(program: ast.Program, env: mobject.Environment) -> MonkeyObject:
     result: MonkeyObject
 
-    for statement in program.statements:
-        result = eval(statement, env)
-        if result is None:
-            continue
-        elif result.typ == mobject.RETURN_VALUE_OBJ:
-            return result.value
-        elif result.typ == mobject.ERROR_OBJ:
-            return result
-        elif is_break(result):
-            return new_error("break cannot be used outside of a loop")
-        elif is_continue(result):
-            return new_error("continue cannot be used outside of a loop")
+    resolver.resolve(program, env)
+
+    try:
+        for statement in program.statements:
+            result = eval(statement, env)
+    except ReturnSignal as r:
+        return r.value
+    except ErrorSignal as e:
+        return e.error
+    except RecursionError:
+        return stack_overflow_error()
+    except BreakSignal:
+        return new_error("break cannot be used outside of a loop")
+    except ContinueSignal:
+        return new_error("continue cannot be used outside of a loop")
 
     return result
 
@@ -117,29 +129,10 @@ def eval_block_statement(block: ast.BlockStatement, env: mobject.Environment) ->
 
     for statement in block.statements:
         result = eval(statement, env)
-        if is_return(result) or is_break(result) or is_continue(result) or is_error(result):
-            return result
-    return result
-
-def eval_loop_block_statement(block: ast.BlockStatement, env: mobject.Environment) -> MonkeyObject:
-    result: MonkeyObject = NULL
-
-    for statement in block.statements:
-        result = eval(statement, env)
-        if result is None:
-            continue
-        if result.typ in (mobject.RETURN_VALUE_OBJ, mobject.BREAK_OBJ, mobject.CONTINUE_OBJ, mobject.ERROR_OBJ):
-            return result
     return result
 
 def eval_expressions(exps: List[ast.Expression], env: mobject.Environment) -> List[MonkeyObject]:
-    result: List[MonkeyObject] = []
-    for exp in exps:
-        evaluated = eval(exp, env)
-        if is_error(evaluated):
-            return [evaluated]
-        result.append(evaluated)
-    return result
+    return [eval(exp, env) for exp in exps]
 
 def eval_index_expression(left: MonkeyObject, index: MonkeyObject) -> MonkeyObject:
     if left.typ == mobject.ARRAY_OBJ and index.typ == mobject.INTEGER_OBJ:
@@ -153,61 +146,120 @@ def eval_index_expression(left: MonkeyObject, index: MonkeyObject) -> MonkeyObje
 
 def eval_array_index_expression(left: mobject.Array, index: mobject.Integer) -> MonkeyObject:
     idx = index.value
-    max_idx = len(left.elements) - 1
-    if idx < 0 or idx > max_idx:
+    vector = left.vector
+    if idx < 0 or idx >= len(vector):
         return NULL
-    return left.elements[idx]
+    return vector.get(idx)
+
+def eval_index_assignment(left: MonkeyObject, index: MonkeyObject, value: MonkeyObject) -> MonkeyObject:
+    # Arrays are mutable boxes around a persistent vector: the assignment is
+    # seen through every reference to this array, but not by arrays derived
+    # from it earlier with push, rest or slice. Hashes are updated in place.
+    if left.typ == mobject.ARRAY_OBJ:
+        if index.typ != mobject.INTEGER_OBJ:
+            return new_error("index must be INTEGER, got {}", index.typ)
+        idx = index.value
+        if idx < 0 or idx >= len(left.vector):
+            return new_error("index out of range: {}", idx)
+        left.vector = left.vector.set(idx, value)
+        return value
+    elif left.typ == mobject.HASH_OBJ:
+        if not isinstance(index, mobject.Hashable):
+            return new_error("unusable as hash key: {}", index.typ)
+        left.storage = left.storage.set(index, value)
+        return value
+    return new_error("index assignment not supported: {}", left.typ)
 
 def eval_hash_index_expression(left: mobject.Hash, index: mobject.Hashable) -> MonkeyObject:
-    pair = left.pairs.get(index.hash_key)
-    if pair is None:
+    value = left.storage.get(index)
+    if value is None:
         return NULL
-    return pair.value
+    return value
+
+def eval_field_expression(left: MonkeyObject, name: str) -> MonkeyObject:
+    if left.typ != mobject.RECORD_OBJ:
+        return new_error("field access not supported: {}", left.typ)
+    offset = left.record_type.offsets.get(name)
+    if offset is None:
+        return new_error("{} has no field {}", left.record_type.name, name)
+    return left.values[offset]
+
+def new_record(record_type: mobject.RecordType, args: List[MonkeyObject]) -> MonkeyObject:
+    if len(args) != len(record_type.fields):
+        return new_error("wrong number of fields for {}. got {}, want {}", record_type.name, len(args), len(record_type.fields))
+    return mobject.Record(record_type, tuple(args))
 
 def eval_hash_literal(node: ast.HashLiteral, env: mobject.Environment) -> MonkeyObject:
-    pairs: Dict[mobject.HashKey, mobject.HashPair] = {}
+    items: List[Tuple[mobject.Hashable, MonkeyObject]] = []
 
     for key_node, value_node in node.pairs:
         key = eval(key_node, env)
-        if is_error(key):
-            return key
         if not isinstance(key, mobject.Hashable):
-            return new_error("unusable as hash key: {}", key.typ)
-        value = eval(value_node, env)
-        if is_error(value):
-            return value
-        
-        hashed = key.hash_key
-        pairs[hashed] = mobject.HashPair(key=key, value=value)
-    
-    return mobject.Hash(pairs=pairs)
+            raise ErrorSignal(new_error("unusable as hash key: {}", key.typ))
+        items.append((key, eval(value_node, env)))
+
+    return mobject.Hash(storage=mobject.hash_storage(items))
+
+def outer_env(env: mobject.Environment, depth: int) -> mobject.Environment:
+    while depth:
+        env = env.outer
+        depth -= 1
+    return env
 
 def eval_identifier(node: ast.Identifier, env: mobject.Environment) -> MonkeyObject:
-    val = env.get(node.value)
+    if node.builtin is not None:
+        return node.builtin
+    if node.slot is not None:
+        for depth, slot in ((node.depth, node.slot),) + node.fallback:
+            val = outer_env(env, depth).slots[slot]
+            if val is not None:
+                return val
+    val = outer_env(env, node.global_depth).get(node.value)
     if val is not None:
         return val
     builtin = builtins.get(node.value)
     if builtin is not None:
         return builtin
-    return new_error("identifier not found: {}", node.value)
+    raise ErrorSignal(new_error("identifier not found: {}", node.value))
+
+def eval_assign_expression(node: ast.AssignExpression, env: mobject.Environment) -> MonkeyObject:
+    name = node.name
+    if type(name) == ast.IndexExpression:
+        left = eval(name.left, env)
+        index = eval(name.index, env)
+        return check(eval_index_assignment(left, index, eval(node.value, env)))
+    if type(name) != ast.Identifier:
+        raise ErrorSignal(new_error("invalid assignment target: {}", name))
+    value = eval(node.value, env)
+    if name.slot is not None:
+        for depth, slot in ((name.depth, name.slot),) + name.fallback:
+            slots = outer_env(env, depth).slots
+            if slots[slot] is not None:
+                slots[slot] = value
+                return value
+    val = outer_env(env, name.global_depth).reset(name.value, value)
+    if val is None:
+        raise ErrorSignal(new_error("variable '{}' does not exist. Can't reassign", name.value))
+    return val
 
 def native_bool_to_boolean_object(value: bool) -> mobject.Boolean:
     return TRUE if value else FALSE
 
 def eval_prefix_expression(operator: str, right: MonkeyObject) -> MonkeyObject:
-    if operator == "!":
-        return eval_bang_operator_expression(right)
-    elif operator == "-":
-        return eval_minus_prefix_operator_expression(right)
-    else:
-        return new_error("unknown operator: {operator}{typ}", operator=operator, typ=right.typ)
+    return prefix_handler(operator)(right)
+
+def prefix_handler(operator: str) -> Callable[[MonkeyObject], MonkeyObject]:
+    handler = prefix_handlers.get(operator)
+    if handler is None:
+        return lambda right: new_error("unknown operator: {operator}{typ}", operator=operator, typ=right.typ)
+    return handler
 
 def eval_bang_operator_expression(right: MonkeyObject) -> MonkeyObject:
-    if right == TRUE:
+    if right is TRUE:
         return FALSE
-    elif right == FALSE:
+    elif right is FALSE:
         return TRUE
-    elif right == NULL:
+    elif right is NULL:
         return TRUE
     else:
         return FALSE
@@ -216,16 +268,16 @@ def eval_minus_prefix_operator_expression(right: MonkeyObject) -> MonkeyObject:
     if right.typ != mobject.INTEGER_OBJ:
         return new_error("unknown operator: -{}", right.typ)
     
-    return mobject.Integer(value=-right.value)
+    return mobject.integer(-right.value)
 
 def eval_infix_expression(operator: str, left: MonkeyObject, right: MonkeyObject) -> MonkeyObject:
     if left.typ == mobject.INTEGER_OBJ and right.typ == mobject.INTEGER_OBJ:
         return eval_integer_infix_expression(operator, left, right)
     elif left.typ == mobject.BOOLEAN_OBJ and right.typ == mobject.BOOLEAN_OBJ:
         if operator == "==":
-            return native_bool_to_boolean_object(left == right)
+            return native_bool_to_boolean_object(left is right)
         elif operator == "!=":
-            return native_bool_to_boolean_object(left != right)
+            return native_bool_to_boolean_object(left is not right)
         else:
             return new_error("unknown operator: {} {} {}", left.typ, operator, right.typ)
     elif left.typ == mobject.STRING_OBJ and right.typ == mobject.STRING_OBJ:
@@ -234,34 +286,103 @@ def eval_infix_expression(operator: str, left: MonkeyObject, right: MonkeyObject
         return new_error("type mismatch: {} {} {}", left.typ, operator, right.typ)
 
 def eval_integer_infix_expression(operator: str, left: MonkeyObject, right: MonkeyObject) -> MonkeyObject:
-    if operator == "+":
-        return mobject.Integer(value=left.value+right.value)
-    elif operator == "-":
-        return mobject.Integer(value=left.value-right.value)
-    elif operator == "*":
-        return mobject.Integer(value=left.value*right.value)
-    elif operator == "/":
-        return mobject.Integer(value=left.value//right.value)
-    elif operator == "<":
-        return native_bool_to_boolean_object(left.value < right.value)
-    elif operator == ">":
-        return native_bool_to_boolean_object(left.value > right.value)
-    elif operator == "!=":
-        return native_bool_to_boolean_object(left.value != right.value)
-    elif operator == "==":
-        return native_bool_to_boolean_object(left.value == right.value)
-    else:
+    operation = integer_operations.get(operator)
+    if operation is None:
         return new_error("unknown operator: {} {} {}", left.typ, operator, right.typ)
+    return operation(left.value, right.value)
+
+@dataclass
+class QuickeningStats:
+    specialized: int = 0
+    deoptimized: int = 0
+
+quickening_stats = QuickeningStats()
+
+def quicken_infix_node(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+    # On its first evaluation an infix node rewrites its handler into a
+    # variant specialized for the operand types it sees. Specialized handlers
+    # guard on the operand types and deoptimize the node to the generic
+    # handler for good when the guard fails.
+    left = eval(node.left, env)
+    right = eval(node.right, env)
+    node.handler = specialize_infix_node(node, left, right)
+    return check(eval_infix_expression(node.operator, left, right))
+
+def specialize_infix_node(node: ast.InfixExpression, left: MonkeyObject, right: MonkeyObject) -> Callable:
+    operator = node.operator
+    if type(left) is mobject.Integer and type(right) is mobject.Integer:
+        if operator in arithmetic_operators or operator in comparison_operators:
+            quickening_stats.specialized += 1
+            if type(node.right) is ast.IntegerLiteral or type(node.right) is ast.Constant:
+                return integer_constant_infix_handler(operator, right.value)
+            return integer_infix_handler(operator)
+    elif type(left) is mobject.String and type(right) is mobject.String and operator == "+":
+        quickening_stats.specialized += 1
+        return eval_string_concat_node
+    return eval_generic_infix_node
+
+def deoptimize_infix_node(node: ast.InfixExpression, left: MonkeyObject, right: MonkeyObject) -> MonkeyObject:
+    quickening_stats.deoptimized += 1
+    node.handler = eval_generic_infix_node
+    return check(eval_infix_expression(node.operator, left, right))
+
+def eval_generic_infix_node(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+    left = eval(node.left, env)
+    right = eval(node.right, env)
+    return check(eval_infix_expression(node.operator, left, right))
+
+def integer_infix_handler(operator: str) -> Callable:
+    if operator in arithmetic_operators:
+        native = arithmetic_operators[operator]
+        def integer_arithmetic(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+            left = eval(node.left, env)
+            right = eval(node.right, env)
+            if type(left) is mobject.Integer and type(right) is mobject.Integer:
+                return mobject.integer(native(left.value, right.value))
+            return deoptimize_infix_node(node, left, right)
+        return integer_arithmetic
+    native = comparison_operators[operator]
+    def integer_comparison(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+        left = eval(node.left, env)
+        right = eval(node.right, env)
+        if type(left) is mobject.Integer and type(right) is mobject.Integer:
+            return TRUE if native(left.value, right.value) else FALSE
+        return deoptimize_infix_node(node, left, right)
+    return integer_comparison
+
+def integer_constant_infix_handler(operator: str, constant: int) -> Callable:
+    # The right operand is an integer literal: it is neither evaluated nor
+    # guarded.
+    if operator in arithmetic_operators:
+        native = arithmetic_operators[operator]
+        def integer_constant_arithmetic(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+            left = eval(node.left, env)
+            if type(left) is mobject.Integer:
+                return mobject.integer(native(left.value, constant))
+            return deoptimize_infix_node(node, left, eval(node.right, env))
+        return integer_constant_arithmetic
+    native = comparison_operators[operator]
+    def integer_constant_comparison(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+        left = eval(node.left, env)
+        if type(left) is mobject.Integer:
+            return TRUE if native(left.value, constant) else FALSE
+        return deoptimize_infix_node(node, left, eval(node.right, env))
+    return integer_constant_comparison
+
+def eval_string_concat_node(node: ast.InfixExpression, env: mobject.Environment) -> MonkeyObject:
+    left = eval(node.left, env)
+    right = eval(node.right, env)
+    if type(left) is mobject.String and type(right) is mobject.String:
+        return mobject.concat(left, right)
+    return deoptimize_infix_node(node, left, right)
 
 def eval_string_infix_expression(operator: str, left: MonkeyObject, right: MonkeyObject) -> MonkeyObject:
     if operator != "+":
         return new_error("unknown operator: {} {} {}", left.typ, operator, right.typ)
-    return mobject.String(value=left.value + right.value)
+    return mobject.concat(left, right)
 
 def eval_if_expression(exp: ast.IfExpression, env: mobject.Environment) -> MonkeyObject:
     condition = eval(exp.condition, env)
-    if is_error(condition):
-        return condition
     if is_truthy(condition):
         return eval(exp.consequence, env)
     elif exp.alternative is not None:
@@ -270,73 +391,131 @@ def eval_if_expression(exp: ast.IfExpression, env: mobject.Environment) -> Monke
         return NULL
 
 def eval_for_expression(exp: ast.ForExpression, env: mobject.Environment) -> MonkeyObject:
-    iterator: mobject.Array = eval(exp.iterator, env)
-    if not iterator.typ == mobject.ARRAY_OBJ:
-        return new_error("iterator must be ARRAY. found {}", iterator.typ)
+    iterator = eval(exp.iterator, env)
+    elements = iterator.iterate()
+    if elements is None:
+        raise ErrorSignal(new_error("cannot iterate over {}", iterator.typ))
     evaluated = NULL
-    for value in iterator.elements:
-        extended_env = extend_for_body_env(env, exp.element, value)
-        evaluated = eval_loop_block_statement(exp.body, extended_env)
-        if is_error(evaluated) or is_return(evaluated):
-            return evaluated
-        if is_break(evaluated):
-            return NULL
-        if is_continue(evaluated):
+    for value in elements:
+        extended_env = extend_for_body_env(env, exp, value)
+        try:
+            evaluated = eval_block_statement(exp.body, extended_env)
+        except ContinueSignal:
             evaluated = NULL
+        except BreakSignal:
+            return NULL
     return evaluated
 
 def eval_while_expression(exp: ast.WhileExpression, env: mobject.Environment) -> MonkeyObject:
     evaluated = NULL
     while True:
         condition = eval(exp.condition, env)
-        if is_error(condition):
-            return condition
         if not is_truthy(condition):
             return evaluated
-        extended_env = mobject.Environment.new_enclosed(env)
-        evaluated = eval_loop_block_statement(exp.body, extended_env)
-        if is_error(evaluated) or is_return(evaluated):
-            return evaluated
-        if is_break(evaluated):
-            return NULL
-        if is_continue(evaluated):
+        extended_env = mobject.Environment(outer=env, slots=[None]*exp.body.scope_size)
+        try:
+            evaluated = eval_block_statement(exp.body, extended_env)
+        except ContinueSignal:
             evaluated = NULL
-    return evaluated
+        except BreakSignal:
+            return NULL
 
 def is_truthy(obj: MonkeyObject) -> bool:
-    if obj == NULL:
+    if obj is NULL:
         return False
-    elif obj == TRUE:
+    elif obj is TRUE:
         return True
-    elif obj == FALSE:
+    elif obj is FALSE:
         return False
     else:
         return True
 
-def apply_function(fn: MonkeyObject, args: List[MonkeyObject]) -> MonkeyObject:  
-    if isinstance(fn, mobject.Function):
-        if len(fn.parameters) > len(args):
-            return new_error("function call missing required arguments: {}", ', '.join([param.value for param in fn.parameters[len(args):]]))
-        extended_env = extend_function_env(fn, args)
-        evaluated = eval(fn.body, extended_env)
-        return unwrap_return_value(evaluated)
-    elif isinstance(fn, mobject.Builtin):
-        return fn.fn(*args)
-    else:
-        return new_error("not a function: {}", fn.typ)
+def apply_function(fn: MonkeyObject, args: List[MonkeyObject]) -> MonkeyObject:
+    while True:
+        if isinstance(fn, mobject.Function):
+            if len(fn.parameters) > len(args):
+                raise ErrorSignal(new_error("function call missing required arguments: {}", ', '.join([param.value for param in fn.parameters[len(args):]])))
+            extended_env = extend_function_env(fn, args)
+            try:
+                evaluated = eval(fn.body, extended_env)
+            except ReturnSignal as r:
+                evaluated = r.value
+            if type(evaluated) is mobject.TailCall:
+                fn, args = evaluated.fn, evaluated.args
+                continue
+            return evaluated
+        elif isinstance(fn, mobject.Builtin):
+            return check(fn.fn(*args))
+        elif type(fn) is mobject.RecordType:
+            return check(new_record(fn, args))
+        else:
+            raise ErrorSignal(new_error("not a function: {}", fn.typ))
 
 def extend_function_env(fn: mobject.Function, args: List[MonkeyObject]) -> mobject.Environment:
-    env = mobject.Environment.new_enclosed(fn.env)
-    for i, param in enumerate(fn.parameters):
-        env.set(param.value, args[i])
-    return env
-
-def extend_for_body_env(env: mobject.Environment, ident: ast.Identifier, value: MonkeyObject) -> mobject.Environment:
-    new_env = mobject.Environment.new_enclosed(env)
-    new_env.set(ident.value, value)
-    return new_env
-
-def unwrap_return_value(obj: MonkeyObject) -> MonkeyObject:
-    if isinstance(obj, mobject.ReturnValue):
-        return obj.value
-    return obj
\ No newline at end of file
+    n_params = len(fn.parameters)
+    slots = args[:n_params]
+    slots.extend([None]*(fn.body.scope_size - n_params))
+    return mobject.Environment(outer=fn.env, slots=slots)
+
+def extend_for_body_env(env: mobject.Environment, exp: ast.ForExpression, value: MonkeyObject) -> mobject.Environment:
+    slots = [None]*exp.body.scope_size
+    slots[exp.element.slot] = value
+    return mobject.Environment(outer=env, slots=slots)
+
+arithmetic_operators: Dict[str, Callable] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.floordiv,
+}
+
+comparison_operators: Dict[str, Callable] = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "!=": operator.ne,
+    "==": operator.eq,
+}
+
+integer_operations: Dict[str, Callable] = {
+    "+": lambda a, b: mobject.integer(a+b),
+    "-": lambda a, b: mobject.integer(a-b),
+    "*": lambda a, b: mobject.integer(a*b),
+    "/": lambda a, b: mobject.integer(a//b),
+    "<": lambda a, b: TRUE if a < b else FALSE,
+    ">": lambda a, b: TRUE if a > b else FALSE,
+    "!=": lambda a, b: TRUE if a != b else FALSE,
+    "==": lambda a, b: TRUE if a == b else FALSE,
+}
+
+prefix_handlers: Dict[str, Callable] = {
+    "!": eval_bang_operator_expression,
+    "-": eval_minus_prefix_operator_expression,
+}
+
+eval_functions: Dict[type, Callable] = {
+    ast.Program: eval_program,
+    ast.ExpressionStatement: eval_expression_statement,
+    ast.IntegerLiteral: eval_integer_literal,
+    ast.Boolean: eval_boolean,
+    ast.StringLiteral: eval_string_literal,
+    ast.Constant: eval_constant,
+    ast.Identifier: eval_identifier,
+    ast.PrefixExpression: eval_prefix_node,
+    ast.InfixExpression: eval_infix_node,
+    ast.AssignExpression: eval_assign_expression,
+    ast.BlockStatement: eval_block_statement,
+    ast.IfExpression: eval_if_expression,
+    ast.ForExpression: eval_for_expression,
+    ast.WhileExpression: eval_while_expression,
+    ast.ReturnStatement: eval_return_statement,
+    ast.BreakStatement: eval_break_statement,
+    ast.ContinueStatement: eval_continue_statement,
+    ast.LetStatement: eval_let_statement,
+    ast.FunctionLiteral: eval_function_literal,
+    ast.CallExpression: eval_call_expression,
+    ast.ArrayLiteral: eval_array_literal,
+    ast.IndexExpression: eval_index_node,
+    ast.HashLiteral: eval_hash_literal,
+    ast.RecordLiteral: eval_record_literal,
+    ast.FieldExpression: eval_field_node,
+}
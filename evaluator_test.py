@@ -107,6 +107,12 @@ def test_if_else_expressions():
 def test_for_expressions():
     tests = [
         ("for(x in []){1}", None),
+        ("let n = 0; for(c in \"abc\"){n = n + len(c)}; n;", 3),
+        ("let s = 0; for(k in {1: 10, 2: 20}){s = s + k}; s;", 3),
+        ("let s = 0; for(p in pairs({1: 10, 2: 20})){s = s + p[0] * p[1]}; s;", 50),
+        ("let s = 0; for(x in union(to_set([1, 2]), to_set([2, 3]))){s = s + x}; s;", 6),
+        ("let h = heap([3, 1]); let q = deque([]); for(x in h){push_front(q, x)}; pop_front(q) * 10 + heap_pop(h);", 31),
+        ("let s = 0; for(x in slice(range(1000000), 10, 13)){s = s + x}; s;", 33),
         ("for(x in [1,2,3]){x;}", 3),
         ("let a = 0; for(x in range(10)){a=x;}; a;", 9),
         ("let a = 5; for(x in range(10)){a=x; break;}; a;", 0),
@@ -156,7 +162,12 @@ def test_return_statements():
             }
             return 2;
         }
-        """, 1)
+        """, 1),
+        ("let f = fn(x){ if (x > 1) { if (x > 2) { return 3; } return 2; } else { return 1; } }; f(1) + f(2) + f(3);", 6),
+        ("let f = fn(x){ if (x > 1) { return 2; } 1; }; f(1) + f(2);", 3),
+        ("let f = fn(){ for (i in [1, 2, 3]) { if (i == 2) { return i; } } 0; }; f();", 2),
+        ("let f = fn(){ let i = 0; while (true) { i = i + 1; if (i == 4) { return i; } } }; f() + 1;", 5),
+        ("let f = fn(){ return 1; }; let g = fn(){ f(); return 2; }; g();", 2),
     ]
 
     for input, expected in tests:
@@ -179,9 +190,17 @@ def test_error_handling():
         ("a = 3;", "variable 'a' does not exist. Can't reassign"),
         ("8 * (x=2);", "variable 'x' does not exist. Can't reassign"),
         ("break;", "break cannot be used outside of a loop"),
+        ("for(x in 5){1}", "cannot iterate over INTEGER"),
         ("continue;", "continue cannot be used outside of a loop"),
         ('len(1)', "argument to 'len' not supported, got INTEGER"),
         ('len("one", "two")', "wrong number of arguments. got 2, want 1"),
+        ('to_set([[1]])', "unusable as hash key: ARRAY"),
+        ('add(to_set([]), fn(x) { x })', "unusable as hash key: FUNCTION"),
+        ('union(to_set([]), [1])', "wrong argument type"),
+        ('to_set(1)', "cannot iterate over INTEGER"),
+        ('heap([1, "a"])', "cannot push STRING onto a heap of INTEGER"),
+        ('heap_push(heap([]), true)', "heap elements must be INTEGER or STRING, got BOOLEAN"),
+        ('push_back([], 1)', "wrong argument type"),
     ]
 
     for input, expected in tests:
@@ -190,6 +209,10 @@ def test_error_handling():
         assert isinstance(evaluated, mobject.Error), f"no error object returned. got {type(evaluated)}"
         assert evaluated.message == expected, f"wrong error message. expected '{expected}', got '{evaluated.message}'"
 
+def test_stack_overflow():
+    input = "let f = fn(n){ if (n == 0) { 0 } else { 1 + f(n - 1) } }; f(5000);"
+    error_test(eval_test(input), "stack overflow: too many nested calls, the vm engine supports deeper recursion")
+
 def error_test(obj: MonkeyObject, error_string: str):
     assert isinstance(obj, mobject.Error), f"no error object returned. got {type(obj)}"
     assert obj.message == error_string, f"wrong error message. expected '{error_string}', got '{obj.message}'"
@@ -263,9 +286,46 @@ def test_builtin_functions():
         ('last([1,2,3])', 3),
         ('rest([1, 2, 3])', (2, 3)),
         ('push([1,2], 3)', (1, 2, 3)),
+        ('let a = [1, 2]; let b = push(a, 3); a', (1, 2)),
+        ('let a = [1, 2, 3]; let b = rest(a); push(b, 4)', (2, 3, 4)),
+        ('rest(rest([1, 2, 3]))', (3,)),
+        ('slice([1, 2, 3, 4], 1, 3)', (2, 3)),
+        ('slice([1, 2, 3, 4], -2, 10)', (3, 4)),
+        ('slice([1, 2, 3, 4], 3, 1)', ()),
+        ('slice("hello world", 6, 100)', "world"),
+        ('keys({1: 2, 3: 4})', (1, 3)),
+        ('values({1: 2, 3: 4})', (2, 4)),
+        ('if (has({1: 2}, 1)) { 1 } else { 0 }', 1),
+        ('if (has({1: 2}, 2)) { 1 } else { 0 }', 0),
+        ('let h = {1: 2, 3: 4}; delete(h, 1) + size(h) + len(h)', 4),
+        ('let h = {1: 2}; delete(h, 5); size(h)', 1),
+        ('let h = {1: 2}; let g = set(h, 3, 4); size(h) + size(g) + g[3]', 7),
+        ('let h = {1: 2, 3: 4}; let g = remove(h, 1); size(h) + size(g) + h[1]', 5),
+        ('let h = {}; for (i in range(500)) { h = set(h, i, i * 2) }; h[499] + size(remove(h, 7))', 1497),
+        ('keys(set(set({1: 1}, "a", 2), 1, 3))', (1, "a")),
+        ('let h = {0: 1, 1: 2}; h[1] = 5; h["x"] = 7; h[true] = 9; h[0] + h[1] + h["x"] + h[true] + size(h)', 26),
+        ('let h = {1: 10}; if (has(h, true)) { 1 } else { h[1] }', 10),
+        ('let s = to_set("abca"); if (has(s, "c")) { len(s) } else { 0 }', 3),
+        ('let s = to_set([]); add(add(s, 1), 2); delete(s, 1) + size(s) + size(remove(s, 2)) + size(s)', 2),
+        ('let d = deque([2]); push_front(push_back(d, 3), 1); pop_front(d) * 100 + pop_back(d) * 10 + len(d)', 131),
+        ('let d = deque([]); push_back(d, 1); first(push_front(d, 5)) + last(d)', 6),
+        ('let h = heap([5, 1, 4]); heap_push(h, 2); heap_push(h, 0); heap_pop(h) * 100 + heap_pop(h) * 10 + first(h)', 12),
+        ('let h = heap(["b", "c"]); heap_push(h, "a"); heap_pop(h) + heap_pop(h) + heap_pop(h)', "abc"),
+        ('let h = heap([7]); heap_pop(h); heap_push(h, "x"); len(h)', 1),
+        ('let q = deque([1]); let n = 0; while (len(q) > 0) { let x = pop_front(q); n = n + x; if (x < 50) { push_back(q, x * 2); push_back(q, x * 2 + 1) } }; n', 4950),
+        ('let t = 0; let s = to_set(range(5)); for (x in s) { delete(s, x + 1); t = t + x }; t + size(s)', 11),
+        ('let s = ""; let i = 0; while (i < 300) { s = s + "ab"; i = i + 1; }; len(s) + len(slice(s, 1, -1))', 1198),
+        ('let a = slice([1, 2, 3, 4], 1, 3); len(a) + first(a) + last(a) + a[1]', 10),
+        ('let s = 0; for (x in slice(range(10), 7, 10)) { s = s + x }; s', 24),
+        ('let a = [1, 2, 3, 4]; let b = push(slice(a, 0, 2), 9); a[2] + b[2]', 12),
+        ('let a = range(40); let b = push(a, 40); len(a) + len(b)', 81),
         ('range(5)', (0, 1, 2, 3, 4)),
         ('range(0)', ()),
         ('range(-1)', ()),
+        ('rest(range(3))', (1, 2)),
+        ('slice(range(10), 2, 4)', (2, 3)),
+        ('let r = range(5); let b = push(r, 9); len(r) + b[5]', 14),
+        ('range(5)[4] + len(range(1000000000))', 1000000004),
         ("to_str(1234)", "1234"),
         ("to_str(true)", "True"),
         ("to_str(false)", "False"),
@@ -280,8 +340,28 @@ def test_builtin_functions():
             string_object_test(evaluated, expected)
         elif type(expected) == tuple:
             assert type(evaluated) == mobject.Array, f"object is not Array. got {type(evaluated)}"
+            assert len(evaluated.elements) == len(expected), f"array has wrong number of elements. got {len(evaluated.elements)}"
             for i, exp in enumerate(expected):
-                integer_object_test(evaluated.elements[i], exp)
+                if type(exp) == str:
+                    string_object_test(evaluated.elements[i], exp)
+                else:
+                    integer_object_test(evaluated.elements[i], exp)
+
+def test_containers():
+    tests = [
+        ('to_set([3, 1, 3, 2, 1])', "to_set([3, 1, 2])"),
+        ('to_set({"a": 1, 2: 3})', 'to_set(["a", 2])'),
+        ('union(to_set([1, 2]), to_set([2, 3]))', "to_set([1, 2, 3])"),
+        ('intersection(to_set([1, 2, 3]), to_set([3, 2, 5]))', "to_set([2, 3])"),
+        ('difference(to_set([1, 2, 3]), to_set([2]))', "to_set([1, 3])"),
+        ('let s = to_set([1, 2]); remove(s, 1); s', "to_set([2])"),
+        ('deque("ab")', 'deque(["a", "b"])'),
+        ('heap([3, 1, 2])', "heap([1, 2, 3])"),
+    ]
+
+    for input, expected in tests:
+        evaluated = eval_test(input)
+        assert evaluated.inspect == expected, f"wrong value. expected {expected}, got {evaluated.inspect}"
 
 def test_array_literal():
     input = "[1, 2*2, 3+3]"
@@ -336,12 +416,13 @@ def test_hash_literals():
 
     evaluated = eval_test(input)
     assert type(evaluated) == mobject.Hash, f"object is not Hash, got {type(evaluated)}"
-    assert len(evaluated.pairs) == len(expected), f"hash has wrong number of pairs. got {len(evaluated.pairs)}, want {len(expected)}"
+    pairs = {key.hash_key: value for key, value in evaluated.storage.items()}
+    assert len(pairs) == len(expected), f"hash has wrong number of pairs. got {len(pairs)}, want {len(expected)}"
 
     for k, v in expected.items():
-        pair = evaluated.pairs.get(k)
-        assert pair is not None, f"no pair for key {k} can be found in hash"
-        integer_object_test(pair.value, v)
+        value = pairs.get(k)
+        assert value is not None, f"no pair for key {k} can be found in hash"
+        integer_object_test(value, v)
 
 def test_hash_index_expressions():
     tests = [
@@ -359,4 +440,104 @@ def test_hash_index_expressions():
         if type(expected) == int:
             integer_object_test(evaluated, expected)
         else:
-            null_object_test(evaluated)
\ No newline at end of file
+            null_object_test(evaluated)
+
+def test_tail_calls():
+    tests = [
+        ("let count = fn(n, acc){ if(n == 0){ return acc; }; return count(n - 1, acc + 1); }; count(10000, 0);", 10000),
+        ("""
+        let is_even = fn(n){ if(n == 0){ return 1; }; return is_odd(n - 1); };
+        let is_odd = fn(n){ if(n == 0){ return 0; }; return is_even(n - 1); };
+        is_even(10001);
+        """, 0),
+        ("let f = fn(n){ for(x in range(3)){ return g(n + x); }; 0 }; let g = fn(x){ x * 2 }; f(5);", 10),
+        ("let f = fn(n){ while(n > 0){ return f(n - 1); }; 7 }; f(3000);", 7),
+        ("let f = fn(x){ return len(x); }; f([1, 2]);", 2),
+        ("let f = fn(n){ if(n == 0){ return 1; }; return n * f(n - 1); }; f(5);", 120),
+    ]
+
+    for input, expected in tests:
+        integer_object_test(eval_test(input), expected)
+
+def test_tail_call_errors():
+    tests = [
+        ("let f = fn(n){ return g(n); }; let g = fn(a, b){ a }; f(1);", "function call missing required arguments: b"),
+        ("let f = fn(n){ return n(1); }; f(1);", "not a function: INTEGER"),
+    ]
+
+    for input, expected in tests:
+        error_test(eval_test(input), expected)
+
+def test_quickening():
+    tests = [
+        ("let f = fn(a, b){ a + b }; f(1, 2); f(3, 4);", 7, 1, 0),
+        ("let f = fn(a){ a < 10 }; f(1); f(20);", False, 1, 0),
+        ('let f = fn(a, b){ a + b }; f("a", "b"); f("c", "d");', "cd", 1, 0),
+        ('let f = fn(a, b){ a + b }; f(1, 2); f("a", "b");', "ab", 1, 1),
+        ('let f = fn(a){ a - 1 }; f(1); f("a");', "type mismatch: STRING - INTEGER", 1, 1),
+        ("let f = fn(a, b){ a == b }; f(true, true); f(1, 1);", True, 0, 0),
+    ]
+
+    for input, expected, specialized, deoptimized in tests:
+        stats = evaluator.quickening_stats
+        before = (stats.specialized, stats.deoptimized)
+        evaluated = eval_test(input)
+        if type(expected) == int:
+            integer_object_test(evaluated, expected)
+        elif type(expected) == bool:
+            boolean_object_test(evaluated, expected)
+        elif evaluated.typ == mobject.ERROR_OBJ:
+            error_test(evaluated, expected)
+        else:
+            string_object_test(evaluated, expected)
+        assert stats.specialized - before[0] == specialized, f"wrong number of specialized nodes for {input}. got={stats.specialized - before[0]}, want={specialized}"
+        assert stats.deoptimized - before[1] == deoptimized, f"wrong number of deoptimized nodes for {input}. got={stats.deoptimized - before[1]}, want={deoptimized}"
+
+def test_index_assignment():
+    tests = [
+        ("let a = [1, 2, 3]; a[1] = 5; a[1];", 5),
+        ("let a = [1, 2]; a[0] = 3;", 3),
+        ("let a = [1, 2, 3]; let b = a; b[0] = 7; a[0];", 7),
+        ("let a = [1, 2, 3]; let b = push(a, 4); b[0] = 9; a[0];", 1),
+        ("let a = range(5); a[4] = 10; a[4] + len(a);", 15),
+        ("let f = fn(a){ a[0] = 1 }; let b = [0]; f(b); b[0];", 1),
+        ("let a = [[1], [2]]; a[1][0] = 5; a[1][0];", 5),
+        ('let h = {}; h["a"] = 1; h["b"] = 2; h["a"] + h["b"];', 3),
+        ('let h = {"a": 1}; let g = h; g["a"] = 5; size(h) + h["a"];', 6),
+        ("let h = {1: 1, 2: 2, 3: 3}; for (k in h) { delete(h, k) }; size(h);", 0),
+        ("let a = [1]; a[1] = 2;", "index out of range: 1"),
+        ('let a = [1]; a["x"] = 2;', "index must be INTEGER, got STRING"),
+        ("let a = 1; a[0] = 2;", "index assignment not supported: INTEGER"),
+        ("let h = {}; h[[1]] = 2;", "unusable as hash key: ARRAY"),
+    ]
+
+    for input, expected in tests:
+        if type(expected) == int:
+            integer_object_test(eval_test(input), expected)
+        else:
+            error_test(eval_test(input), expected)
+
+def test_records():
+    tests = [
+        ("let P = record(x, y); let p = P(1, 2); p.x * 10 + p.y;", 12),
+        ("let P = record(x); let Q = record(p); Q(P(5)).p.x;", 5),
+        ("let A = record(x, y); let B = record(y); let f = fn(r){ r.y }; f(A(1, 2)) + f(B(3)) + f(A(4, 5));", 10),
+        ("let P = record(x); let ps = []; for(i in range(3)){ ps = push(ps, P(i)) }; ps[2].x;", 2),
+        ("let P = record(x); let f = fn(n){ return P(n); }; f(7).x;", 7),
+        ("let P = record(x); P(1).z;", "P has no field z"),
+        ("let P = record(x); P(1, 2);", "wrong number of fields for P. got 2, want 1"),
+        ("let a = 5; a.x;", "field access not supported: INTEGER"),
+    ]
+
+    for input, expected in tests:
+        if type(expected) == int:
+            integer_object_test(eval_test(input), expected)
+        else:
+            error_test(eval_test(input), expected)
+
+def test_record_output(capsys):
+    evaluated = eval_test('let Point = record(x, y); let p = Point(1, "a"); puts(p); p')
+    assert evaluated.inspect == 'Point(x: 1, y: "a")', f"wrong inspect. got {evaluated.inspect}"
+    assert capsys.readouterr().out == 'Point(x: 1, y: "a")\n', "puts does not print the record"
+    evaluated = eval_test("record(a, b)")
+    assert evaluated.inspect == "record(a, b)", f"wrong inspect. got {evaluated.inspect}"
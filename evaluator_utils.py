@@ -1,25 +1,37 @@
 from monkey_object import MonkeyObject
 import monkey_object as mobject
 
+# Non-local exits and Monkey errors travel as Python exceptions, so the
+# common path does not check the result of every sub-expression.
+
+class ReturnSignal(Exception):
+    def __init__(self, value: MonkeyObject):
+        self.value = value
+
+class BreakSignal(Exception):
+    pass
+
+class ContinueSignal(Exception):
+    pass
+
+class ErrorSignal(Exception):
+    def __init__(self, error: mobject.Error):
+        self.error = error
+
 def new_error(fmt: str, *args, **kwargs) -> mobject.Error:
     return mobject.Error(fmt.format(*args, **kwargs))
 
-def is_error(obj: MonkeyObject) -> bool:
-    if obj is not None:
-        return obj.typ == mobject.ERROR_OBJ
-    return False
+def stack_overflow_error() -> mobject.Error:
+    # Only the vm keeps Monkey calls off the Python stack; the other engines
+    # report running out of it like the vm reports its frame budget.
+    return new_error("stack overflow: too many nested calls, the vm engine supports deeper recursion")
 
-def is_return(obj: MonkeyObject) -> bool:
-    if obj is not None:
-        return obj.typ == mobject.RETURN_VALUE_OBJ
-    return False
+def check(obj: MonkeyObject) -> MonkeyObject:
+    if type(obj) is mobject.Error:
+        raise ErrorSignal(obj)
+    return obj
 
-def is_break(obj: MonkeyObject) -> bool:
+def is_error(obj: MonkeyObject) -> bool:
     if obj is not None:
-        return obj.typ == mobject.BREAK_OBJ
+        return obj.typ == mobject.ERROR_OBJ
     return False
-
-def is_continue(obj: MonkeyObject) -> bool:
-    if obj is not None:
-        return obj.typ == mobject.CONTINUE_OBJ
-    return False
\ No newline at end of file
@@ -0,0 +1,268 @@
+import pvector
+
+from typing import Iterable, Iterator, Tuple, List, Dict
+
+# A persistent hash map: a hash array mapped trie (HAMT). Each level of the
+# trie consumes 5 bits of the key's hash; a node has a 32-bit bitmap of the
+# chunks present and a tuple with one entry per set bit, which is either a
+# leaf (key, value, index) or the node of the next level. Keys whose whole
+# hashes are equal share a Collision node. set and remove copy one path from
+# the root and share everything else with the old version, so both are
+# O(log32 n) and old versions stay valid.
+#
+# Items are also kept in insertion order in a pvector.Vector, which `index`
+# in the leaves points into, so maps iterate like a dict does. Removed items
+# leave a None behind in the vector until there are as many of them as live
+# items, and then the map is rebuilt.
+#
+# A map made by from_items keeps its items in a plain dict, which is faster
+# to build and to read than the trie, and builds the trie in one pass on its
+# first set or remove. The dict is never changed, so the map stays
+# persistent.
+
+BITS = 5
+MASK = (1 << BITS) - 1
+
+class Node:
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: Tuple):
+        self.bitmap = bitmap
+        self.entries = entries
+
+class Collision:
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash: int, leaves: Tuple):
+        self.hash = hash
+        self.leaves = leaves
+
+EMPTY_NODE = Node(0, ())
+
+def find(node, key, h: int) -> Tuple:
+    # Returns the leaf of key, or None.
+    shift = 0
+    while True:
+        if type(node) is Collision:
+            for leaf in node.leaves:
+                if leaf[0] == key:
+                    return leaf
+            return None
+        bit = 1 << ((h >> shift) & MASK)
+        bitmap = node.bitmap
+        if not bitmap & bit:
+            return None
+        entry = node.entries[(bitmap & (bit - 1)).bit_count()]
+        if type(entry) is tuple:
+            return entry if entry[0] == key else None
+        node = entry
+        shift += BITS
+
+def insert(node, shift: int, h: int, leaf: Tuple):
+    # Returns a copy of node with leaf added, or replacing the leaf with the
+    # same key.
+    if type(node) is Collision:
+        if node.hash == h:
+            leaves = tuple(l for l in node.leaves if l[0] != leaf[0])
+            return Collision(h, leaves + (leaf,))
+        node = Node(1 << ((node.hash >> shift) & MASK), (node,))
+    bit = 1 << ((h >> shift) & MASK)
+    bitmap = node.bitmap
+    entries = node.entries
+    i = (bitmap & (bit - 1)).bit_count()
+    if not bitmap & bit:
+        return Node(bitmap | bit, entries[:i] + (leaf,) + entries[i:])
+    entry = entries[i]
+    if type(entry) is tuple:
+        if entry[0] == leaf[0]:
+            new = leaf
+        else:
+            new = pair_node(shift + BITS, entry, hash(entry[0]), leaf, h)
+    else:
+        new = insert(entry, shift + BITS, h, leaf)
+    return Node(bitmap, entries[:i] + (new,) + entries[i+1:])
+
+def pair_node(shift: int, leaf1: Tuple, h1: int, leaf2: Tuple, h2: int):
+    if h1 == h2:
+        return Collision(h1, (leaf1, leaf2))
+    b1 = (h1 >> shift) & MASK
+    b2 = (h2 >> shift) & MASK
+    if b1 == b2:
+        return Node(1 << b1, (pair_node(shift + BITS, leaf1, h1, leaf2, h2),))
+    return Node((1 << b1) | (1 << b2), (leaf1, leaf2) if b1 < b2 else (leaf2, leaf1))
+
+def delete(node, shift: int, h: int, key):
+    # Returns a copy of node without key: a node, a single leaf that the
+    # parent can hold directly, or None if nothing is left.
+    if type(node) is Collision:
+        leaves = tuple(l for l in node.leaves if l[0] != key)
+        if len(leaves) == 1:
+            return leaves[0]
+        return Collision(node.hash, leaves)
+    bit = 1 << ((h >> shift) & MASK)
+    bitmap = node.bitmap
+    entries = node.entries
+    i = (bitmap & (bit - 1)).bit_count()
+    entry = entries[i]
+    if type(entry) is tuple:
+        new = None
+    else:
+        new = delete(entry, shift + BITS, h, key)
+    if new is None:
+        if len(entries) == 1:
+            return None
+        entries = entries[:i] + entries[i+1:]
+        if len(entries) == 1 and type(entries[0]) is tuple:
+            return entries[0]
+        return Node(bitmap & ~bit, entries)
+    if len(entries) == 1 and type(new) is tuple:
+        return new
+    return Node(bitmap, entries[:i] + (new,) + entries[i+1:])
+
+def build(leaves: List[Tuple[int, Tuple]], shift: int) -> Node:
+    # The node holding the (hash, leaf) pairs, built bottom-up: leaves are
+    # grouped by their chunk of the hash at this level.
+    chunks: Dict[int, List[Tuple[int, Tuple]]] = {}
+    for item in leaves:
+        chunk = (item[0] >> shift) & MASK
+        group = chunks.get(chunk)
+        if group is None:
+            chunks[chunk] = [item]
+        else:
+            group.append(item)
+    bitmap = 0
+    entries = []
+    for chunk in sorted(chunks):
+        group = chunks[chunk]
+        bitmap |= 1 << chunk
+        h = group[0][0]
+        if len(group) == 1:
+            entries.append(group[0][1])
+        elif all(item[0] == h for item in group):
+            entries.append(Collision(h, tuple(leaf for _, leaf in group)))
+        else:
+            entries.append(build(group, shift + BITS))
+    return Node(bitmap, tuple(entries))
+
+class Map:
+    # Read-only mapping interface of a dict, plus the persistent set and
+    # remove.
+    __slots__ = ("root", "order", "size", "table")
+
+    def __init__(self, root=EMPTY_NODE, order: pvector.Vector = pvector.EMPTY, size: int = 0, table: dict = None):
+        # With a table, root and order are None until the trie is built.
+        self.root = root
+        self.order = order
+        self.size = size
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.size
+
+    def build_trie(self):
+        table = self.table
+        self.order = pvector.vector(table.items())
+        self.root = build([(hash(key), (key, value, i)) for i, (key, value) in enumerate(table.items())], 0)
+        self.table = None
+
+    def get(self, key, default=None):
+        table = self.table
+        if table is not None:
+            return table.get(key, default)
+        # find, inlined: this is the lookup of every h[k].
+        h = hash(key)
+        node = self.root
+        shift = 0
+        while True:
+            if type(node) is Collision:
+                leaf = find(node, key, h)
+                return default if leaf is None else leaf[1]
+            bit = 1 << ((h >> shift) & MASK)
+            bitmap = node.bitmap
+            if not bitmap & bit:
+                return default
+            entry = node.entries[(bitmap & (bit - 1)).bit_count()]
+            if type(entry) is tuple:
+                return entry[1] if entry[0] == key else default
+            node = entry
+            shift += BITS
+
+    def __getitem__(self, key):
+        if self.table is not None:
+            return self.table[key]
+        leaf = find(self.root, key, hash(key))
+        if leaf is None:
+            raise KeyError(key)
+        return leaf[1]
+
+    def __contains__(self, key) -> bool:
+        if self.table is not None:
+            return key in self.table
+        return find(self.root, key, hash(key)) is not None
+
+    def items(self) -> Iterator[Tuple]:
+        if self.table is not None:
+            yield from self.table.items()
+            return
+        for item in self.order:
+            if item is not None:
+                yield item
+
+    def keys(self) -> Iterator:
+        return (item[0] for item in self.items())
+
+    def values(self) -> Iterator:
+        return (item[1] for item in self.items())
+
+    __iter__ = keys
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (Map, dict)):
+            return NotImplemented
+        return len(self) == len(other) and all(key in other and other[key] == value for key, value in self.items())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Map({dict(self.items())!r})"
+
+    def set(self, key, value) -> "Map":
+        if self.table is not None:
+            self.build_trie()
+        h = hash(key)
+        leaf = find(self.root, key, h)
+        if leaf is not None:
+            index = leaf[2]
+            root = insert(self.root, 0, h, (key, value, index))
+            return Map(root, self.order.set(index, (key, value)), self.size)
+        index = len(self.order)
+        root = insert(self.root, 0, h, (key, value, index))
+        return Map(root, self.order.append((key, value)), self.size + 1)
+
+    def remove(self, key) -> "Map":
+        if self.table is not None:
+            self.build_trie()
+        h = hash(key)
+        leaf = find(self.root, key, h)
+        if leaf is None:
+            return self
+        root = delete(self.root, 0, h, key)
+        if root is None:
+            return EMPTY
+        if type(root) is not Node:
+            root = insert(EMPTY_NODE, 0, hash(root[0]), root) if type(root) is tuple else Node(1 << (root.hash & MASK), (root,))
+        removed = Map(root, self.order.set(leaf[2], None), self.size - 1)
+        if len(removed.order) > 2 * removed.size + 32:
+            return from_items(removed.items())
+        return removed
+
+EMPTY = Map()
+
+def from_items(items: Iterable[Tuple]) -> Map:
+    return from_dict(dict(items))
+
+def from_dict(table: dict) -> Map:
+    # The map takes over the dict, which must not be changed afterwards.
+    if not table:
+        return EMPTY
+    return Map(None, None, len(table), table)
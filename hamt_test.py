@@ -0,0 +1,64 @@
+import random
+
+import hamt
+
+class Colliding:
+    # Keys with few distinct hashes, to exercise Collision nodes.
+    def __init__(self, value: int):
+        self.value = value
+
+    def __hash__(self):
+        return self.value % 3
+
+    def __eq__(self, other):
+        return isinstance(other, Colliding) and self.value == other.value
+
+def check_same(m: hamt.Map, d: dict):
+    assert len(m) == len(d), f"wrong size. got {len(m)}, want {len(d)}"
+    assert list(m.items()) == list(d.items()), "items differ from the dict"
+    for key, value in d.items():
+        assert m.get(key) == value and key in m, f"wrong value for {key}"
+
+def test_against_dict():
+    rng = random.Random(7)
+    for make_key in [lambda i: i, lambda i: str(i), lambda i: -i * 2**40, Colliding]:
+        m, d = hamt.EMPTY, {}
+        for step in range(3000):
+            key = make_key(rng.randrange(400))
+            if rng.random() < 0.3:
+                m = m.remove(key)
+                d.pop(key, None)
+            else:
+                m = m.set(key, step)
+                d[key] = step
+        check_same(m, d)
+        assert make_key(1000) not in m and m.get(make_key(1000), "missing") == "missing", "found a key that was never set"
+
+def test_from_items():
+    # The trie built in one pass from the table must agree with set.
+    for make_key in [lambda i: i, lambda i: str(i), lambda i: -i * 2**40, Colliding]:
+        items = [(make_key(i % 700), i) for i in range(1000)]
+        m, d = hamt.from_items(items), dict(items)
+        check_same(m, d)
+        m = m.set(make_key(1000), -1)
+        d[make_key(1000)] = -1
+        for i in range(0, 700, 3):
+            m = m.remove(make_key(i))
+            d.pop(make_key(i))
+        check_same(m, d)
+
+def test_persistence():
+    m1 = hamt.from_items((i, i) for i in range(100))
+    m2 = m1.set(5, "x").set(100, 100)
+    m3 = m1.remove(7)
+    check_same(m1, {i: i for i in range(100)})
+    assert m2[5] == "x" and m2[100] == 100 and len(m2) == 101, "set gives the wrong map"
+    assert 7 not in m3 and len(m3) == 99, "remove gives the wrong map"
+    assert m1.remove(1000) is m1, "removing a missing key should return the same map"
+
+def test_remove_all():
+    m = hamt.from_items((i, i) for i in range(1000))
+    for i in range(1000):
+        m = m.remove(i)
+    assert len(m) == 0 and list(m.items()) == [], "map is not empty after removing every key"
+    assert len(m.order) < 100, f"removed items were not compacted. got {len(m.order)}"
@@ -33,6 +33,8 @@ def test_next_token():
 
     for(x in v){break;};
     while(true){continue;};
+    let p = record(x, y);
+    p.x;
     """
 
     tests = [
@@ -153,6 +155,21 @@ def test_next_token():
         (tokens.RBRACE, "}"),
         (tokens.SEMICOLON, ";"),
 
+        (tokens.LET, "let"),
+        (tokens.IDENT, "p"),
+        (tokens.ASSIGN, "="),
+        (tokens.RECORD, "record"),
+        (tokens.LPAREN, "("),
+        (tokens.IDENT, "x"),
+        (tokens.COMMA, ","),
+        (tokens.IDENT, "y"),
+        (tokens.RPAREN, ")"),
+        (tokens.SEMICOLON, ";"),
+        (tokens.IDENT, "p"),
+        (tokens.DOT, "."),
+        (tokens.IDENT, "x"),
+        (tokens.SEMICOLON, ";"),
+
         (tokens.EOF, ""),
     ]
 
@@ -1,4 +1,5 @@
 import click
+import functools
 
 import repl
 from monkey_object import Environment, NULL
@@ -6,12 +7,34 @@ import monkey_object as mobject
 from lexer import Lexer
 from parser import Parser
 import evaluator
+import vm
+import closure_compiler
+import unboxed
+import optimizer
+
+engines = {
+    "eval": evaluator.eval,
+    "vm": vm.run,
+    "closure": closure_compiler.run,
+    "unboxed": unboxed.run,
+}
 
 @click.command()
 @click.argument("file", required=False)
 @click.option("-i", "--interactive", is_flag=True)
 @click.option("-d", "--debug", is_flag=True)
-def main(file, interactive=False, debug=False):
+@click.option("-e", "--engine", type=click.Choice(list(engines)), default="eval")
+@click.option("--max-frames", type=int, default=vm.DEFAULT_MAX_FRAMES, help="Call depth budget of the vm engine.")
+@click.option("--no-opt", is_flag=True, help="Skip constant folding.")
+@click.option("--int-cache", type=int, nargs=2, default=(mobject.SMALL_INT_MIN, mobject.SMALL_INT_MAX), help="Range of integers allocated once and shared.")
+def main(file, interactive=False, debug=False, engine="eval", max_frames=vm.DEFAULT_MAX_FRAMES, no_opt=False, int_cache=(mobject.SMALL_INT_MIN, mobject.SMALL_INT_MAX)):
+    mobject.cache_small_ints(*int_cache)
+    run = engines[engine]
+    if engine == "vm":
+        run = functools.partial(vm.run, max_frames=max_frames)
+    repl_run = run
+    if not no_opt:
+        repl_run = lambda program, env: run(optimizer.optimize(program), env)
     if file is not None:
         env = Environment()
 
@@ -33,13 +56,22 @@ def main(file, interactive=False, debug=False):
             repl.print_parser_errors(p.errors)
             exit(0)
 
-        evaluated = evaluator.eval(program, env)
-        if (not interactive and evaluated is not None and evaluated != NULL) or evaluated.typ == mobject.ERROR_OBJ:
+        if not no_opt:
+            o = optimizer.Optimizer()
+            program = o.optimize_program(program)
+            if debug:
+                print(f"OPTIMIZER: {o.folded} nodes folded")
+
+        evaluated = run(program, env)
+        if debug and engine == "eval":
+            stats = evaluator.quickening_stats
+            print(f"QUICKENING: {stats.specialized} nodes specialized, {stats.deoptimized} deoptimized")
+        if evaluated is not None and ((not interactive and evaluated is not NULL) or evaluated.typ == mobject.ERROR_OBJ):
             print(evaluated.inspect)
         if interactive:
-            repl.start(env=env)
+            repl.start(env=env, run=repl_run)
     else:
-        repl.start()
+        repl.start(run=repl_run)
 
 
 if __name__ == "__main__":
@@ -1,13 +1,17 @@
-from typing import NamedTuple, List, Dict, Tuple
-from dataclasses import dataclass
+from typing import NamedTuple, List, Dict, Tuple, Iterator, Any
+from dataclasses import dataclass, field, fields
 import tokens
 
 class Node:
+    __slots__ = ()
+
     @property
     def token_literal(self):
         raise NotImplementedError
 
 class Expression(Node):
+    __slots__ = ()
+
     def expression_node(self):
         raise NotImplementedError
 
@@ -16,6 +20,8 @@ class Expression(Node):
         return self.token.literal
 
 class Statement(Node):
+    __slots__ = ()
+
     def statement_node(self):
         raise NotImplementedError
 
@@ -23,10 +29,13 @@ class Statement(Node):
     def token_literal(self):
         return self.token.literal
 
-@dataclass
+@dataclass(slots=True)
 class BlockStatement(Node):
     token: tokens.Token
     statements: List[Statement] = None
+    # Set by the resolver on function, for and while bodies: number of slots
+    # the scope of the body needs.
+    scope_size: int = field(default=0, compare=False, repr=False)
 
     @property
     def token_literal(self):
@@ -35,23 +44,35 @@ class BlockStatement(Node):
     def __str__(self):
         return "".join([str(statement) for statement in (self.statements if self.statements is not None else [])])
 
-@dataclass
+@dataclass(slots=True)
 class Identifier(Expression):
     token: tokens.Token
     value: str = None
+    # Set by the resolver. A local variable lives at env.outer^depth.slots[slot];
+    # when slot is None the name is looked up by name from env.outer^depth.
+    # fallback lists enclosing (depth, slot) bindings to try when the innermost
+    # one has not been set yet, and global_depth is the distance to the
+    # global scope. builtin is set when the name can only refer to a builtin.
+    depth: int = field(default=0, compare=False, repr=False)
+    slot: int = field(default=None, compare=False, repr=False)
+    fallback: Tuple[Tuple[int, int], ...] = field(default=(), compare=False, repr=False)
+    global_depth: int = field(default=0, compare=False, repr=False)
+    builtin: Any = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return self.value
 
-@dataclass
+@dataclass(slots=True)
 class IntegerLiteral(Expression):
     token: tokens.Token
     value: int = None
+    # Prebuilt monkey_object value, set by the parser
+    constant: Any = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return self.token.literal
 
-@dataclass
+@dataclass(slots=True)
 class Boolean(Expression):
     token: tokens.Token
     value: bool = None
@@ -59,15 +80,28 @@ class Boolean(Expression):
     def __str__(self):
         return self.token.literal
 
-@dataclass
+@dataclass(slots=True)
+class Constant(Expression):
+    # A prebuilt monkey_object value, put in place of a literal or of a
+    # constant subtree by the optimizer. Prints as the source it replaced.
+    token: tokens.Token
+    value: Any = None
+    source: str = None
+
+    def __str__(self):
+        return self.source
+
+@dataclass(slots=True)
 class StringLiteral(Expression):
     token: tokens.Token
     value: str = None
+    # Prebuilt monkey_object value, set by the parser
+    constant: Any = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return self.token_literal
 
-@dataclass
+@dataclass(slots=True)
 class ArrayLiteral(Expression):
     token: tokens.Token
     elements: List[Expression] = None
@@ -75,7 +109,7 @@ class ArrayLiteral(Expression):
     def __str__(self):
         return f"[{','.join([str(el) for el in self.elements])}]" if self.elements is not None else "[]"
 
-@dataclass
+@dataclass(slots=True)
 class IndexExpression(Expression):
     token: tokens.Token
     left: Expression = None
@@ -84,7 +118,20 @@ class IndexExpression(Expression):
     def __str__(self):
         return f"({str(self.left)}[{str(self.index)}])"
 
-@dataclass
+@dataclass(slots=True)
+class FieldExpression(Expression):
+    token: tokens.Token
+    left: Expression = None
+    name: str = None
+    # Set by the evaluator: the record type last seen at this node and the
+    # offset of the field in it.
+    record_type: Any = field(default=None, compare=False, repr=False)
+    offset: int = field(default=None, compare=False, repr=False)
+
+    def __str__(self):
+        return f"({str(self.left)}.{self.name})"
+
+@dataclass(slots=True)
 class HashLiteral(Expression):
     token: tokens.Token
     pairs: List[Tuple[Expression, Expression]] = None
@@ -93,7 +140,7 @@ class HashLiteral(Expression):
         str_pairs = [f"{str(k)}:{str(v)}" for k, v in self.pairs] if self.pairs is not None else []
         return "{" + ", ".join(str_pairs) + "}"
 
-@dataclass
+@dataclass(slots=True)
 class IfExpression(Expression):
     token: tokens.Token
     condition: Expression = None
@@ -103,7 +150,7 @@ class IfExpression(Expression):
     def __str__(self):
         return f"if{str(self.condition)} {str(self.consequence)}"+(f"else {str(self.alternative)}" if self.alternative is not None else "")
 
-@dataclass
+@dataclass(slots=True)
 class ForExpression(Expression):
     token: tokens.Token
     iterator: Expression = None
@@ -113,7 +160,7 @@ class ForExpression(Expression):
     def __str__(self):
         return f"for({self.element} in {self.iterator})" + "{" + str(self.body) + "}"
 
-@dataclass
+@dataclass(slots=True)
 class WhileExpression(Expression):
     token: tokens.Token
     condition: Expression = None
@@ -122,7 +169,7 @@ class WhileExpression(Expression):
     def __str__(self):
         return f"while({self.condition})" + "{" + str(self.body) + "}"
 
-@dataclass
+@dataclass(slots=True)
 class FunctionLiteral(Expression):
     token: tokens.Token
     parameters: List[Identifier] = None
@@ -131,7 +178,17 @@ class FunctionLiteral(Expression):
     def __str__(self):
         return f"{self.token_literal}({','.join([str(param) for param in (self.parameters if self.parameters is not None else [])])})"+"{"+f"{str(self.body)}"+"}"
 
-@dataclass
+@dataclass(slots=True)
+class RecordLiteral(Expression):
+    token: tokens.Token
+    fields: List[str] = None
+    # Prebuilt monkey_object.RecordType, set by the parser
+    constant: Any = field(default=None, compare=False, repr=False)
+
+    def __str__(self):
+        return f"{self.token_literal}({','.join(self.fields if self.fields is not None else [])})"
+
+@dataclass(slots=True)
 class CallExpression(Expression):
     token: tokens.Token
     function: Expression = None
@@ -140,26 +197,31 @@ class CallExpression(Expression):
     def __str__(self):
         return f"{str(self.function)}({','.join([str(arg) for arg in (self.arguments if self.arguments is not None else [])])})"
 
-@dataclass
+@dataclass(slots=True)
 class PrefixExpression(Expression):
     token: tokens.Token
     operator: str = None
     right: Expression = None
+    # Operator handler, bound by the evaluator on first evaluation
+    handler: Any = field(default=None, compare=False, repr=False)
     
     def __str__(self):
         return f"({self.operator}{str(self.right)})"
 
-@dataclass
+@dataclass(slots=True)
 class InfixExpression(Expression):
     token: tokens.Token
     left: Expression = None
     operator: str = None
     right: Expression = None
+    # Specialized evaluation handler, installed by the evaluator on first
+    # evaluation (see evaluator.quicken_infix_node)
+    handler: Any = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return f"({str(self.left)}{self.operator}{str(self.right)})"
 
-@dataclass
+@dataclass(slots=True)
 class AssignExpression(Expression):
     token: tokens.Token
     name: Expression = None
@@ -168,38 +230,47 @@ class AssignExpression(Expression):
     def __str__(self):
         return f"({self.name}={self.value})"
 
-@dataclass
+@dataclass(slots=True)
 class LetStatement(Statement):
     token: tokens.Token
     name: Identifier = None
     value: Expression = None
+    # Set by the resolver: the slot of the variable in the current scope, or
+    # None for a global variable.
+    slot: int = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         return f"{self.token_literal} {str(self.name)} = {str(self.value) if self.value is not None else ''};"
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStatement(Statement):
     token: tokens.Token
     return_value: Expression = None
+    # Set by the resolver when the statement returns a call from inside a
+    # function body.
+    tail_call: bool = field(default=False, compare=False, repr=False)
+    # Set by the resolver when the statement is in tail position of a
+    # function body, where its value is the value of the body.
+    tail: bool = field(default=False, compare=False, repr=False)
 
     def __str__(self):
         return f"{self.token_literal} {str(self.return_value) if self.return_value is not None else ''};"
 
-@dataclass
+@dataclass(slots=True)
 class BreakStatement(Statement):
     token: tokens.Token
 
     def __str__(self):
         return self.token_literal + ";"
 
-@dataclass
+@dataclass(slots=True)
 class ContinueStatement(Statement):
     token: tokens.Token
 
     def __str__(self):
         return self.token_literal + ";"
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionStatement(Statement):
     token: tokens.Token
     expression: Expression = None
@@ -208,6 +279,8 @@ class ExpressionStatement(Statement):
         return str(self.expression) if self.expression is not None else ''
 
 class Program(Node):
+    __slots__ = ("statements",)
+
     def __init__(self, statements: List[Statement] = None):
         if statements is None:
             statements = []
@@ -222,3 +295,18 @@ class Program(Node):
 
     def __str__(self):
         return "".join([str(statement) for statement in self.statements])
+
+def children(node: Node) -> Iterator[Node]:
+    if isinstance(node, Program):
+        yield from node.statements
+        return
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if isinstance(value, Node):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, Node):
+                    yield item
+                elif isinstance(item, tuple):
+                    yield from (el for el in item if isinstance(el, Node))
@@ -1,8 +1,9 @@
 import monkey_object as mobject
-from monkey_object import MonkeyObject, NULL
+from monkey_object import MonkeyObject, NULL, TRUE, FALSE
 from typing import Dict
 from evaluator_utils import new_error
 
+import heapq
 import random
 
 def check_args_len(args, n) -> mobject.Error:
@@ -24,13 +25,14 @@ def check_single_arg(typ):
     return closure
 
 def check_args(*typs):
+    # A type of None accepts anything, and a tuple any of its types.
     def closure(f):
         def inner(*args):
             err = check_args_len(args, len(typs))
             if err is not None:
                 return err
             for arg, typ in zip(args, typs):
-                if typ is not None and arg.typ != typ:
+                if typ is not None and (arg.typ not in typ if type(typ) is tuple else arg.typ != typ):
                     return new_error("wrong argument type")
             return f(*args)
         return inner
@@ -41,9 +43,15 @@ def len_builtin(*args) -> mobject.Integer:
     if err is not None:
         return err
     if isinstance(args[0], mobject.String):
-        return mobject.Integer(value=len(args[0].value))
+        return mobject.integer(args[0].length)
     elif isinstance(args[0], mobject.Array):
-        return mobject.Integer(value=len(args[0].elements))
+        return mobject.integer(len(args[0].vector))
+    elif isinstance(args[0], mobject.Hash):
+        return mobject.integer(len(args[0].storage))
+    elif isinstance(args[0], (mobject.Set, mobject.Heap)):
+        return mobject.integer(len(args[0]))
+    elif isinstance(args[0], mobject.Deque):
+        return mobject.integer(len(args[0].elements))
     else:
         return new_error("argument to 'len' not supported, got {}", args[0].typ)
 
@@ -52,10 +60,14 @@ def first(*args) -> MonkeyObject:
     if err is not None: 
         return err
     arg = args[0]
+    if arg.typ == mobject.DEQUE_OBJ:
+        return arg.elements[0] if arg.elements else NULL
+    elif arg.typ == mobject.HEAP_OBJ:
+        return arg.peek() if arg.values else NULL
     if arg.typ != mobject.ARRAY_OBJ:
         return new_error("argument to 'first' must be ARRAY, got {}", arg.typ)
-    if len(arg.elements) > 0:
-        return arg.elements[0]
+    if len(arg.vector) > 0:
+        return arg.vector[0]
     return NULL
 
 def last(*args) -> MonkeyObject:
@@ -63,10 +75,12 @@ def last(*args) -> MonkeyObject:
     if err is not None:
         return err
     arg = args[0]
+    if arg.typ == mobject.DEQUE_OBJ:
+        return arg.elements[-1] if arg.elements else NULL
     if arg.typ != mobject.ARRAY_OBJ:
         return new_error("argument to 'last' must be ARRAY, got {}", arg.typ)
-    if len(arg.elements) > 0:
-        return arg.elements[-1]
+    if len(arg.vector) > 0:
+        return arg.vector[-1]
     return NULL
 
 def rest(*args) -> mobject.Array:
@@ -76,22 +90,28 @@ def rest(*args) -> mobject.Array:
     arg = args[0]
     if arg.typ != mobject.ARRAY_OBJ:
         return new_error("argument to 'last' must be ARRAY, got {}", arg.typ)
-    if len(arg.elements) > 0:
-        return mobject.Array(
-            elements = arg.elements[1:]
-        )
+    if len(arg.vector) > 0:
+        return mobject.Array(vector=arg.vector.rest())
     return NULL
 
 @check_args(mobject.ARRAY_OBJ, None)
 def push(array: mobject.Array, obj: MonkeyObject) -> mobject.Array:
-    return mobject.Array(elements=array.elements+[obj])
+    return mobject.Array(vector=array.vector.append(obj))
+
+@check_args(None, mobject.INTEGER_OBJ, mobject.INTEGER_OBJ)
+def slice_(arg: MonkeyObject, start: mobject.Integer, end: mobject.Integer) -> MonkeyObject:
+    if arg.typ == mobject.ARRAY_OBJ:
+        return mobject.Array(vector=arg.vector.slice(start.value, end.value))
+    elif arg.typ == mobject.STRING_OBJ:
+        return arg.substring(start.value, end.value)
+    return new_error("argument to 'slice' must be ARRAY or STRING, got {}", arg.typ)
 
 def puts(*args):
     for arg in args:
-        if arg.typ not in (mobject.STRING_OBJ, mobject.INTEGER_OBJ, mobject.BOOLEAN_OBJ):
+        if arg.typ not in (mobject.STRING_OBJ, mobject.INTEGER_OBJ, mobject.BOOLEAN_OBJ, mobject.RECORD_OBJ):
             return new_error("wrong argument type, 'puts' does not accept {}", arg.typ)
     for arg in args:
-        print(arg.value)
+        print(arg.inspect if arg.typ == mobject.RECORD_OBJ else arg.value)
 
 def to_str(arg: MonkeyObject) -> mobject.String:
     if arg.typ not in (mobject.STRING_OBJ, mobject.INTEGER_OBJ, mobject.BOOLEAN_OBJ):
@@ -100,11 +120,169 @@ def to_str(arg: MonkeyObject) -> mobject.String:
 
 @check_single_arg(mobject.INTEGER_OBJ)
 def range_(n: mobject.Integer) -> mobject.Array:
-    return mobject.Array(elements=[mobject.Integer(value=val) for val in range(n.value)])
+    return mobject.Array(vector=mobject.IntegerRange(range(n.value)))
+
+@check_single_arg(mobject.HASH_OBJ)
+def pairs(hash: mobject.Hash) -> mobject.Iterator:
+    return mobject.Iterator(iterator=(mobject.Array(elements=pair) for pair in hash.storage.items()))
+
+@check_single_arg(mobject.HASH_OBJ)
+def keys(hash: mobject.Hash) -> mobject.Array:
+    return mobject.Array(elements=[key for key, _ in hash.storage.items()])
+
+@check_single_arg(mobject.HASH_OBJ)
+def values(hash: mobject.Hash) -> mobject.Array:
+    return mobject.Array(elements=[value for _, value in hash.storage.items()])
+
+@check_args((mobject.HASH_OBJ, mobject.SET_OBJ))
+def size(collection: MonkeyObject) -> mobject.Integer:
+    if collection.typ == mobject.SET_OBJ:
+        return mobject.integer(len(collection))
+    return mobject.integer(len(collection.storage))
+
+@check_args((mobject.HASH_OBJ, mobject.SET_OBJ), None)
+def has(collection: MonkeyObject, key: MonkeyObject) -> mobject.Boolean:
+    if not isinstance(key, mobject.Hashable):
+        return new_error("unusable as hash key: {}", key.typ)
+    if collection.typ == mobject.SET_OBJ:
+        return TRUE if key in collection else FALSE
+    return TRUE if collection.storage.get(key) is not None else FALSE
+
+@check_args((mobject.HASH_OBJ, mobject.SET_OBJ), None)
+def delete(collection: MonkeyObject, key: MonkeyObject) -> MonkeyObject:
+    # Removes the key in place and returns its value, or null if it was not
+    # in the hash. For a set, the value is the element.
+    if not isinstance(key, mobject.Hashable):
+        return new_error("unusable as hash key: {}", key.typ)
+    if collection.typ == mobject.SET_OBJ:
+        if key not in collection:
+            return NULL
+        collection.discard(key)
+        return key
+    value = collection.storage.get(key)
+    if value is None:
+        return NULL
+    collection.storage = collection.storage.remove(key)
+    return value
+
+@check_args(mobject.HASH_OBJ, None, None)
+def set_(hash: mobject.Hash, key: MonkeyObject, value: MonkeyObject) -> mobject.Hash:
+    # Returns a new hash; the argument is left unchanged.
+    if not isinstance(key, mobject.Hashable):
+        return new_error("unusable as hash key: {}", key.typ)
+    return mobject.Hash(storage=hash.storage.set(key, value))
+
+@check_args((mobject.HASH_OBJ, mobject.SET_OBJ), None)
+def remove(collection: MonkeyObject, key: MonkeyObject) -> MonkeyObject:
+    # Returns a new hash, leaving the argument unchanged. Sets are changed in
+    # place like with add, and the set is returned.
+    if not isinstance(key, mobject.Hashable):
+        return new_error("unusable as hash key: {}", key.typ)
+    if collection.typ == mobject.SET_OBJ:
+        collection.discard(key)
+        return collection
+    return mobject.Hash(storage=collection.storage.remove(key))
+
+def to_set(*args) -> mobject.Set:
+    # The distinct elements of anything a for-in loop can iterate over.
+    err = check_args_len(args, 1)
+    if err is not None:
+        return err
+    elements = args[0].iterate()
+    if elements is None:
+        return new_error("cannot iterate over {}", args[0].typ)
+    s = mobject.Set()
+    for element in elements:
+        if not isinstance(element, mobject.Hashable):
+            return new_error("unusable as hash key: {}", element.typ)
+        s.add(element)
+    return s
+
+@check_args(mobject.SET_OBJ, None)
+def add(s: mobject.Set, element: MonkeyObject) -> mobject.Set:
+    # Adds the element in place and returns the set.
+    if not isinstance(element, mobject.Hashable):
+        return new_error("unusable as hash key: {}", element.typ)
+    s.add(element)
+    return s
+
+@check_args(mobject.SET_OBJ, mobject.SET_OBJ)
+def union(s: mobject.Set, other: mobject.Set) -> mobject.Set:
+    return s.union(other)
+
+@check_args(mobject.SET_OBJ, mobject.SET_OBJ)
+def intersection(s: mobject.Set, other: mobject.Set) -> mobject.Set:
+    return s.intersection(other)
+
+@check_args(mobject.SET_OBJ, mobject.SET_OBJ)
+def difference(s: mobject.Set, other: mobject.Set) -> mobject.Set:
+    return s.difference(other)
+
+def deque(*args) -> mobject.Deque:
+    err = check_args_len(args, 1)
+    if err is not None:
+        return err
+    elements = args[0].iterate()
+    if elements is None:
+        return new_error("cannot iterate over {}", args[0].typ)
+    return mobject.Deque(elements)
+
+# Deques and heaps are changed in place. The pushes return the container, and
+# the pops the element, or null when it is empty.
+
+@check_args(mobject.DEQUE_OBJ, None)
+def push_back(d: mobject.Deque, obj: MonkeyObject) -> mobject.Deque:
+    d.elements.append(obj)
+    return d
+
+@check_args(mobject.DEQUE_OBJ, None)
+def push_front(d: mobject.Deque, obj: MonkeyObject) -> mobject.Deque:
+    d.elements.appendleft(obj)
+    return d
+
+@check_single_arg(mobject.DEQUE_OBJ)
+def pop_back(d: mobject.Deque) -> MonkeyObject:
+    return d.elements.pop() if d.elements else NULL
+
+@check_single_arg(mobject.DEQUE_OBJ)
+def pop_front(d: mobject.Deque) -> MonkeyObject:
+    return d.elements.popleft() if d.elements else NULL
+
+def heap_element_error(h: mobject.Heap, obj: MonkeyObject) -> mobject.Error:
+    if h.values and (obj.typ == mobject.INTEGER_OBJ or obj.typ == mobject.STRING_OBJ):
+        return new_error("cannot push {} onto a heap of {}", obj.typ, h.kind.typ)
+    return new_error("heap elements must be INTEGER or STRING, got {}", obj.typ)
+
+def heap(*args) -> mobject.Heap:
+    err = check_args_len(args, 1)
+    if err is not None:
+        return err
+    elements = args[0].iterate()
+    if elements is None:
+        return new_error("cannot iterate over {}", args[0].typ)
+    h = mobject.Heap()
+    for element in elements:
+        if not h.accepts(element):
+            return heap_element_error(h, element)
+        h.kind = type(element)
+        h.values.append(element.value)
+    heapq.heapify(h.values)
+    return h
+
+@check_args(mobject.HEAP_OBJ, None)
+def heap_push(h: mobject.Heap, obj: MonkeyObject) -> mobject.Heap:
+    if not h.accepts(obj):
+        return heap_element_error(h, obj)
+    h.push(obj)
+    return h
+
+@check_single_arg(mobject.HEAP_OBJ)
+def heap_pop(h: mobject.Heap) -> MonkeyObject:
+    return h.pop() if h.values else NULL
 
 @check_single_arg(mobject.INTEGER_OBJ)
 def randint(n: mobject.Integer) -> mobject.Integer:
-    return mobject.Integer(value=random.randint(0, n.value))
+    return mobject.integer(random.randint(0, n.value))
 
 builtins: Dict[str, mobject.Builtin] = {
     "len": mobject.Builtin(
@@ -114,8 +292,30 @@ builtins: Dict[str, mobject.Builtin] = {
     "last": mobject.Builtin(fn=last),
     "rest": mobject.Builtin(fn=rest),
     "push": mobject.Builtin(fn=push),
+    "slice": mobject.Builtin(fn=slice_),
     "puts": mobject.Builtin(fn=puts),
     "range": mobject.Builtin(fn=range_),
     "to_str": mobject.Builtin(fn=to_str),
     "randint": mobject.Builtin(fn=randint),
+    "pairs": mobject.Builtin(fn=pairs),
+    "keys": mobject.Builtin(fn=keys),
+    "values": mobject.Builtin(fn=values),
+    "size": mobject.Builtin(fn=size),
+    "has": mobject.Builtin(fn=has),
+    "delete": mobject.Builtin(fn=delete),
+    "set": mobject.Builtin(fn=set_),
+    "remove": mobject.Builtin(fn=remove),
+    "to_set": mobject.Builtin(fn=to_set),
+    "add": mobject.Builtin(fn=add),
+    "union": mobject.Builtin(fn=union),
+    "intersection": mobject.Builtin(fn=intersection),
+    "difference": mobject.Builtin(fn=difference),
+    "deque": mobject.Builtin(fn=deque),
+    "push_back": mobject.Builtin(fn=push_back),
+    "push_front": mobject.Builtin(fn=push_front),
+    "pop_back": mobject.Builtin(fn=pop_back),
+    "pop_front": mobject.Builtin(fn=pop_front),
+    "heap": mobject.Builtin(fn=heap),
+    "heap_push": mobject.Builtin(fn=heap_push),
+    "heap_pop": mobject.Builtin(fn=heap_pop),
 }
\ No newline at end of file
@@ -1,33 +1,48 @@
 import monkey_ast as ast
+import pvector
+import hamt
+
+import collections
+import heapq
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Callable, NamedTuple
+from typing import Dict, List, Callable, NamedTuple, Iterable, Tuple
 
 INTEGER_OBJ = "INTEGER"
 BOOLEAN_OBJ = "BOOLEAN"
 STRING_OBJ = "STRING"
 NULL_OBJ = "NULL"
-RETURN_VALUE_OBJ = "RETURN_VALUE"
 ERROR_OBJ = "ERROR"
 FUNCTION_OBJ = "FUNCTION"
 BUILTIN_OBJ = "BUILTIN"
 ARRAY_OBJ = "ARRAY"
 HASH_OBJ = "HASH"
-BREAK_OBJ = "BREAK"
-CONTINUE_OBJ = "CONTINUE"
+COMPILED_FUNCTION_OBJ = "COMPILED_FUNCTION"
+TAIL_CALL_OBJ = "TAIL_CALL"
+ITERATOR_OBJ = "ITERATOR"
+SET_OBJ = "SET"
+DEQUE_OBJ = "DEQUE"
+HEAP_OBJ = "HEAP"
+RECORD_TYPE_OBJ = "RECORD_TYPE"
+RECORD_OBJ = "RECORD"
 
 class ObjectType(str):
     pass
 
 class MonkeyObject:
-    @property
-    def typ(self) -> ObjectType:
-        raise NotImplementedError
+    # Type tag, a class attribute of every concrete object class
+    typ: ObjectType = None
+    __slots__ = ()
 
     @property
     def inspect(self) -> str:
         raise NotImplementedError
 
+    # Iteration protocol of for-in loops: returns a Python iterator over the
+    # elements, pulled one at a time, or None if the object is not iterable.
+    def iterate(self) -> Iterable["MonkeyObject"]:
+        return None
+
 class HashKey(NamedTuple):
     typ: ObjectType
     value: int
@@ -37,17 +52,17 @@ class HashPair(NamedTuple):
     value: MonkeyObject
 
 class Hashable(MonkeyObject):
+    __slots__ = ()
+
     @property
     def hash_key(self) -> HashKey:
         raise NotImplementedError
 
-@dataclass
+@dataclass(slots=True)
 class Integer(Hashable):
     value: int
 
-    @property
-    def typ(self) -> ObjectType:
-        return INTEGER_OBJ
+    typ = INTEGER_OBJ
 
     @property
     def inspect(self) -> str:
@@ -57,13 +72,33 @@ class Integer(Hashable):
     def hash_key(self) -> HashKey:
         return HashKey(self.typ, self.value)
 
-@dataclass
+# Integer objects are never mutated, so the ones for frequently used values
+# are allocated once and shared: integer() returns the cached instance when
+# there is one.
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 1024
+
+small_ints: Dict[int, Integer] = {}
+
+def cache_small_ints(low: int, high: int):
+    global SMALL_INT_MIN, SMALL_INT_MAX
+    SMALL_INT_MIN, SMALL_INT_MAX = low, high
+    small_ints.clear()
+    small_ints.update((value, Integer(value=value)) for value in range(low, high + 1))
+
+cache_small_ints(SMALL_INT_MIN, SMALL_INT_MAX)
+
+def integer(value: int) -> Integer:
+    obj = small_ints.get(value)
+    if obj is None:
+        return Integer(value=value)
+    return obj
+
+@dataclass(slots=True)
 class Boolean(Hashable):
     value: bool
 
-    @property
-    def typ(self) -> ObjectType:
-        return BOOLEAN_OBJ
+    typ = BOOLEAN_OBJ
 
     @property
     def inspect(self) -> str:
@@ -73,13 +108,55 @@ class Boolean(Hashable):
     def hash_key(self) -> HashKey:
         return HashKey(self.typ, int(self.value))
 
-@dataclass
+# Concatenations shorter than this are done right away; longer ones make a
+# rope node.
+ROPE_MIN_LENGTH = 256
+
 class String(Hashable):
-    value: str
+    # Either a flat Python string, or a rope node whose characters are made
+    # on demand: the concatenation of the Strings in `parts`, or the
+    # characters offset..offset+length of the single String in `parts`.
+    # Reading `value` flattens a rope once and keeps the result, so building
+    # a long string with repeated `+` is linear instead of quadratic.
+    __slots__ = ("flat", "parts", "offset", "length", "hash")
+
+    typ = STRING_OBJ
+
+    def __init__(self, value: str = None, parts: tuple = None, offset: int = None, length: int = None):
+        self.flat = value
+        self.parts = parts
+        self.offset = offset
+        self.length = len(value) if value is not None else length
+        self.hash = None
 
     @property
-    def typ(self) -> ObjectType:
-        return STRING_OBJ
+    def value(self) -> str:
+        if self.flat is None:
+            self.flat = flatten(self)
+            self.parts = None
+            self.offset = None
+        return self.flat
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not String:
+            return NotImplemented
+        return self.length == other.length and self.value == other.value
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"String(value={self.value!r})"
+
+    def substring(self, low: int, high: int) -> "String":
+        # Python slice bounds. Long substrings are views of this string.
+        low, high, _ = slice(low, high).indices(self.length)
+        length = max(0, high - low)
+        if self.flat is not None and length < ROPE_MIN_LENGTH:
+            return String(value=self.flat[low:high])
+        source = self
+        if self.flat is None and self.offset is not None:
+            source, low = self.parts[0], self.offset + low
+        return String(parts=(source,), offset=low, length=length)
 
     @property
     def inspect(self) -> str:
@@ -87,98 +164,440 @@ class String(Hashable):
 
     @property
     def hash_key(self) -> HashKey:
-        return HashKey(self.typ, self.value.__hash__())
+        if self.hash is None:
+            self.hash = self.value.__hash__()
+        return HashKey(self.typ, self.hash)
+
+    def iterate(self) -> Iterable[MonkeyObject]:
+        return (String(value=char) for char in self.value)
+
+def concat(left: String, right: String) -> String:
+    if left.length + right.length < ROPE_MIN_LENGTH or not left.length or not right.length:
+        return String(value=left.value + right.value)
+    return String(parts=(left, right), length=left.length + right.length)
+
+def flatten(string: String) -> str:
+    # Walks the rope with an explicit stack, since repeated `s = s + x` makes
+    # it as deep as it is long.
+    pieces = []
+    stack = [string]
+    while stack:
+        s = stack.pop()
+        if s.flat is not None:
+            pieces.append(s.flat)
+        elif s.offset is not None:
+            pieces.append(s.parts[0].value[s.offset:s.offset+s.length])
+        else:
+            stack.extend(reversed(s.parts))
+    return "".join(pieces)
 
-@dataclass
 class Array(MonkeyObject):
-    elements: List[MonkeyObject]
+    # Backed by a persistent vector, so arrays derived with push or rest share
+    # structure with the original. `elements` is the vector itself, a
+    # read-only sequence, for code that only indexes and iterates. The
+    # vector can also be an IntegerRange, which has the same interface.
+    __slots__ = ("vector",)
+
+    typ = ARRAY_OBJ
+
+    def __init__(self, elements: List[MonkeyObject] = (), vector: pvector.Vector = None):
+        self.vector = vector if vector is not None else pvector.vector(elements)
 
     @property
-    def typ(self) -> ObjectType:
-        return ARRAY_OBJ
-    
+    def elements(self) -> pvector.Vector:
+        return self.vector
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not Array:
+            return NotImplemented
+        return len(self.vector) == len(other.vector) and all(a == b for a, b in zip(self.vector, other.vector))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Array(elements={list(self.vector)!r})"
+
+    def iterate(self) -> Iterable[MonkeyObject]:
+        return iter(self.vector)
+
     @property
     def inspect(self) -> str:
-        return f"[{', '.join([el.inspect for el in self.elements])}]" if self.elements else "[]"
+        return f"[{', '.join([el.inspect for el in self.vector])}]"
+
+class IntegerRange:
+    # The elements of range(n), made on demand: iterating, indexing, rest and
+    # slice take O(1) memory. Appending or setting an element turns it into a
+    # vector.
+    __slots__ = ("range",)
+
+    def __init__(self, r: range):
+        self.range = r
+
+    def __len__(self) -> int:
+        return len(self.range)
+
+    def __getitem__(self, index):
+        if type(index) is slice:
+            return [integer(value) for value in self.range[index]]
+        return integer(self.range[index])
+
+    def __iter__(self):
+        return map(integer, self.range)
+
+    def get(self, index: int) -> Integer:
+        return integer(self.range[index])
+
+    def append(self, value) -> pvector.Vector:
+        return pvector.vector(self).append(value)
+
+    def set(self, index: int, value) -> pvector.Vector:
+        return pvector.vector(self).set(index, value)
+
+    def rest(self) -> "IntegerRange":
+        return IntegerRange(self.range[1:])
+
+    def slice(self, low: int, high: int) -> "IntegerRange":
+        return IntegerRange(self.range[low:high])
+
+class DenseStorage:
+    # Keys 0..n-1, added in that order: the values are a vector indexed by
+    # the key.
+    __slots__ = ("vector",)
+
+    def __init__(self, vector: pvector.Vector = pvector.EMPTY):
+        self.vector = vector
+
+    def __len__(self) -> int:
+        return len(self.vector)
+
+    def get(self, key: Hashable) -> MonkeyObject:
+        if type(key) is Integer:
+            i = key.value
+            vector = self.vector
+            if 0 <= i < vector.end - vector.start:
+                return vector.get(i)
+        return None
+
+    def set(self, key: Hashable, value: MonkeyObject):
+        if type(key) is Integer:
+            i = key.value
+            if 0 <= i < len(self.vector):
+                return DenseStorage(self.vector.set(i, value))
+            elif i == len(self.vector):
+                return DenseStorage(self.vector.append(value))
+        return hash_storage(list(self.items()) + [(key, value)])
+
+    def remove(self, key: Hashable):
+        if self.get(key) is None:
+            return self
+        if key.value == len(self.vector) - 1:
+            return DenseStorage(self.vector.slice(0, -1))
+        native = NativeStorage(Integer, hamt.from_items((key.value, value) for key, value in self.items()))
+        return native.remove(key)
+
+    def items(self) -> Iterable[Tuple[Hashable, MonkeyObject]]:
+        return zip(map(integer, range(len(self.vector))), self.vector)
+
+class NativeStorage:
+    # All keys are Integers, or all are Strings: the map is keyed by their
+    # Python values, so a lookup needs no HashKey.
+    __slots__ = ("kind", "map")
+
+    def __init__(self, kind: type, map: hamt.Map):
+        self.kind = kind
+        self.map = map
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+    def get(self, key: Hashable) -> MonkeyObject:
+        if type(key) is self.kind:
+            return self.map.get(key.value)
+        return None
+
+    def set(self, key: Hashable, value: MonkeyObject):
+        if type(key) is self.kind:
+            return NativeStorage(self.kind, self.map.set(key.value, value))
+        return hash_storage(list(self.items()) + [(key, value)])
+
+    def remove(self, key: Hashable):
+        if type(key) is self.kind:
+            return NativeStorage(self.kind, self.map.remove(key.value))
+        return self
+
+    def items(self) -> Iterable[Tuple[Hashable, MonkeyObject]]:
+        make = integer if self.kind is Integer else lambda value: String(value=value)
+        return ((make(key), value) for key, value in self.map.items())
+
+class GeneralStorage:
+    # Keys of mixed types, keyed by HashKey.
+    __slots__ = ("map",)
+
+    def __init__(self, map: hamt.Map):
+        self.map = map
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+    def get(self, key: Hashable) -> MonkeyObject:
+        pair = self.map.get(key.hash_key)
+        return None if pair is None else pair.value
+
+    def set(self, key: Hashable, value: MonkeyObject):
+        return GeneralStorage(self.map.set(key.hash_key, HashPair(key=key, value=value)))
+
+    def remove(self, key: Hashable):
+        return GeneralStorage(self.map.remove(key.hash_key))
+
+    def items(self) -> Iterable[Tuple[Hashable, MonkeyObject]]:
+        return self.map.values()
+
+def hash_storage(items: Iterable[Tuple[Hashable, MonkeyObject]]):
+    # Picks the storage for the keys: dense, native or general. This runs
+    # for every hash literal, so the keys are checked in a single pass.
+    if type(items) is not list:
+        items = list(items)
+    if not items:
+        return DenseStorage()
+    kind = type(items[0][0])
+    if kind is Integer or kind is String:
+        table = {}
+        for key, value in items:
+            if type(key) is not kind:
+                break
+            table[key.value] = value
+        else:
+            if kind is Integer and list(table) == list(range(len(table))):
+                return DenseStorage(pvector.vector(table.values()))
+            return NativeStorage(kind, hamt.from_dict(table))
+    return GeneralStorage(hamt.from_items((key.hash_key, HashPair(key=key, value=value)) for key, value in items))
 
-@dataclass
 class Hash(MonkeyObject):
-    pairs: Dict[HashKey, HashPair]
+    # The storage is picked by the keys (see hash_storage) and is persistent,
+    # so hashes derived with the set and remove builtins share structure with
+    # the original. Index assignment and delete replace the storage of this
+    # hash with an updated version.
+    __slots__ = ("storage",)
 
-    @property
-    def typ(self) -> ObjectType:
-        return HASH_OBJ
+    typ = HASH_OBJ
+
+    def __init__(self, pairs: Dict[HashKey, HashPair] = None, storage=None):
+        if storage is None:
+            storage = hash_storage((pair.key, pair.value) for pair in pairs.values()) if pairs else DenseStorage()
+        self.storage = storage
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not Hash:
+            return NotImplemented
+        return len(self.storage) == len(other.storage) and all(other.storage.get(key) == value for key, value in self.storage.items())
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Hash(items={list(self.storage.items())!r})"
 
     @property
     def inspect(self) -> str:
-        pairs_str = [f"{pair.key.inspect}: {pair.value.inspect}" for _, pair in self.pairs.items()]
+        pairs_str = [f"{key.inspect}: {value.inspect}" for key, value in self.storage.items()]
         return "{"+", ".join(pairs_str)+"}"
 
-class Null(MonkeyObject):
+    def iterate(self) -> Iterable[MonkeyObject]:
+        # The storage is persistent, so the loop body can modify the hash.
+        return (key for key, _ in self.storage.items())
 
-    @property
-    def typ(self) -> ObjectType:
-        return NULL_OBJ
+class Set(MonkeyObject):
+    # Distinct Hashable values in insertion order, keyed by hash_key like the
+    # keys of a hash. The dict makes membership O(1) and lets union,
+    # intersection and difference run as dict operations.
+    __slots__ = ("members",)
+
+    typ = SET_OBJ
+
+    def __init__(self, members: Dict[HashKey, Hashable] = None):
+        self.members = {} if members is None else members
+
+    def __contains__(self, element: Hashable) -> bool:
+        return element.hash_key in self.members
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def add(self, element: Hashable):
+        self.members[element.hash_key] = element
+
+    def discard(self, element: Hashable):
+        self.members.pop(element.hash_key, None)
+
+    def union(self, other: "Set") -> "Set":
+        return Set({**self.members, **other.members})
+
+    def intersection(self, other: "Set") -> "Set":
+        members = other.members
+        return Set({key: element for key, element in self.members.items() if key in members})
+
+    def difference(self, other: "Set") -> "Set":
+        members = other.members
+        return Set({key: element for key, element in self.members.items() if key not in members})
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not Set:
+            return NotImplemented
+        return self.members.keys() == other.members.keys()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Set({list(self.members.values())!r})"
 
     @property
     def inspect(self) -> str:
-        return "null"
+        return "to_set([" + ", ".join(element.inspect for element in self.members.values()) + "])"
 
-@dataclass
-class ReturnValue(MonkeyObject):
-    value: MonkeyObject
+    def iterate(self) -> Iterable[MonkeyObject]:
+        # Over a copy, so the loop body can add and delete elements.
+        return iter(list(self.members.values()))
 
-    @property
-    def typ(self) -> ObjectType:
-        return RETURN_VALUE_OBJ
+class Deque(MonkeyObject):
+    # A double-ended queue, changed in place: O(1) push and pop at both ends.
+    __slots__ = ("elements",)
+
+    typ = DEQUE_OBJ
+
+    def __init__(self, elements: Iterable[MonkeyObject] = ()):
+        self.elements = collections.deque(elements)
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not Deque:
+            return NotImplemented
+        return self.elements == other.elements
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Deque({list(self.elements)!r})"
 
     @property
     def inspect(self) -> str:
-        return self.value.inspect()
+        return "deque([" + ", ".join(element.inspect for element in self.elements) + "])"
+
+    def iterate(self) -> Iterable[MonkeyObject]:
+        # Over a copy, so the loop body can push and pop.
+        return iter(list(self.elements))
+
+class Heap(MonkeyObject):
+    # A binary min-heap of Integers or of Strings, changed in place: O(log n)
+    # push and pop. heapq orders the Python values, which are kept instead of
+    # the objects and boxed again when they are popped.
+    __slots__ = ("kind", "values")
+
+    typ = HEAP_OBJ
+
+    def __init__(self, kind: type = None, values: List = None):
+        # kind is Integer or String, or None while the heap is empty.
+        self.kind = kind
+        self.values = [] if values is None else values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def accepts(self, value: MonkeyObject) -> bool:
+        if self.kind is None or not self.values:
+            return type(value) is Integer or type(value) is String
+        return type(value) is self.kind
 
-@dataclass
-class Break(MonkeyObject):
+    def push(self, value: MonkeyObject):
+        self.kind = type(value)
+        heapq.heappush(self.values, value.value)
+
+    def box(self, value) -> MonkeyObject:
+        return integer(value) if self.kind is Integer else String(value=value)
+
+    def peek(self) -> MonkeyObject:
+        return self.box(self.values[0])
+
+    def pop(self) -> MonkeyObject:
+        return self.box(heapq.heappop(self.values))
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not Heap:
+            return NotImplemented
+        return sorted(self.values) == sorted(other.values)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Heap({sorted(self.values)!r})"
 
     @property
-    def typ(self) -> ObjectType:
-        return BREAK_OBJ
+    def inspect(self) -> str:
+        return "heap([" + ", ".join(self.box(value).inspect for value in sorted(self.values)) + "])"
+
+    def iterate(self) -> Iterable[MonkeyObject]:
+        # In order, smallest first, without popping.
+        return (self.box(value) for value in sorted(self.values))
+
+@dataclass(slots=True)
+class Iterator(MonkeyObject):
+    # A stream of values returned by a builtin, e.g. `pairs`. It can be
+    # consumed once.
+    iterator: Iterable[MonkeyObject]
+
+    typ = ITERATOR_OBJ
 
     @property
     def inspect(self) -> str:
-        return "break"
+        return "iterator"
+
+    def iterate(self) -> Iterable[MonkeyObject]:
+        return self.iterator
+
+class Null(MonkeyObject):
+    __slots__ = ()
+
+    typ = NULL_OBJ
 
-@dataclass
-class Continue(MonkeyObject):
     @property
-    def typ(self) -> ObjectType:
-        return CONTINUE_OBJ
-    
+    def inspect(self) -> str:
+        return "null"
+
+@dataclass(slots=True)
+class TailCall(MonkeyObject):
+    # The value of a `return f(...)` statement in a function body; called by
+    # the trampoline in apply_function.
+    fn: MonkeyObject
+    args: List[MonkeyObject]
+
+    typ = TAIL_CALL_OBJ
+
     @property
     def inspect(self) -> str:
-        return "continue"
+        return "tail call"
 
-@dataclass
+@dataclass(slots=True)
 class Error(MonkeyObject):
     message: str
 
-    @property
-    def typ(self) -> ObjectType:
-        return ERROR_OBJ
+    typ = ERROR_OBJ
 
     @property
     def inspect(self) -> str:
         return f"ERROR: {self.message}"
 
-@dataclass
+@dataclass(slots=True)
 class Environment:
     store: Dict[str, MonkeyObject] = field(default_factory=lambda: {})
     outer: "Environment" = None
+    # Variables of resolved local scopes, indexed by the slots computed in resolver.py
+    slots: List[MonkeyObject] = None
 
     def get(self, name:str) -> MonkeyObject:
-        obj = self.store.get(name)
-        if obj is None and self.outer is not None:
-            return self.outer.get(name)
-        return obj
+        env = self
+        while env is not None:
+            obj = env.store.get(name)
+            if obj is not None:
+                return obj
+            env = env.outer
+        return None
 
     def set(self, name:str, val: MonkeyObject) -> MonkeyObject:
         self.store[name] = val
@@ -199,15 +618,13 @@ class Environment:
         env.outer = outer
         return env
 
-@dataclass
+@dataclass(slots=True)
 class Function(MonkeyObject):
     parameters: List[ast.Identifier]
     body: ast.BlockStatement
     env: Environment
 
-    @property
-    def typ(self) -> ObjectType:
-        return FUNCTION_OBJ
+    typ = FUNCTION_OBJ
 
     @property
     def inspect(self) -> str:
@@ -215,18 +632,92 @@ class Function(MonkeyObject):
         body_str = str(self.body) if self.body is not None else ''
         return f"fn({params_str}){body_str}"
 
-@dataclass
+@dataclass(slots=True)
 class Builtin(MonkeyObject):
     fn: Callable
 
-    @property
-    def typ(self) -> ObjectType:
-        return BUILTIN_OBJ
+    typ = BUILTIN_OBJ
 
     @property
     def inspect(self) -> str:
         return "builtin function"
 
+class RecordType(MonkeyObject):
+    # Made once by the parser for each `record(...)` declaration: the field
+    # names and their offsets in the values of the records. Calling it with
+    # one value per field makes a record.
+    __slots__ = ("name", "fields", "offsets")
+
+    typ = RECORD_TYPE_OBJ
+
+    def __init__(self, fields: Tuple[str, ...], name: str = "record"):
+        self.name = name
+        self.fields = fields
+        self.offsets: Dict[str, int] = {name: offset for offset, name in enumerate(fields)}
+
+    def __repr__(self) -> str:
+        return f"RecordType(name={self.name!r}, fields={self.fields!r})"
+
+    @property
+    def inspect(self) -> str:
+        return f"record({', '.join(self.fields)})"
+
+class Record(MonkeyObject):
+    # The field values in the order of record_type.fields, so a record costs
+    # one tuple slot per field instead of a hash entry.
+    __slots__ = ("record_type", "values")
+
+    typ = RECORD_OBJ
+
+    def __init__(self, record_type: RecordType, values: Tuple[MonkeyObject, ...]):
+        self.record_type = record_type
+        self.values = values
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not Record:
+            return NotImplemented
+        return self.record_type is other.record_type and self.values == other.values
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Record({self.record_type.name}, {self.values!r})"
+
+    @property
+    def inspect(self) -> str:
+        fields = [f"{name}: {value.inspect}" for name, value in zip(self.record_type.fields, self.values)]
+        return f"{self.record_type.name}({', '.join(fields)})"
+
+@dataclass(slots=True)
+class CompiledFunction(MonkeyObject):
+    instructions: List[int]
+    constants: List[object]
+    parameters: List[ast.Identifier]
+    body: ast.BlockStatement
+    parameter_names: List[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.parameter_names = [param.value for param in self.parameters]
+
+    typ = COMPILED_FUNCTION_OBJ
+
+    @property
+    def inspect(self) -> str:
+        return f"CompiledFunction[{id(self)}]"
+
+@dataclass(slots=True)
+class Closure(MonkeyObject):
+    fn: CompiledFunction
+    env: Environment
+
+    typ = FUNCTION_OBJ
+
+    @property
+    def inspect(self) -> str:
+        params_str = ','.join(self.fn.parameter_names)
+        body_str = str(self.fn.body) if self.fn.body is not None else ''
+        return f"fn({params_str}){body_str}"
+
 NULL = Null()
 TRUE = Boolean(value=True)
-FALSE = Boolean(value=False)
\ No newline at end of file
+FALSE = Boolean(value=False)
@@ -24,4 +24,98 @@ def test_bool_hash_key():
     f1 = mobject.Boolean(value=False)
 
     assert t1.hash_key == t2.hash_key, "bool with same content have different hash keys"
-    assert t1.hash_key != f1.hash_key, "bool with different content have same hash keys"
\ No newline at end of file
+    assert t1.hash_key != f1.hash_key, "bool with different content have same hash keys"
+
+def test_small_int_cache():
+    assert mobject.integer(5) is mobject.integer(5), "small integers are not shared"
+    assert mobject.integer(-5) is mobject.integer(-5), "small integers are not shared"
+    assert mobject.integer(10**6) is not mobject.integer(10**6), "large integers should not be cached"
+    assert mobject.integer(10**6) == mobject.Integer(value=10**6), "integer() returns wrong value"
+
+    low, high = mobject.SMALL_INT_MIN, mobject.SMALL_INT_MAX
+    try:
+        mobject.cache_small_ints(0, 2000)
+        assert mobject.integer(2000) is mobject.integer(2000), "cache range is not configurable"
+        assert mobject.integer(-1) is not mobject.integer(-1), "integers out of the cache range should not be cached"
+    finally:
+        mobject.cache_small_ints(low, high)
+
+def test_slots():
+    tests = [
+        mobject.Integer(value=1),
+        mobject.String(value="a"),
+        mobject.Array(elements=[]),
+        mobject.Hash(pairs={}),
+        mobject.Record(mobject.RecordType(("x",)), (mobject.NULL,)),
+        mobject.Environment(),
+        mobject.NULL,
+        mobject.TRUE,
+    ]
+    for obj in tests:
+        assert not hasattr(obj, "__dict__"), f"{type(obj).__name__} has an instance dict"
+    assert mobject.Integer.typ == mobject.INTEGER_OBJ, "typ is not a class attribute"
+
+def test_integer_range():
+    r = mobject.IntegerRange(range(10))
+    assert len(r) == 10, f"wrong length. got {len(r)}"
+    assert [el.value for el in r] == list(range(10)), "wrong elements"
+    assert r[3] == mobject.Integer(value=3), f"wrong element. got {r[3]}"
+    assert [el.value for el in r.rest().slice(2, 4)] == [3, 4], "wrong elements after rest and slice"
+    v = r.append(mobject.integer(10))
+    assert [el.value for el in v] == list(range(11)), "wrong elements after append"
+    assert mobject.Array(vector=r) == mobject.Array(elements=list(r)), "range array differs from the same array"
+
+def test_string_rope():
+    parts = [mobject.String(value=str(i) * 50) for i in range(100)]
+    expected = "".join(part.value for part in parts)
+    rope = mobject.String(value="")
+    for part in parts:
+        rope = mobject.concat(rope, part)
+    assert rope.flat is None, "long concatenation was not kept as a rope"
+    assert rope.length == len(expected), f"wrong length. got {rope.length}"
+    assert rope.value == expected, "rope flattens to the wrong value"
+    assert rope.hash_key == mobject.String(value=expected).hash_key, "rope has a different hash key"
+
+    deep = mobject.String(value="x" * 300)
+    for _ in range(20000):
+        deep = mobject.concat(deep, mobject.String(value="y"))
+    assert deep.length == 20300 and deep.value == "x" * 300 + "y" * 20000, "deep rope flattens to the wrong value"
+
+    tests = [(0, 5), (40, 60), (100, 5000), (-300, -1), (10, 5)]
+    for low, high in tests:
+        for string in [rope, mobject.String(value=expected)]:
+            sub = string.substring(low, high)
+            assert sub.value == expected[low:high], f"wrong substring({low}, {high})"
+            assert sub.substring(1, -1).value == expected[low:high][1:-1], f"wrong substring of substring({low}, {high})"
+
+def test_hash_storage():
+    i, s = mobject.integer, lambda value: mobject.String(value=value)
+    tests = [
+        ([(i(0), s("a")), (i(1), s("b"))], mobject.DenseStorage),
+        ([(i(1), s("a")), (i(0), s("b"))], mobject.NativeStorage),
+        ([(s("a"), i(1)), (s("b"), i(2))], mobject.NativeStorage),
+        ([(i(1), i(1)), (mobject.TRUE, i(2))], mobject.GeneralStorage),
+        ([(i(1), i(1)), (s("1"), i(2))], mobject.GeneralStorage),
+        ([], mobject.DenseStorage),
+    ]
+    for items, kind in tests:
+        storage = mobject.hash_storage(items)
+        assert type(storage) == kind, f"wrong storage for {items}. got {type(storage).__name__}, want {kind.__name__}"
+        assert list(storage.items()) == items, f"wrong items for {items}"
+        for key, value in items:
+            assert storage.get(key) == value, f"wrong value for {key}"
+
+    dense = mobject.hash_storage([(i(0), s("a")), (i(1), s("b")), (i(2), s("c"))])
+    assert dense.get(mobject.TRUE) is None and dense.get(s("0")) is None, "lookup by a key of another type should miss"
+    assert type(dense.set(i(3), s("d"))) == mobject.DenseStorage, "appending the next key should stay dense"
+    assert type(dense.remove(i(2))) == mobject.DenseStorage, "removing the last key should stay dense"
+    mixed = dense.set(s("x"), i(9))
+    assert type(mixed) == mobject.GeneralStorage and len(mixed) == 4 and mixed.get(s("x")) == i(9), "adding a string key to a dense hash is wrong"
+    sparse = dense.remove(i(1))
+    assert type(sparse) == mobject.NativeStorage and [k.value for k, _ in sparse.items()] == [0, 2], "removing a middle key is wrong"
+    assert len(dense) == 3 and dense.get(i(1)) == s("b"), "updates modified the original storage"
+
+def test_cached_string_hash():
+    string = mobject.String(value="hello")
+    assert string.hash_key == mobject.HashKey(mobject.STRING_OBJ, hash("hello")), "wrong hash key"
+    assert string.hash == hash("hello"), "string hash is not cached"
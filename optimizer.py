@@ -0,0 +1,119 @@
+import monkey_ast as ast
+import monkey_object as mobject
+from monkey_object import MonkeyObject, TRUE, FALSE
+from evaluator import eval_infix_expression, eval_prefix_expression
+
+from dataclasses import fields
+from typing import Dict, Callable
+
+# Optimization pass run between parsing and evaluation. Integer and string
+# literals are replaced by Constant nodes carrying a prebuilt object, and
+# operators whose operands are all constants are evaluated once and replaced
+# by a Constant too. Chains like `n - 1 - 2` are reassociated into `n - 3`
+# first. Array and hash literals are not folded, since arrays and hashes can
+# be modified in place and each evaluation must make a new one.
+#
+# Subtrees whose evaluation fails are left alone, so that the error is still
+# raised at run time.
+
+reassociable: Dict[str, str] = {
+    # (e op1 c1) op2 c2 == e op1 (c1 op c2), indexed by op1 + op2
+    "++": "+",
+    "+-": "-",
+    "--": "+",
+    "-+": "-",
+    "**": "*",
+}
+
+class Optimizer:
+    def __init__(self):
+        self.folded = 0
+
+        self.optimize_functions: Dict[type, Callable] = {
+            ast.IntegerLiteral: self.optimize_integer_literal,
+            ast.StringLiteral: self.optimize_string_literal,
+            ast.PrefixExpression: self.optimize_prefix_expression,
+            ast.InfixExpression: self.optimize_infix_expression,
+        }
+
+    def optimize_program(self, program: ast.Program) -> ast.Program:
+        program.statements = [self.optimize(statement) for statement in program.statements]
+        return program
+
+    def optimize(self, node: ast.Node) -> ast.Node:
+        # Returns the node to put in place of `node`.
+        if node is None:
+            return None
+        for f in fields(node):
+            value = getattr(node, f.name)
+            if isinstance(value, ast.Node):
+                setattr(node, f.name, self.optimize(value))
+            elif isinstance(value, list):
+                setattr(node, f.name, [self.optimize_item(item) for item in value])
+        optimize_function = self.optimize_functions.get(type(node))
+        if optimize_function is None:
+            return node
+        return optimize_function(node)
+
+    def optimize_item(self, item):
+        if isinstance(item, ast.Node):
+            return self.optimize(item)
+        elif isinstance(item, tuple):
+            return tuple(self.optimize(el) if isinstance(el, ast.Node) else el for el in item)
+        return item
+
+    def fold(self, node: ast.Expression, value: MonkeyObject) -> ast.Constant:
+        self.folded += 1
+        return ast.Constant(token=node.token, value=value, source=str(node))
+
+    def optimize_integer_literal(self, node: ast.IntegerLiteral) -> ast.Expression:
+        return ast.Constant(token=node.token, value=node.constant, source=str(node))
+
+    def optimize_string_literal(self, node: ast.StringLiteral) -> ast.Expression:
+        return ast.Constant(token=node.token, value=node.constant, source=str(node))
+
+    def optimize_prefix_expression(self, node: ast.PrefixExpression) -> ast.Expression:
+        right = constant_value(node.right)
+        if right is None:
+            return node
+        value = eval_prefix_expression(node.operator, right)
+        if value.typ == mobject.ERROR_OBJ:
+            return node
+        return self.fold(node, value)
+
+    def optimize_infix_expression(self, node: ast.InfixExpression) -> ast.Expression:
+        left = constant_value(node.left)
+        right = constant_value(node.right)
+        if left is not None and right is not None:
+            try:
+                value = eval_infix_expression(node.operator, left, right)
+            except ZeroDivisionError:
+                return node
+            if value.typ == mobject.ERROR_OBJ:
+                return node
+            return self.fold(node, value)
+        inner = node.left
+        if type(right) is mobject.Integer and type(inner) is ast.InfixExpression:
+            operator = reassociable.get(inner.operator + node.operator)
+            constant = constant_value(inner.right)
+            if operator is not None and type(constant) is mobject.Integer:
+                value = eval_infix_expression(operator, constant, right)
+                folded = ast.InfixExpression(
+                    token=node.token,
+                    left=inner.left,
+                    operator=inner.operator,
+                    right=ast.Constant(token=node.right.token, value=value, source=value.inspect),
+                )
+                self.folded += 1
+                return folded
+        return node
+
+def constant_value(node: ast.Expression) -> MonkeyObject:
+    if type(node) is ast.Constant:
+        return node.value
+    elif type(node) is ast.Boolean:
+        return TRUE if node.value else FALSE
+    return None
+
+def optimize(program: ast.Program) -> ast.Program:
+    return Optimizer().optimize_program(program)
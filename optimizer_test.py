@@ -0,0 +1,93 @@
+import lexer
+import parser
+import monkey_ast as ast
+import monkey_object as mobject
+import optimizer
+import evaluator
+import vm
+import closure_compiler
+
+def optimize_test(input: str):
+    program = parser.Parser(lexer.Lexer(input)).parse_program()
+    o = optimizer.Optimizer()
+    return o.optimize_program(program), o.folded
+
+def test_constant_folding():
+    tests = [
+        ("3 + 5*2", 13, 2),
+        ("-5", -5, 1),
+        ("!true", False, 1),
+        ("(1 < 2) == true", True, 2),
+        ('"a" + "b"', "ab", 1),
+        ("7", 7, 0),
+    ]
+
+    for input, expected, folded in tests:
+        program, n = optimize_test(input)
+        node = program.statements[0].expression
+        assert type(node) == ast.Constant, f"{input} not folded. got={type(node)}"
+        assert node.value.value == expected, f"{input} folded to wrong value. got={node.value.value}, want={expected}"
+        assert n == folded, f"wrong number of folded nodes for {input}. got={n}, want={folded}"
+        assert str(node) == str(parser.Parser(lexer.Lexer(input)).parse_program().statements[0].expression), f"folded node prints differently: {node}"
+
+def test_not_folded():
+    tests = [
+        ("1 + true", 0),
+        ("1 / 0", 0),
+        ("-true", 0),
+        ("x + 1", 0),
+        ("[x, 1]", 0),
+        ("{x: 1}", 0),
+        ("{[1]: 2}", 0),
+        ("[1, 2]", 0),
+        ('{"a": 1}', 0),
+    ]
+
+    for input, folded in tests:
+        program, n = optimize_test(input)
+        node = program.statements[0].expression
+        assert type(node) != ast.Constant, f"{input} should not be folded"
+        assert n == folded, f"wrong number of folded nodes for {input}. got={n}, want={folded}"
+
+def test_reassociation():
+    tests = [
+        ("n - 1 - 2", "(n-3)"),
+        ("n + 1 - 3", "(n+-2)"),
+        ("n - 1 + 3", "(n--2)"),
+        ("n * 2 * 3", "(n*6)"),
+        ("n / 2 / 3", "((n/2)/3)"),
+        ("n - i - 2", "((n-i)-2)"),
+    ]
+
+    for input, expected in tests:
+        program, _ = optimize_test(input)
+        assert str(program) == expected, f"wrong reassociation of {input}. got={program}, want={expected}"
+
+def test_literal_elements():
+    program, n = optimize_test('let digits = {0: "0", 1: "1"}; let a = [1, [2 + 3, "3"], true];')
+    digits, a = program.statements[0].value, program.statements[1].value
+    assert type(digits) == ast.HashLiteral and type(a) == ast.ArrayLiteral, "array and hash literals should not be folded"
+    for key, value in digits.pairs:
+        assert type(key) == ast.Constant and type(value) == ast.Constant, f"hash literal item not folded: {key}: {value}"
+    assert type(a.elements[0]) == ast.Constant, f"array element not folded: {a.elements[0]}"
+    assert type(a.elements[1].elements[0]) == ast.Constant, f"nested array element not folded: {a.elements[1].elements[0]}"
+    assert n == 1, f"wrong number of folded nodes. got={n}, want=1"
+
+def test_engines_agree():
+    inputs = [
+        "let f = fn(n){ n - 1 - 2 }; f(10);",
+        'let h = {"one": 1, 2: [3, 4]}; h["one"] + h[2][1];',
+        "let f = fn(){ [1, 2, 3] }; len(f()) + len(f());",
+        "let f = fn(){ let a = [1, 2]; a[0] = a[0] + 10; a[0] }; f() + f();",
+        "let x = 2; if (1 < 2) { x * (3 + 4) } else { 0 };",
+        'let f = fn(n){ n - 1 - 2 }; f("a");',
+        "10 / (5 - 5 + 2) + -(2 * 3);",
+        "let i = 0; while (i < 10 - 5) { i = i + 2 * 1 }; i;",
+    ]
+    runs = [evaluator.eval, vm.run, closure_compiler.run]
+
+    for input in inputs:
+        for run in runs:
+            plain = run(parser.Parser(lexer.Lexer(input)).parse_program(), mobject.Environment())
+            optimized = run(optimize_test(input)[0], mobject.Environment())
+            assert plain == optimized, f"optimized program gives a different result for {input} in {run.__module__}. got={optimized.inspect}, want={plain.inspect}"
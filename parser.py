@@ -1,6 +1,7 @@
 import tokens
 import lexer
 import monkey_ast as ast
+import monkey_object as mobject
 from typing import List, Dict, Callable
 
 
@@ -25,7 +26,8 @@ precedences = {
     tokens.SLASH: PRODUCT,
     tokens.ASTERISK: PRODUCT,
     tokens.LPAREN: CALL,
-    tokens.LBRACKET: INDEX
+    tokens.LBRACKET: INDEX,
+    tokens.DOT: INDEX,
 }
 
 class Parser:
@@ -51,6 +53,7 @@ class Parser:
             tokens.LBRACE: self.parse_hash_literal,
             tokens.FOR: self.parse_for_expression,
             tokens.WHILE: self.parse_while_expression,
+            tokens.RECORD: self.parse_record_literal,
         }
         self.infix_parse_functions: Dict[tokens.TokenType, Callable] = {
             tokens.PLUS: self.parse_infix_expression,
@@ -63,6 +66,7 @@ class Parser:
             tokens.GT: self.parse_infix_expression,
             tokens.LPAREN: self.parse_call_expression,
             tokens.LBRACKET: self.parse_index_expression,
+            tokens.DOT: self.parse_field_expression,
             tokens.ASSIGN: self.parse_assign_expression,
         }
 
@@ -111,6 +115,10 @@ class Parser:
         self.next_token()
         statement.value = self.parse_expression(LOWEST)
 
+        # A record type is named after the variable it is declared as.
+        if type(statement.value) == ast.RecordLiteral:
+            statement.value.constant.name = statement.name.value
+
         if self.peek_token_is(tokens.SEMICOLON):
             self.next_token()
 
@@ -176,6 +184,7 @@ class Parser:
             self.errors.append(str(e))
             return None
         lit.value = value
+        lit.constant = mobject.integer(value)
         return lit
 
     def parse_boolean(self) -> ast.Expression:
@@ -187,7 +196,8 @@ class Parser:
     def parse_string_literal(self) -> ast.Expression:
         return ast.StringLiteral(
             token=self.cur_token,
-            value=self.cur_token.literal
+            value=self.cur_token.literal,
+            constant=mobject.String(value=self.cur_token.literal)
         )
 
     def parse_array_literal(self) -> ast.Expression:
@@ -355,6 +365,23 @@ class Parser:
         
         return identifiers
 
+    def parse_record_literal(self) -> ast.Expression:
+        lit = ast.RecordLiteral(token=self.cur_token)
+
+        if not self.expect_peek(tokens.LPAREN):
+            return None
+
+        parameters = self.parse_function_parameters()
+        if parameters is None:
+            return None
+        lit.fields = [param.value for param in parameters]
+        for i, name in enumerate(lit.fields):
+            if name in lit.fields[:i]:
+                self.errors.append(f"duplicate field {name} in record")
+                return None
+        lit.constant = mobject.RecordType(fields=tuple(lit.fields))
+        return lit
+
     def parse_call_expression(self, function: ast.Expression) -> ast.Expression:
         exp = ast.CallExpression(
             token=self.cur_token,
@@ -374,6 +401,16 @@ class Parser:
             return None
         return exp
 
+    def parse_field_expression(self, left: ast.Expression) -> ast.Expression:
+        exp = ast.FieldExpression(
+            token=self.cur_token,
+            left=left
+        )
+        if not self.expect_peek(tokens.IDENT):
+            return None
+        exp.name = self.cur_token.literal
+        return exp
+
     def parse_expression_list(self, end: tokens.TokenType) -> List[ast.Expression]:
         args: List[ast.Expression] = []
 
@@ -1,5 +1,6 @@
 import lexer
 import monkey_ast as ast
+import monkey_object as mobject
 import parser
 from typing import Any, Dict, List, Tuple
 
@@ -116,6 +117,7 @@ def test_integer_literal_expression():
     literal = statement.expression
     assert isinstance(literal, ast.IntegerLiteral), f"expression is not an IntegerLiteral. got {type(literal)}"
     assert literal.value == 5, f"literal.value not 5. got {literal.value}"
+    assert literal.constant == mobject.Integer(value=5), f"literal.constant not 5. got {literal.constant}"
     assert literal.token_literal == "5", f"literal.token_literal not '5'. got {literal.token_literal}"
 
 def test_boolean_expression():
@@ -304,6 +306,14 @@ def test_operator_precedence_parsing():
         [
             "x*a=2",
             "((x*a)=2)"
+        ],
+        [
+            "-p.x * q.y[1]",
+            "((-(p.x))*((q.y)[1]))"
+        ],
+        [
+            "f(a).b.c",
+            "((f(a).b).c)"
         ]
     ]
 
@@ -434,6 +444,7 @@ def test_string_literal_expression():
     check_expression(literal, ast.StringLiteral)
 
     assert literal.value == "Hello world", f"literal.value not 'Hello world'. got {literal.value}"
+    assert literal.constant == mobject.String(value="Hello world"), f"literal.constant not 'Hello world'. got {literal.constant}"
 
 def test_parsing_array_literals():
     input = "[1, 2*2, 3+3]"
@@ -575,6 +586,31 @@ def test_parsing_while_expression():
     exp: ast.InfixExpression = statement.expression
     infix_expression_test(exp, "x", "+", 3)
 
+def test_parsing_record_literal():
+    input = "let Point = record(x, y);"
+    program = get_program(input, 1)
+
+    statement = program.statements[0]
+    let_statement_test(statement, "Point")
+
+    lit = statement.value
+    check_expression(lit, ast.RecordLiteral)
+    assert lit.fields == ["x", "y"], f"wrong fields. got {lit.fields}"
+    record_type = lit.constant
+    assert type(record_type) == mobject.RecordType, f"constant is not RecordType. got {type(record_type)}"
+    assert record_type.name == "Point", f"record type has the wrong name. got {record_type.name}"
+    assert record_type.offsets == {"x": 0, "y": 1}, f"wrong offsets. got {record_type.offsets}"
+
+    p = parser.Parser(lexer.Lexer("record(a, b, a)"))
+    p.parse_program()
+    assert p.errors == ["duplicate field a in record"], f"wrong parser errors. got {p.errors}"
+
+def test_parsing_field_expression():
+    field = get_expression("point.x", 1, ast.FieldExpression)
+
+    identifier_test(field.left, "point")
+    assert field.name == "x", f"field name is not x. got {field.name}"
+
 def check_block_statement(block: ast.BlockStatement, n_statements: int):
     assert isinstance(block, ast.BlockStatement), f"Not a block statement. got {type(block)}"
     assert len(block.statements) == n_statements, f"Incorrect number of statements. got {len(block.statements)}, want {n_statements}"
\ No newline at end of file
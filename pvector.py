@@ -0,0 +1,172 @@
+from typing import Iterable, Iterator, Tuple
+
+# A persistent vector: a bit-partitioned trie of 32-wide tuples, like
+# Clojure's PersistentVector. append and set copy one path from the root to a
+# leaf and share everything else with the old version, so old versions stay
+# valid and both are O(log32 n). The last, partially filled leaf is kept
+# apart as the tail, which makes most appends a single tuple copy.
+#
+# A vector can also be a view of the elements start..end of a trie, so
+# `rest` and `slice` share the trie of the original without copying
+# anything. Appending to a view that stops short of the end of its trie sets
+# the element after the view instead, which leaves the original untouched.
+# The hidden elements stay reachable as long as the view is.
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+class Vector:
+    __slots__ = ("count", "shift", "root", "tail", "start", "end")
+
+    def __init__(self, count: int = 0, shift: int = BITS, root: Tuple = (), tail: Tuple = (), start: int = 0, end: int = None):
+        # count is the number of elements in the trie and tail, hidden ones
+        # included.
+        self.count = count
+        self.shift = shift
+        self.root = root
+        self.tail = tail
+        self.start = start
+        self.end = count if end is None else end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def leaf_for(self, i: int) -> Tuple:
+        if i >= self.count - len(self.tail):
+            return self.tail
+        node = self.root
+        for level in range(self.shift, 0, -BITS):
+            node = node[(i >> level) & MASK]
+        return node
+
+    def __getitem__(self, index):
+        if type(index) is slice:
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("vector index out of range")
+        i = index + self.start
+        return self.leaf_for(i)[i & MASK]
+
+    def get(self, index: int):
+        # __getitem__ without the checks, for an index known to be in
+        # 0..len-1.
+        i = index + self.start
+        tail_offset = self.count - len(self.tail)
+        if i >= tail_offset:
+            return self.tail[i - tail_offset]
+        node = self.root
+        for level in range(self.shift, 0, -BITS):
+            node = node[(i >> level) & MASK]
+        return node[i & MASK]
+
+    def __iter__(self) -> Iterator:
+        tail_offset = self.count - len(self.tail)
+        i = self.start
+        end = self.end
+        while i < tail_offset and i < end:
+            leaf = self.leaf_for(i)
+            j = i & MASK
+            k = min(WIDTH, j + end - i)
+            yield from (leaf if j == 0 and k == WIDTH else leaf[j:k])
+            i += k - j
+        if i < end:
+            yield from self.tail[i - tail_offset:end - tail_offset]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Vector, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Vector({list(self)!r})"
+
+    def append(self, value) -> "Vector":
+        count = self.count
+        if self.end < count:
+            vector = self.raw_set(self.end, value)
+            vector.end += 1
+            return vector
+        if len(self.tail) < WIDTH:
+            return Vector(count + 1, self.shift, self.root, self.tail + (value,), self.start)
+        shift = self.shift
+        if (count >> BITS) > (1 << shift):
+            root = (self.root, new_path(shift, self.tail))
+            shift += BITS
+        else:
+            root = push_tail(count, shift, self.root, self.tail)
+        return Vector(count + 1, shift, root, (value,), self.start)
+
+    def set(self, index: int, value) -> "Vector":
+        if index < 0 or index >= len(self):
+            raise IndexError("vector index out of range")
+        return self.raw_set(index + self.start, value)
+
+    def raw_set(self, i: int, value) -> "Vector":
+        # Sets the element i of the trie, counting hidden elements.
+        tail_offset = self.count - len(self.tail)
+        if i >= tail_offset:
+            j = i - tail_offset
+            tail = self.tail[:j] + (value,) + self.tail[j+1:]
+            return Vector(self.count, self.shift, self.root, tail, self.start, self.end)
+        return Vector(self.count, self.shift, assoc(self.shift, self.root, i, value), self.tail, self.start, self.end)
+
+    def rest(self) -> "Vector":
+        if len(self) == 0:
+            return self
+        return Vector(self.count, self.shift, self.root, self.tail, self.start + 1, self.end)
+
+    def slice(self, low: int, high: int) -> "Vector":
+        # Python slice bounds: negative ones count from the end, and both
+        # are clamped to the vector.
+        low, high, _ = slice(low, high).indices(len(self))
+        high = max(low, high)
+        return Vector(self.count, self.shift, self.root, self.tail, self.start + low, self.start + high)
+
+def new_path(level: int, node: Tuple) -> Tuple:
+    while level > 0:
+        node = (node,)
+        level -= BITS
+    return node
+
+def push_tail(count: int, level: int, parent: Tuple, tail: Tuple) -> Tuple:
+    # Puts a full tail into the trie as its new last leaf.
+    subidx = ((count - 1) >> level) & MASK
+    if level == BITS:
+        child = tail
+    elif subidx < len(parent):
+        child = push_tail(count, level - BITS, parent[subidx], tail)
+    else:
+        child = new_path(level - BITS, tail)
+    if subidx < len(parent):
+        return parent[:subidx] + (child,) + parent[subidx+1:]
+    return parent + (child,)
+
+def assoc(level: int, node: Tuple, i: int, value) -> Tuple:
+    if level == 0:
+        j = i & MASK
+        return node[:j] + (value,) + node[j+1:]
+    j = (i >> level) & MASK
+    return node[:j] + (assoc(level - BITS, node[j], i, value),) + node[j+1:]
+
+EMPTY = Vector()
+
+def vector(values: Iterable = ()) -> Vector:
+    # Builds the trie bottom-up instead of appending one element at a time.
+    if isinstance(values, Vector):
+        return values
+    values = list(values)
+    count = len(values)
+    if count <= WIDTH:
+        return Vector(count, BITS, (), tuple(values))
+    tail_offset = ((count - 1) >> BITS) << BITS
+    nodes = [tuple(values[i:i+WIDTH]) for i in range(0, tail_offset, WIDTH)]
+    shift = BITS
+    while len(nodes) > WIDTH:
+        nodes = [tuple(nodes[i:i+WIDTH]) for i in range(0, len(nodes), WIDTH)]
+        shift += BITS
+    return Vector(count, shift, tuple(nodes), tuple(values[tail_offset:]))
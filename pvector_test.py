@@ -0,0 +1,59 @@
+import pvector
+
+def test_append():
+    for n in [0, 1, 31, 32, 33, 64, 1024, 1056, 1057, 40000]:
+        v = pvector.EMPTY
+        for i in range(n):
+            v = v.append(i)
+        assert len(v) == n, f"wrong length. got {len(v)}, want {n}"
+        assert list(v) == list(range(n)), f"wrong elements for n={n}"
+        assert all(v[i] == i for i in range(n)), f"wrong indexed read for n={n}"
+        assert pvector.vector(range(n)) == v, f"vector() differs from appends for n={n}"
+
+def test_append_to_built_vector():
+    for n in [32, 33, 1024, 1056, 1057, 33000]:
+        v = pvector.vector(range(n))
+        for i in range(n, n + 100):
+            v = v.append(i)
+        assert list(v) == list(range(n + 100)), f"wrong elements after appending to vector of {n}"
+
+def test_persistence():
+    v1 = pvector.vector(range(100))
+    v2 = v1.append(100)
+    v3 = v1.set(5, "x")
+    v4 = v1.set(99, "y")
+    assert list(v1) == list(range(100)), "original vector was modified"
+    assert v2[100] == 100 and len(v1) == 100, "append modified the original"
+    assert v3[5] == "x" and v1[5] == 5, "set in the trie modified the original"
+    assert v4[99] == "y" and v1[99] == 99, "set in the tail modified the original"
+
+def test_rest():
+    v = pvector.vector(range(70))
+    for i in range(70):
+        assert list(v) == list(range(i, 70)), f"wrong elements after {i} rests"
+        assert v[0] == i and v[-1] == 69, f"wrong first/last after {i} rests"
+        v = v.rest()
+    assert len(v) == 0 and len(v.rest()) == 0, "rest of an empty vector should be empty"
+    v = pvector.vector(range(40)).rest().append(40).set(0, "x")
+    assert list(v) == ["x"] + list(range(2, 41)), "append/set after rest is wrong"
+
+def test_slice():
+    values = list(range(100))
+    v = pvector.vector(values)
+    tests = [(0, 100), (10, 20), (30, 70), (-5, 100), (0, -1), (50, 10), (98, 200), (-200, 3)]
+    for low, high in tests:
+        s = v.slice(low, high)
+        assert list(s) == values[low:high], f"wrong elements for slice({low}, {high})"
+        assert len(s) == len(values[low:high]), f"wrong length for slice({low}, {high})"
+        assert list(s.slice(1, -1)) == values[low:high][1:-1], f"wrong slice of slice({low}, {high})"
+        if s:
+            assert s[0] == values[low:high][0] and s[-1] == values[low:high][-1], f"wrong first/last for slice({low}, {high})"
+
+def test_append_to_slice():
+    v = pvector.vector(range(100))
+    s = v.slice(10, 20).append("x")
+    assert list(s) == list(range(10, 20)) + ["x"], "append to a slice is wrong"
+    assert list(v) == list(range(100)), "append to a slice modified the original"
+    s = v.slice(90, 95).append("y").append("z")
+    assert list(s) == [90, 91, 92, 93, 94, "y", "z"], "append to a slice in the tail is wrong"
+    assert list(v) == list(range(100)), "append to a slice modified the original"
@@ -9,7 +9,7 @@ import readline
 
 PROMPT = ">>"
 
-def start(env=None):
+def start(env=None, run=evaluator.eval):
     if env is None:
         env = mobject.Environment()
     while True:
@@ -26,7 +26,7 @@ def start(env=None):
             print_parser_errors(p.errors)
             continue
 
-        evaluated = evaluator.eval(program, env)
+        evaluated = run(program, env)
         if evaluated is not None:
             print(evaluated.inspect)
 
@@ -0,0 +1,183 @@
+import monkey_ast as ast
+import monkey_object as mobject
+from monkey_builtins import builtins
+
+from typing import List, Dict, Callable, Set
+
+# Static scope resolution. Function bodies and loop bodies get a new scope at
+# run time (see evaluator.apply_function, eval_for_expression and
+# eval_while_expression); variables declared in those scopes are given a slot
+# index so that the evaluator can fetch them from Environment.slots instead
+# of hashing names up the environment chain. The global scope stays
+# name-based, since the repl keeps adding to it between programs.
+#
+# The let statements of a scope are collected before its body is resolved so
+# that closures can refer to variables declared later in the same scope.
+# When a slot is read before its let statement has run, the evaluator falls
+# back to the enclosing bindings, like a name-based lookup would.
+#
+# Names that are neither local nor global anywhere in the program are bound
+# directly to their builtin.
+#
+# `return f(...)` statements inside a function body are marked as tail calls,
+# which apply_function runs without growing the Python stack. Return
+# statements in tail position of a function body are marked too: their value
+# is the value of the body, so they need not unwind with a ReturnSignal.
+
+class Scope:
+    def __init__(self, outer: "Scope" = None):
+        self.outer = outer
+        self.names: Dict[str, int] = {}
+        self.size = 0
+
+    def declare(self, name: str) -> int:
+        slot = self.names.get(name)
+        if slot is None:
+            slot = self.add(name)
+        return slot
+
+    def add(self, name: str) -> int:
+        slot = self.size
+        self.names[name] = slot
+        self.size += 1
+        return slot
+
+class Resolver:
+    def __init__(self, env: mobject.Environment = None):
+        self.env = env
+        # None is the global scope.
+        self.scope: Scope = None
+        self.globals: Set[str] = set()
+        self.function_depth = 0
+
+        self.resolve_functions: Dict[type, Callable] = {
+            ast.Identifier: self.resolve_identifier,
+            ast.LetStatement: self.resolve_let_statement,
+            ast.AssignExpression: self.resolve_assign_expression,
+            ast.FunctionLiteral: self.resolve_function_literal,
+            ast.ForExpression: self.resolve_for_expression,
+            ast.WhileExpression: self.resolve_while_expression,
+            ast.ReturnStatement: self.resolve_return_statement,
+        }
+
+    def resolve_program(self, program: ast.Program) -> ast.Program:
+        for statement in program.statements:
+            self.collect_declarations(statement, self.globals)
+        for statement in program.statements:
+            self.resolve(statement)
+        return program
+
+    def collect_declarations(self, node: ast.Node, names: Set[str]):
+        # Collects the let statements that belong to the current scope, not
+        # descending into nodes that open a new scope.
+        if node is None:
+            return
+        typ = type(node)
+        if typ == ast.LetStatement:
+            names.add(node.name.value)
+            self.collect_declarations(node.value, names)
+        elif typ == ast.FunctionLiteral:
+            return
+        elif typ == ast.ForExpression:
+            self.collect_declarations(node.iterator, names)
+        elif typ == ast.WhileExpression:
+            self.collect_declarations(node.condition, names)
+        else:
+            for child in ast.children(node):
+                self.collect_declarations(child, names)
+
+    def resolve(self, node: ast.Node):
+        if node is None:
+            return
+        resolve_function = self.resolve_functions.get(type(node))
+        if resolve_function is not None:
+            resolve_function(node)
+            return
+        for child in ast.children(node):
+            self.resolve(child)
+
+    def resolve_scope_body(self, body: ast.BlockStatement, scope: Scope):
+        outer = self.scope
+        self.scope = scope
+        names: Set[str] = set()
+        self.collect_declarations(body, names)
+        for name in sorted(names):
+            scope.declare(name)
+        self.resolve(body)
+        self.scope = outer
+        if body is not None:
+            body.scope_size = scope.size
+
+    def resolve_identifier(self, node: ast.Identifier):
+        name = node.value
+        bindings = []
+        depth = 0
+        scope = self.scope
+        while scope is not None:
+            slot = scope.names.get(name)
+            if slot is not None:
+                bindings.append((depth, slot))
+            scope = scope.outer
+            depth += 1
+        node.global_depth = depth
+        node.builtin = None
+        if bindings:
+            node.depth, node.slot = bindings[0]
+            node.fallback = tuple(bindings[1:])
+            return
+        node.depth = depth
+        node.slot = None
+        node.fallback = ()
+        if name not in self.globals and name in builtins and (self.env is None or self.env.get(name) is None):
+            node.builtin = builtins[name]
+
+    def resolve_let_statement(self, node: ast.LetStatement):
+        self.resolve(node.value)
+        if self.scope is None:
+            node.slot = None
+        else:
+            node.slot = self.scope.declare(node.name.value)
+
+    def resolve_assign_expression(self, node: ast.AssignExpression):
+        self.resolve(node.value)
+        if type(node.name) == ast.Identifier:
+            self.resolve_identifier(node.name)
+            node.name.builtin = None
+        else:
+            self.resolve(node.name)
+
+    def resolve_function_literal(self, node: ast.FunctionLiteral):
+        scope = Scope(self.scope)
+        for param in node.parameters:
+            param.slot = scope.add(param.value)
+        self.function_depth += 1
+        self.resolve_scope_body(node.body, scope)
+        self.function_depth -= 1
+        self.mark_tail_returns(node.body)
+
+    def mark_tail_returns(self, block: ast.BlockStatement):
+        if block is None or not block.statements:
+            return
+        last = block.statements[-1]
+        if type(last) == ast.ReturnStatement:
+            last.tail = True
+        elif type(last) == ast.ExpressionStatement and type(last.expression) == ast.IfExpression:
+            self.mark_tail_returns(last.expression.consequence)
+            self.mark_tail_returns(last.expression.alternative)
+
+    def resolve_return_statement(self, node: ast.ReturnStatement):
+        self.resolve(node.return_value)
+        node.tail_call = self.function_depth > 0 and type(node.return_value) == ast.CallExpression
+
+    def resolve_for_expression(self, node: ast.ForExpression):
+        self.resolve(node.iterator)
+        scope = Scope(self.scope)
+        node.element.slot = scope.add(node.element.value)
+        self.resolve_scope_body(node.body, scope)
+
+    def resolve_while_expression(self, node: ast.WhileExpression):
+        self.resolve(node.condition)
+        self.resolve_scope_body(node.body, Scope(self.scope))
+
+def resolve(program: ast.Program, env: mobject.Environment = None) -> ast.Program:
+    return Resolver(env).resolve_program(program)
@@ -0,0 +1,65 @@
+import lexer
+import parser
+import resolver
+import monkey_ast as ast
+import monkey_object as mobject
+from monkey_builtins import builtins
+from evaluator_test import eval_test, integer_object_test, error_test
+
+def parse(input: str) -> ast.Program:
+    l = lexer.Lexer(input)
+    p = parser.Parser(l)
+    return p.parse_program()
+
+def test_resolve_locals():
+    program = resolver.resolve(parse("let g = 1; let f = fn(a, b){ let c = a; fn(){ c + g + len(b) } };"))
+    assert program.statements[0].slot is None, "global let should not have a slot"
+
+    fn: ast.FunctionLiteral = program.statements[1].value
+    assert [p.slot for p in fn.parameters] == [0, 1], f"wrong parameter slots. got {[p.slot for p in fn.parameters]}"
+    assert fn.body.scope_size == 3, f"wrong scope size. got {fn.body.scope_size}"
+    let_c: ast.LetStatement = fn.body.statements[0]
+    assert let_c.slot == 2, f"wrong slot for c. got {let_c.slot}"
+    assert (let_c.value.depth, let_c.value.slot) == (0, 0), "a should resolve to slot 0 of the current scope"
+
+    inner: ast.FunctionLiteral = fn.body.statements[1].expression
+    infix = inner.body.statements[0].expression
+    c, g, call = infix.left.left, infix.left.right, infix.right
+    assert (c.depth, c.slot) == (1, 2), f"c should resolve to (1, 2). got {(c.depth, c.slot)}"
+    assert (g.slot, g.global_depth, g.builtin) == (None, 2, None), "g should be looked up in the global scope"
+    assert call.function.builtin is builtins["len"], "len should be bound to the builtin"
+    assert (call.arguments[0].depth, call.arguments[0].slot) == (1, 1), "b should resolve to (1, 1)"
+
+def test_builtins_shadowed_by_globals():
+    program = resolver.resolve(parse("fn(){ len }; let len = 3;"))
+    ident = program.statements[0].expression.body.statements[0].expression
+    assert ident.builtin is None, "len is redefined as a global and must not be bound to the builtin"
+
+    env = mobject.Environment()
+    env.set("push", mobject.Integer(value=1))
+    program = resolver.resolve(parse("fn(){ push };"), env)
+    ident = program.statements[0].expression.body.statements[0].expression
+    assert ident.builtin is None, "push is defined in the environment and must not be bound to the builtin"
+
+def test_scoping_semantics():
+    tests = [
+        ("let x = 1; let f = fn(){ let y = x; let x = 2; y + x }; f();", 3),
+        ("let f = fn(){ let g = fn(){ h() }; let h = fn(){ 5 }; g() }; f();", 5),
+        ("let x = 1; for(i in range(3)){ let x = 10; x = x + i; }; x;", 1),
+        ("let f = fn(x, x){ x }; f(1, 2);", 2),
+        ("let f = fn(n){ let t = 0; for(i in range(n)){ let j = 0; while(j < i){ t = t + 1; j = j + 1; } }; t }; f(4);", 6),
+        ("let a = 3; let f = fn(){ a = a + 1; }; f(); f(); a;", 5),
+        ("let len = fn(x){ 42 }; len([1]);", 42),
+    ]
+
+    for input, expected in tests:
+        integer_object_test(eval_test(input), expected)
+
+def test_scoping_errors():
+    tests = [
+        ("let f = fn(){ y = 2; }; f();", "variable 'y' does not exist. Can't reassign"),
+        ("let f = fn(){ let a = b; let b = 1; }; f();", "identifier not found: b"),
+    ]
+
+    for input, expected in tests:
+        error_test(eval_test(input), expected)
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 class TokenType(str):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     typ: TokenType = None
     literal: str = None
@@ -30,6 +30,7 @@ EQ = "=="
 NOT_EQ = "!="
 
 COMMA = ","
+DOT = "."
 SEMICOLON = ";"
 COLON = ":"
 
@@ -52,6 +53,7 @@ IN = "IN"
 WHILE = "WHILE"
 BREAK = "BREAK"
 CONTINUE = "CONTINUE"
+RECORD = "RECORD"
 
 
 token_ch_dict = {
@@ -61,6 +63,7 @@ token_ch_dict = {
     "(": Token(LPAREN, "("),
     ")": Token(RPAREN, ")"),
     ",": Token(COMMA, ","),
+    ".": Token(DOT, "."),
     "+": Token(PLUS, "+"),
     "{": Token(LBRACE, "{"),
     "}": Token(RBRACE, "}"),
@@ -93,6 +96,7 @@ token_alpha_dict = {
     "while": Token(WHILE, "while"),
     "break": Token(BREAK, "break"),
     "continue": Token(CONTINUE, "continue"),
+    "record": Token(RECORD, "record"),
 }
 
 peeking = {
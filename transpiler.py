@@ -0,0 +1,708 @@
+import click
+import os
+import re
+
+import monkey_object as mobject
+from monkey_object import MonkeyObject, NULL, TRUE, FALSE
+import monkey_ast as ast
+from monkey_builtins import builtins
+import resolver
+import optimizer
+import repl
+from lexer import Lexer
+from parser import Parser
+from evaluator_utils import new_error, check, stack_overflow_error, ErrorSignal
+from evaluator import eval_infix_expression, eval_prefix_expression, eval_index_expression, eval_index_assignment
+from evaluator import eval_field_expression, new_record
+from evaluator import arithmetic_operators, comparison_operators
+
+from dataclasses import dataclass
+from typing import List, Dict, Callable, Set, Tuple, Iterable
+
+# Ahead-of-time translation of a Monkey program into a Python module.
+#
+# The program becomes a `main` function and every Monkey function a nested
+# Python function, so Monkey variables are Python locals and closures are
+# Python closures. Variables are renamed per scope (`v_x` for globals,
+# `v3_x` for the variables of scope 3), assignments to variables of an
+# enclosing function are declared nonlocal. if, for and while use Python
+# control flow; when they are used as values, the branches assign to a
+# temporary.
+#
+# Values stay monkey_object values and operators go through the helpers
+# below, which share the evaluator's semantics and error messages. Errors
+# travel as ErrorSignal, like in the evaluator, and `return f(...)` inside a
+# function returns a TailCall that `call` runs without growing the stack.
+#
+# Each iteration of a Monkey loop has its own scope, while a Python closure
+# would see the variable of the last iteration. So the variables of a loop
+# body that closures use are held in a Cell made per iteration, which the
+# functions defined in the body receive as default arguments.
+#
+# A variable may be read before its let statement has run: the let comes
+# later in the scope, or sits in only one branch of an if. Like the
+# resolver's fallback bindings, such a read falls back to the enclosing
+# bindings, then to the builtin: the variable starts out UNSET at the top of
+# its scope and the read checks each binding in turn.
+
+RETURN = "return"
+UNSET = object()
+# The directory of the interpreter modules, which generated modules import
+# their runtime from. MONKEY_PATH overrides it when the module runs.
+RUNTIME_PATH = os.path.dirname(os.path.abspath(__file__))
+
+OPERATOR_NAMES: Dict[str, str] = {
+    "+": "add",
+    "-": "sub",
+    "*": "mul",
+    "/": "div",
+    "<": "lt",
+    ">": "gt",
+    "==": "eq",
+    "!=": "ne",
+}
+
+@dataclass
+class Function(mobject.Function):
+    code: Callable
+    parameter_names: List[str]
+    source: str
+
+    @property
+    def inspect(self) -> str:
+        return self.source
+
+def function(code: Callable, parameter_names: List[str], source: str) -> Function:
+    return Function(parameters=None, body=None, env=None, code=code, parameter_names=parameter_names, source=source)
+
+def call(fn: MonkeyObject, *args: MonkeyObject) -> MonkeyObject:
+    while True:
+        if type(fn) is Function:
+            names = fn.parameter_names
+            if len(names) > len(args):
+                raise ErrorSignal(new_error("function call missing required arguments: {}", ', '.join(names[len(args):])))
+            result = fn.code(*args)
+            if type(result) is not mobject.TailCall:
+                return result
+            fn, args = result.fn, result.args
+        elif type(fn) is mobject.Builtin:
+            return check(fn.fn(*args))
+        elif type(fn) is mobject.RecordType:
+            return check(new_record(fn, args))
+        else:
+            raise ErrorSignal(new_error("not a function: {}", fn.typ))
+
+def infix_operation(operator: str) -> Callable[[MonkeyObject, MonkeyObject], MonkeyObject]:
+    if operator in arithmetic_operators:
+        native = arithmetic_operators[operator]
+        def arithmetic(left: MonkeyObject, right: MonkeyObject) -> MonkeyObject:
+            if type(left) is mobject.Integer and type(right) is mobject.Integer:
+                return mobject.integer(native(left.value, right.value))
+            return check(eval_infix_expression(operator, left, right))
+        return arithmetic
+    native = comparison_operators[operator]
+    def comparison(left: MonkeyObject, right: MonkeyObject) -> MonkeyObject:
+        if type(left) is mobject.Integer and type(right) is mobject.Integer:
+            return TRUE if native(left.value, right.value) else FALSE
+        return check(eval_infix_expression(operator, left, right))
+    return comparison
+
+def minus(right: MonkeyObject) -> MonkeyObject:
+    if type(right) is mobject.Integer:
+        return mobject.integer(-right.value)
+    return check(eval_prefix_expression("-", right))
+
+def index(left: MonkeyObject, idx: MonkeyObject) -> MonkeyObject:
+    return check(eval_index_expression(left, idx))
+
+def set_index(left: MonkeyObject, idx: MonkeyObject, value: MonkeyObject) -> MonkeyObject:
+    return check(eval_index_assignment(left, idx, value))
+
+def field(record: MonkeyObject, name: str) -> MonkeyObject:
+    return check(eval_field_expression(record, name))
+
+def hash_literal(*items: MonkeyObject) -> mobject.Hash:
+    for key in items[::2]:
+        if not isinstance(key, mobject.Hashable):
+            raise ErrorSignal(new_error("unusable as hash key: {}", key.typ))
+    return mobject.Hash(storage=mobject.hash_storage(zip(items[::2], items[1::2])))
+
+def elements(iterator: MonkeyObject) -> Iterable[MonkeyObject]:
+    elements = iterator.iterate()
+    if elements is None:
+        raise ErrorSignal(new_error("cannot iterate over {}", iterator.typ))
+    return elements
+
+class Cell:
+    # A variable of a loop body that closures use.
+    __slots__ = ("value",)
+
+    def __init__(self, value: MonkeyObject):
+        self.value = value
+
+    def set(self, value: MonkeyObject) -> MonkeyObject:
+        self.value = value
+        return value
+
+def error(message: str, *values: MonkeyObject):
+    # Operands are evaluated before the error is raised, like in the evaluator.
+    raise ErrorSignal(new_error(message))
+
+def execute(main: Callable[[], MonkeyObject]) -> MonkeyObject:
+    try:
+        return main()
+    except ErrorSignal as e:
+        return e.error
+    except RecursionError:
+        return stack_overflow_error()
+
+def print_result(evaluated: MonkeyObject):
+    if evaluated is not None and evaluated is not NULL:
+        print(evaluated.inspect)
+
+class Scope:
+    def __init__(self, names: Dict[str, str], function: "FunctionContext", loop: bool):
+        self.names = names
+        self.function = function
+        self.loop = loop
+        # Variables whose let statement has run at the point being compiled.
+        self.assigned: Set[str] = set()
+        # Variables that are checked for UNSET, and where the scope's code
+        # starts.
+        self.unset: Set[str] = set()
+        self.start = 0
+        self.indent = 1
+        # Variables held in a Cell, in loop scopes.
+        self.cells: Set[str] = set()
+
+class FunctionContext:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.indent = 1
+        self.nonlocals: Set[str] = set()
+        # Value target of each enclosing loop, None when the value is unused.
+        self.loops: List[str] = []
+
+    def emit(self, line: str):
+        self.lines.append("    "*self.indent + line)
+
+class Transpiler:
+    def __init__(self):
+        self.errors: List[str] = []
+        self.resolver = resolver.Resolver()
+        self.scopes: List[Scope] = []
+        self.function: FunctionContext = None
+        # Python source of each hoisted constant -> its name
+        self.constants: Dict[str, str] = {}
+        self.builtins: Set[str] = set()
+        self.counter = 0
+
+        self.compile_functions: Dict[type, Callable] = {
+            ast.IntegerLiteral: self.compile_integer_literal,
+            ast.StringLiteral: self.compile_string_literal,
+            ast.Constant: self.compile_constant,
+            ast.Boolean: self.compile_boolean,
+            ast.Identifier: self.compile_identifier,
+            ast.PrefixExpression: self.compile_prefix_expression,
+            ast.InfixExpression: self.compile_infix_expression,
+            ast.AssignExpression: self.compile_assign_expression,
+            ast.IfExpression: self.compile_control_expression,
+            ast.ForExpression: self.compile_control_expression,
+            ast.WhileExpression: self.compile_control_expression,
+            ast.FunctionLiteral: self.compile_function_literal,
+            ast.CallExpression: self.compile_call_expression,
+            ast.ArrayLiteral: self.compile_array_literal,
+            ast.IndexExpression: self.compile_index_expression,
+            ast.HashLiteral: self.compile_hash_literal,
+            ast.RecordLiteral: self.compile_record_literal,
+            ast.FieldExpression: self.compile_field_expression,
+        }
+
+    def transpile(self, program: ast.Program, source_name: str = "<program>", runtime_path: str = RUNTIME_PATH) -> str:
+        self.resolver.resolve_program(program)
+        self.function = FunctionContext()
+        self.scopes.append(Scope({name: f"v_{name}" for name in self.resolver.globals}, self.function, loop=False))
+        self.compile_block(program.statements, RETURN, empty=None)
+        self.initialize_unset(self.scopes[-1])
+        main = self.function
+
+        lines = [
+            f"# Generated by `monkey build` from {source_name}.",
+            "import os",
+            "import sys",
+            "",
+            f"RUNTIME_PATH = os.environ.get(\"MONKEY_PATH\", {runtime_path!r})",
+            "if RUNTIME_PATH not in sys.path:",
+            "    sys.path.insert(0, RUNTIME_PATH)",
+            "",
+            "from monkey_object import NULL, TRUE, FALSE, integer, String, Array, TailCall, RecordType",
+            "from monkey_builtins import builtins",
+            "from evaluator import eval_bang_operator_expression as bang, is_truthy as truthy",
+            "from transpiler import UNSET, Cell, function, call, check, infix_operation, minus, index, set_index, field, hash_literal, elements, error, execute, print_result",
+            "",
+        ]
+        for operator, name in OPERATOR_NAMES.items():
+            lines.append(f"{name} = infix_operation({operator!r})")
+        for name in sorted(self.builtins):
+            lines.append(f"B_{name} = builtins[{name!r}]")
+        for source, name in self.constants.items():
+            lines.append(f"{name} = {source}")
+        lines.extend(["", "def main():"])
+        lines.extend(main.lines)
+        lines.extend([
+            "",
+            "def run():",
+            "    return execute(main)",
+            "",
+            "if __name__ == \"__main__\":",
+            "    print_result(run())",
+            "",
+        ])
+        return "\n".join(lines)
+
+    def temp(self, prefix: str = "_t") -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, line: str):
+        self.function.emit(line)
+
+    def store(self, target: str, expr: str):
+        if target is None:
+            self.emit(expr)
+        elif target == RETURN:
+            self.emit(f"return {expr}")
+        else:
+            self.emit(f"{target} = {expr}")
+
+    def indented(self, compile: Callable[[], None]):
+        # Compiles a Python block, which cannot be empty.
+        self.function.indent += 1
+        n = len(self.function.lines)
+        compile()
+        if len(self.function.lines) == n:
+            self.emit("pass")
+        self.function.indent -= 1
+
+    def new_scope(self, names: Set[str], loop: bool) -> Scope:
+        self.counter += 1
+        return Scope({name: f"v{self.counter}_{name}" for name in sorted(names)}, self.function, loop)
+
+    def lookup(self, name: str) -> str:
+        bindings = self.bindings(name, first=True)
+        if not bindings:
+            return None
+        return bindings[0][0]
+
+    def bindings(self, name: str, first: bool = False) -> List[Tuple[str, Scope]]:
+        # The Python names bound to the variable, innermost first, up to the
+        # first one that is known to be assigned.
+        bindings = []
+        for scope in reversed(self.scopes):
+            pyname = scope.names.get(name)
+            if pyname is not None:
+                bindings.append((pyname, scope))
+                if first or name in scope.assigned:
+                    break
+        return bindings
+
+    def unset_check(self, name: str, bindings: List[Tuple[str, Scope]], value: Callable[[str, Scope], str], missing: str) -> str:
+        # The value of the first binding that is not UNSET, `missing` when
+        # there is none.
+        bindings = list(bindings)
+        if bindings and name in bindings[-1][1].assigned:
+            missing = value(*bindings.pop())
+        if not bindings:
+            return missing
+        checks = []
+        for pyname, scope in bindings:
+            scope.unset.add(name)
+            checks.append(f"{value(pyname, scope)} if {self.variable(name, pyname, scope)} is not UNSET else ")
+        return f"({''.join(checks)}{missing})"
+
+    def initialize_unset(self, scope: Scope):
+        # Cells are made UNSET at the start of each iteration anyway.
+        unset = sorted(scope.unset - scope.cells)
+        self.function.lines[scope.start:scope.start] = ["    "*scope.indent + f"{scope.names[name]} = UNSET" for name in unset]
+
+    def variable(self, name: str, pyname: str, scope: Scope) -> str:
+        # The Python expression of a variable, which can also be assigned to.
+        if name in scope.cells:
+            return f"{pyname}.value"
+        return pyname
+
+    def compile_block(self, statements: List[ast.Statement], target: str, empty: str = "NULL"):
+        if not statements:
+            if target is not None:
+                self.store(target, empty)
+            return
+        for statement in statements[:-1]:
+            self.compile_statement(statement, None)
+        self.compile_statement(statements[-1], target)
+
+    def compile_statement(self, statement: ast.Statement, target: str):
+        typ = type(statement)
+        if typ == ast.ExpressionStatement:
+            self.compile_value(statement.expression, target)
+        elif typ == ast.LetStatement:
+            name = statement.name.value
+            if type(statement.value) == ast.FunctionLiteral:
+                # The function cannot run before it is bound.
+                self.scopes[-1].assigned.add(name)
+            value = self.compile_expression(statement.value)
+            self.emit(f"{self.variable(name, self.lookup(name), self.scopes[-1])} = {value}")
+            self.scopes[-1].assigned.add(name)
+            if target is not None:
+                self.store(target, "None")
+        elif typ == ast.ReturnStatement:
+            self.compile_return_statement(statement)
+        elif typ in (ast.BreakStatement, ast.ContinueStatement):
+            keyword = "break" if typ == ast.BreakStatement else "continue"
+            if not self.function.loops:
+                self.errors.append(f"{keyword} cannot be used outside of a loop")
+                return
+            loop_target = self.function.loops[-1]
+            if loop_target is not None:
+                self.emit(f"{loop_target} = NULL")
+            self.emit(keyword)
+
+    def compile_return_statement(self, statement: ast.ReturnStatement):
+        node = statement.return_value
+        if node is None:
+            self.emit("return NULL")
+        elif statement.tail_call:
+            function, *args = self.compile_operands([node.function] + node.arguments)
+            if function.startswith("B_"):
+                self.emit(f"return check({function}.fn({', '.join(args)}))")
+            else:
+                self.emit(f"return TailCall(fn={function}, args=[{', '.join(args)}])")
+        else:
+            self.emit(f"return {self.compile_expression(node)}")
+
+    def compile_value(self, node: ast.Expression, target: str):
+        typ = type(node)
+        if typ == ast.IfExpression:
+            condition = self.compile_condition(node.condition)
+            # A variable is assigned after the if when both branches assign it.
+            scope = self.scopes[-1]
+            assigned = set(scope.assigned)
+            self.emit(f"if {condition}:")
+            self.indented(lambda: self.compile_block(node.consequence.statements, target))
+            consequence, scope.assigned = scope.assigned, set(assigned)
+            if node.alternative is not None:
+                self.emit("else:")
+                self.indented(lambda: self.compile_block(node.alternative.statements, target))
+                assigned |= consequence & scope.assigned
+            elif target is not None:
+                self.emit("else:")
+                self.indented(lambda: self.store(target, "NULL"))
+            scope.assigned = assigned
+        elif typ in (ast.ForExpression, ast.WhileExpression):
+            loop_target = target
+            if target == RETURN:
+                loop_target = self.temp()
+            if loop_target is not None:
+                self.emit(f"{loop_target} = NULL")
+            if typ == ast.ForExpression:
+                self.compile_for_expression(node, loop_target)
+            else:
+                self.compile_while_expression(node, loop_target)
+            if target == RETURN:
+                self.emit(f"return {loop_target}")
+        elif typ == ast.AssignExpression and target is None and type(node.name) == ast.Identifier and self.assigned_binding(node.name.value) is not None:
+            name = node.name.value
+            pyname, scope = self.assigned_binding(name)
+            value = self.compile_expression(node.value)
+            self.emit(f"{self.assignment_target(name, pyname, scope)} = {value}")
+        elif typ in (ast.IntegerLiteral, ast.StringLiteral, ast.Boolean, ast.Constant, ast.FunctionLiteral, ast.RecordLiteral) and target is None:
+            return
+        else:
+            self.store(target, self.compile_expression(node))
+
+    def loop_scope(self, names: Set[str], body: ast.BlockStatement) -> Scope:
+        scope = self.new_scope(names, loop=True)
+        used: Set[str] = set()
+        closure_names(body, used)
+        scope.cells = names & used
+        return scope
+
+    def compile_loop_body(self, body: ast.BlockStatement, target: str, element: Tuple[str, str] = None):
+        # element is the name of the element of a for loop and the Python
+        # variable holding it, when it is in a cell.
+        scope = self.scopes[-1]
+        for name in sorted(scope.cells):
+            value = element[1] if element is not None and name == element[0] else "UNSET"
+            self.emit(f"{scope.names[name]} = Cell({value})")
+        scope.start, scope.indent = len(self.function.lines), self.function.indent
+        self.function.loops.append(target)
+        self.compile_block(body.statements if body is not None else [], target)
+        self.function.loops.pop()
+        self.initialize_unset(scope)
+        self.scopes.pop()
+
+    def compile_for_expression(self, node: ast.ForExpression, target: str):
+        iterator = self.compile_expression(node.iterator)
+        name = node.element.value
+        names: Set[str] = {name}
+        self.resolver.collect_declarations(node.body, names)
+        scope = self.loop_scope(names, node.body)
+        scope.assigned.add(name)
+        self.scopes.append(scope)
+        if name in scope.cells:
+            element = (name, self.temp())
+            self.emit(f"for {element[1]} in elements({iterator}):")
+            self.indented(lambda: self.compile_loop_body(node.body, target, element))
+            return
+        self.emit(f"for {scope.names[name]} in elements({iterator}):")
+        self.indented(lambda: self.compile_loop_body(node.body, target))
+
+    def compile_while_expression(self, node: ast.WhileExpression, target: str):
+        names: Set[str] = set()
+        self.resolver.collect_declarations(node.body, names)
+        if not needs_statements(node.condition):
+            self.emit(f"while {self.compile_condition(node.condition)}:")
+            self.scopes.append(self.loop_scope(names, node.body))
+            self.indented(lambda: self.compile_loop_body(node.body, target))
+            return
+        def body():
+            self.emit(f"if not ({self.compile_condition(node.condition)}):")
+            self.indented(lambda: self.emit("break"))
+            self.scopes.append(self.loop_scope(names, node.body))
+            self.compile_loop_body(node.body, target)
+        self.emit("while True:")
+        self.indented(body)
+
+    def compile_condition(self, node: ast.Expression) -> str:
+        typ = type(node)
+        if typ == ast.Boolean:
+            return "True" if node.value else "False"
+        if typ == ast.InfixExpression and node.operator in comparison_operators or typ == ast.PrefixExpression and node.operator == "!":
+            # These always evaluate to TRUE or FALSE.
+            return f"{self.compile_expression(node)} is TRUE"
+        return f"truthy({self.compile_expression(node)})"
+
+    def compile_expression(self, node: ast.Expression) -> str:
+        if node is None:
+            return "NULL"
+        compile_function = self.compile_functions.get(type(node))
+        if compile_function is None:
+            return "NULL"
+        return compile_function(node)
+
+    def compile_operands(self, nodes: List[ast.Expression]) -> List[str]:
+        # Operands are evaluated left to right: when a later operand needs
+        # statements of its own, the earlier ones are saved first.
+        exprs = []
+        for i, node in enumerate(nodes):
+            expr = self.compile_expression(node)
+            if type(node) not in (ast.IntegerLiteral, ast.StringLiteral, ast.Boolean, ast.Constant) and any(needs_statements(n) for n in nodes[i+1:]):
+                tmp = self.temp()
+                self.emit(f"{tmp} = {expr}")
+                expr = tmp
+            exprs.append(expr)
+        return exprs
+
+    def constant(self, source: str) -> str:
+        name = self.constants.get(source)
+        if name is None:
+            name = self.constants[source] = f"C{len(self.constants)}"
+        return name
+
+    def compile_integer_literal(self, node: ast.IntegerLiteral) -> str:
+        return self.constant(f"integer({node.value!r})")
+
+    def compile_string_literal(self, node: ast.StringLiteral) -> str:
+        return self.constant(f"String(value={node.value!r})")
+
+    def compile_constant(self, node: ast.Constant) -> str:
+        source = constant_source(node.value)
+        if type(node.value) in (mobject.Boolean, mobject.Null):
+            return source
+        return self.constant(source)
+
+    def compile_boolean(self, node: ast.Boolean) -> str:
+        return "TRUE" if node.value else "FALSE"
+
+    def compile_identifier(self, node: ast.Identifier) -> str:
+        name = node.value
+        bindings = self.bindings(name)
+        if bindings and name in bindings[-1][1].assigned:
+            missing = None
+        elif name in builtins:
+            self.builtins.add(name)
+            missing = f"B_{name}"
+        else:
+            missing = f"error({'identifier not found: ' + name!r})"
+        return self.unset_check(name, bindings, lambda pyname, scope: self.variable(name, pyname, scope), missing)
+
+    def compile_prefix_expression(self, node: ast.PrefixExpression) -> str:
+        right = self.compile_expression(node.right)
+        if node.operator == "-":
+            return f"minus({right})"
+        return f"bang({right})"
+
+    def compile_infix_expression(self, node: ast.InfixExpression) -> str:
+        left, right = self.compile_operands([node.left, node.right])
+        return f"{OPERATOR_NAMES[node.operator]}({left}, {right})"
+
+    def assignment_target(self, name: str, pyname: str, scope: Scope) -> str:
+        if name in scope.cells:
+            return f"{pyname}.value"
+        if scope.function is not self.function:
+            self.function.nonlocals.add(pyname)
+        return pyname
+
+    def assignment(self, name: str, pyname: str, scope: Scope, value: str) -> str:
+        # An assignment expression.
+        if name in scope.cells:
+            return f"{pyname}.set({value})"
+        return f"({self.assignment_target(name, pyname, scope)} := {value})"
+
+    def assigned_binding(self, name: str) -> Tuple[str, Scope]:
+        bindings = self.bindings(name, first=True)
+        if bindings and name in bindings[0][1].assigned:
+            return bindings[0]
+        return None
+
+    def compile_assign_expression(self, node: ast.AssignExpression) -> str:
+        if type(node.name) == ast.IndexExpression:
+            left, idx, value = self.compile_operands([node.name.left, node.name.index, node.value])
+            return f"set_index({left}, {idx}, {value})"
+        if type(node.name) != ast.Identifier:
+            return f"error({'invalid assignment target: ' + str(node.name)!r})"
+        value = self.compile_expression(node.value)
+        name = node.name.value
+        binding = self.assigned_binding(name)
+        if binding is not None:
+            return self.assignment(name, *binding, value)
+        # The value is assigned to the first binding that is not UNSET.
+        tmp = self.temp()
+        message = f"variable '{name}' does not exist. Can't reassign"
+        check = self.unset_check(name, self.bindings(name), lambda pyname, scope: self.assignment(name, pyname, scope, tmp), f"error({message!r}, {tmp})")
+        return f"({tmp} := {value}, {check})[1]"
+
+    def compile_control_expression(self, node: ast.Expression) -> str:
+        tmp = self.temp()
+        self.compile_value(node, tmp)
+        return tmp
+
+    def compile_function_literal(self, node: ast.FunctionLiteral) -> str:
+        # The cells of the enclosing loop bodies, bound when the function is
+        # defined.
+        cells = [scope.names[name] for scope in self.scopes if scope.function is self.function for name in sorted(scope.cells)]
+        names: Set[str] = {param.value for param in node.parameters}
+        self.resolver.collect_declarations(node.body, names)
+        outer = self.function
+        self.function = FunctionContext()
+        scope = self.new_scope(names, loop=False)
+        scope.assigned.update(param.value for param in node.parameters)
+        self.scopes.append(scope)
+        params = [scope.names[param.value] for param in node.parameters]
+        # Only the last of several parameters with the same name is bound.
+        params = [p if p not in params[i+1:] else f"_p{i}" for i, p in enumerate(params)]
+        self.compile_block(node.body.statements if node.body is not None else [], RETURN)
+        self.initialize_unset(scope)
+        self.scopes.pop()
+        inner, self.function = self.function, outer
+
+        name = self.temp("_f")
+        self.emit(f"def {name}({''.join(p + ', ' for p in params)}*_{''.join(f', {cell}={cell}' for cell in cells)}):")
+        if inner.nonlocals:
+            self.emit(f"    nonlocal {', '.join(sorted(inner.nonlocals))}")
+        indent = "    "*self.function.indent
+        self.function.lines.extend(indent + line for line in inner.lines)
+        parameter_names = [param.value for param in node.parameters]
+        return f"function({name}, {parameter_names!r}, {str(node)!r})"
+
+    def compile_call_expression(self, node: ast.CallExpression) -> str:
+        function, *args = self.compile_operands([node.function] + node.arguments)
+        if function.startswith("B_"):
+            return f"check({function}.fn({', '.join(args)}))"
+        return f"call({''.join([function] + [', ' + arg for arg in args])})"
+
+    def compile_array_literal(self, node: ast.ArrayLiteral) -> str:
+        return f"Array(elements=[{', '.join(self.compile_operands(node.elements))}])"
+
+    def compile_index_expression(self, node: ast.IndexExpression) -> str:
+        left, idx = self.compile_operands([node.left, node.index])
+        return f"index({left}, {idx})"
+
+    def compile_hash_literal(self, node: ast.HashLiteral) -> str:
+        items = self.compile_operands([n for pair in node.pairs for n in pair])
+        return f"hash_literal({', '.join(items)})"
+
+    def compile_record_literal(self, node: ast.RecordLiteral) -> str:
+        record_type = node.constant
+        return self.constant(f"RecordType({record_type.fields!r}, {record_type.name!r})")
+
+    def compile_field_expression(self, node: ast.FieldExpression) -> str:
+        return f"field({self.compile_expression(node.left)}, {node.name!r})"
+
+def constant_source(value: MonkeyObject) -> str:
+    # Python source building a constant folded by the optimizer.
+    typ = type(value)
+    if typ is mobject.Integer:
+        return f"integer({value.value!r})"
+    elif typ is mobject.String:
+        return f"String(value={value.value!r})"
+    elif typ is mobject.Boolean:
+        return "TRUE" if value.value else "FALSE"
+    return "NULL"
+
+def closure_names(node: ast.Node, names: Set[str], nested: bool = False):
+    # Collects the names used inside the function literals within node.
+    if node is None:
+        return
+    typ = type(node)
+    if typ == ast.FunctionLiteral:
+        nested = True
+    elif typ == ast.Identifier and nested:
+        names.add(node.value)
+    for child in ast.children(node):
+        closure_names(child, names, nested)
+
+def needs_statements(node: ast.Node) -> bool:
+    # Whether compiling the expression emits statements that evaluate part
+    # of it. Function literals only emit a def.
+    typ = type(node)
+    if typ in (ast.IfExpression, ast.ForExpression, ast.WhileExpression):
+        return True
+    if typ == ast.FunctionLiteral or node is None:
+        return False
+    return any(needs_statements(child) for child in ast.children(node))
+
+def transpile(program: ast.Program, source_name: str = "<program>", runtime_path: str = RUNTIME_PATH) -> Tuple[str, List[str]]:
+    t = Transpiler()
+    source = t.transpile(program, source_name, runtime_path)
+    return source, t.errors
+
+@click.command()
+@click.argument("file")
+@click.option("-o", "--output", help="Path of the generated module. Defaults to <file>_mky.py.")
+@click.option("--no-opt", is_flag=True, help="Skip constant folding.")
+@click.option("--runtime-path", default=RUNTIME_PATH, help="Directory the generated module imports the interpreter from. Defaults to the directory of this script.")
+def main(file, output=None, no_opt=False, runtime_path=RUNTIME_PATH):
+    with open(file, "r") as f:
+        program_str = f.read()
+
+    p = Parser(Lexer(program_str))
+    program = p.parse_program()
+    if len(p.errors) != 0:
+        repl.print_parser_errors(p.errors)
+        exit(1)
+
+    if not no_opt:
+        program = optimizer.optimize(program)
+    source, errors = transpile(program, file, runtime_path)
+    if len(errors) != 0:
+        for err in errors:
+            print(f"ERROR: {err}")
+        exit(1)
+
+    if output is None:
+        output = re.sub(r"\.mky$", "", file) + "_mky.py"
+    with open(output, "w") as f:
+        f.write(source)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import monkey_object as mobject
+from monkey_object import MonkeyObject, NULL, TRUE, FALSE
+import monkey_ast as ast
+from monkey_builtins import builtins
+from evaluator_utils import new_error, check, stack_overflow_error, ReturnSignal, BreakSignal, ContinueSignal, ErrorSignal
+from evaluator import arithmetic_operators, comparison_operators
+from evaluator import eval_infix_expression, eval_prefix_expression, eval_index_expression, eval_index_assignment
+from evaluator import eval_field_expression, new_record
+from closure_compiler import ClosureCompiler, ClosureFunction, Code
+
+from typing import List, Dict
+
+# A closure compiler over unboxed values: Monkey integers, strings, booleans
+# and null are Python int, str, bool and None. Arrays, hashes and functions
+# stay monkey_object values and keep boxed contents, so they are shared with
+# the builtins and the other engines; values are boxed when they are stored
+# in a container or passed to a builtin, and unboxed when they come out.
+#
+# Since null is None, the result of a builtin that produces no value, like
+# puts, is unboxed to the NO_VALUE sentinel instead: it is not null, and the
+# REPL prints nothing for it. A variable holding it is not found, like in the
+# evaluator, so names are looked up with NO_VALUE as the default instead of
+# relying on Environment.get.
+
+NO_VALUE = object()
+
+def box(value) -> MonkeyObject:
+    typ = type(value)
+    if typ is int:
+        return mobject.integer(value)
+    elif typ is str:
+        return mobject.String(value=value)
+    elif typ is bool:
+        return TRUE if value else FALSE
+    elif value is None:
+        return NULL
+    elif value is NO_VALUE:
+        return None
+    return value
+
+def unbox(obj: MonkeyObject):
+    typ = type(obj)
+    if typ is mobject.Integer or typ is mobject.String or typ is mobject.Boolean:
+        return obj.value
+    elif obj is NULL:
+        return None
+    elif obj is None:
+        return NO_VALUE
+    return obj
+
+class UnboxedCompiler(ClosureCompiler):
+    def compile_statements(self, statements: List[ast.Statement], tail: bool = False) -> Code:
+        if not statements:
+            return lambda env: None
+        return super().compile_statements(statements, tail=tail)
+
+    def compile_integer_literal(self, node: ast.IntegerLiteral) -> Code:
+        value = node.value
+        return lambda env: value
+
+    def compile_string_literal(self, node: ast.StringLiteral) -> Code:
+        value = node.value
+        return lambda env: value
+
+    def compile_constant(self, node: ast.Constant) -> Code:
+        value = unbox(node.value)
+        return lambda env: value
+
+    def compile_boolean(self, node: ast.Boolean) -> Code:
+        value = node.value
+        return lambda env: value
+
+    def compile_identifier(self, node: ast.Identifier) -> Code:
+        name = node.value
+        def identifier(env):
+            e = env
+            while e is not None:
+                val = e.store.get(name, NO_VALUE)
+                if val is not NO_VALUE:
+                    return val
+                e = e.outer
+            val = builtins.get(name)
+            if val is None:
+                raise ErrorSignal(new_error("identifier not found: {}", name))
+            return val
+        return identifier
+
+    def compile_prefix_expression(self, node: ast.PrefixExpression) -> Code:
+        right = self.compile_node(node.right)
+        if node.operator == "!":
+            def bang(env):
+                value = right(env)
+                return value is False or value is None
+            return bang
+        elif node.operator == "-":
+            def minus(env):
+                value = right(env)
+                if type(value) is int:
+                    return -value
+                return unbox(check(eval_prefix_expression("-", box(value))))
+            return minus
+        op = node.operator
+        return lambda env: unbox(check(eval_prefix_expression(op, box(right(env)))))
+
+    def compile_infix_expression(self, node: ast.InfixExpression) -> Code:
+        left = self.compile_node(node.left)
+        right = self.compile_node(node.right)
+        op = node.operator
+        if op == "+":
+            def add(env):
+                l = left(env)
+                r = right(env)
+                if (type(l) is int and type(r) is int) or (type(l) is str and type(r) is str):
+                    return l + r
+                return infix(op, l, r)
+            return add
+        elif op in arithmetic_operators or op in comparison_operators:
+            native = arithmetic_operators.get(op) or comparison_operators[op]
+            def integer_operation(env):
+                l = left(env)
+                r = right(env)
+                if type(l) is int and type(r) is int:
+                    return native(l, r)
+                return infix(op, l, r)
+            return integer_operation
+        return lambda env: infix(op, left(env), right(env))
+
+    def compile_assign_expression(self, node: ast.AssignExpression) -> Code:
+        if type(node.name) == ast.IndexExpression:
+            left = self.compile_node(node.name.left)
+            index = self.compile_node(node.name.index)
+            value = self.compile_node(node.value)
+            def assign_index(env):
+                l = box(left(env))
+                i = box(index(env))
+                return unbox(check(eval_index_assignment(l, i, box(value(env)))))
+            return assign_index
+        if type(node.name) != ast.Identifier:
+            self.errors.append(f"invalid assignment target: {node.name}")
+            return lambda env: None
+        name = node.name.value
+        value = self.compile_node(node.value)
+        def assign(env):
+            val = value(env)
+            e = env
+            while e is not None:
+                if name in e.store:
+                    e.store[name] = val
+                    return val
+                e = e.outer
+            raise ErrorSignal(new_error("variable '{}' does not exist. Can't reassign", name))
+        return assign
+
+    def compile_if_expression(self, node: ast.IfExpression, tail: bool = False) -> Code:
+        condition = self.compile_node(node.condition)
+        consequence = self.compile_block_statement(node.consequence, tail=tail)
+        if node.alternative is not None:
+            alternative = self.compile_block_statement(node.alternative, tail=tail)
+        else:
+            alternative = lambda env: None
+        def if_(env):
+            c = condition(env)
+            if c is not None and c is not False:
+                return consequence(env)
+            return alternative(env)
+        return if_
+
+    def compile_while_expression(self, node: ast.WhileExpression) -> Code:
+        condition = self.compile_node(node.condition)
+        body, loop = self.compile_loop_body(node.body)
+        Environment = mobject.Environment
+        if not (loop.has_break or loop.has_continue):
+            def while_(env):
+                result = None
+                while True:
+                    c = condition(env)
+                    if c is None or c is False:
+                        return result
+                    result = body(Environment(outer=env))
+            return while_
+        def while_with_exits(env):
+            result = None
+            while True:
+                c = condition(env)
+                if c is None or c is False:
+                    return result
+                try:
+                    result = body(Environment(outer=env))
+                except ContinueSignal:
+                    result = None
+                except BreakSignal:
+                    return None
+        return while_with_exits
+
+    def compile_for_expression(self, node: ast.ForExpression) -> Code:
+        iterator = self.compile_node(node.iterator)
+        name = node.element.value
+        body, loop = self.compile_loop_body(node.body)
+        Environment = mobject.Environment
+        def elements(env):
+            it = box(iterator(env))
+            elements = it.iterate()
+            if elements is None:
+                raise ErrorSignal(new_error("cannot iterate over {}", it.typ))
+            return elements
+        if not (loop.has_break or loop.has_continue):
+            def for_(env):
+                result = None
+                for value in elements(env):
+                    result = body(Environment(store={name: unbox(value)}, outer=env))
+                return result
+            return for_
+        def for_with_exits(env):
+            result = None
+            for value in elements(env):
+                try:
+                    result = body(Environment(store={name: unbox(value)}, outer=env))
+                except ContinueSignal:
+                    result = None
+                except BreakSignal:
+                    return None
+            return result
+        return for_with_exits
+
+    def compile_call_expression(self, node: ast.CallExpression) -> Code:
+        function = self.compile_node(node.function)
+        arguments = [self.compile_node(arg) for arg in node.arguments]
+        def call(env):
+            fn = function(env)
+            return apply_function(fn, [arg(env) for arg in arguments])
+        return call
+
+    def compile_array_literal(self, node: ast.ArrayLiteral) -> Code:
+        elements = [self.compile_node(element) for element in node.elements]
+        return lambda env: mobject.Array(elements=[box(element(env)) for element in elements])
+
+    def compile_index_expression(self, node: ast.IndexExpression) -> Code:
+        left = self.compile_node(node.left)
+        index = self.compile_node(node.index)
+        def index_(env):
+            l = left(env)
+            i = index(env)
+            if type(l) is mobject.Array and type(i) is int:
+                vector = l.vector
+                if 0 <= i < len(vector):
+                    return unbox(vector.get(i))
+                return None
+            return unbox(check(eval_index_expression(box(l), box(i))))
+        return index_
+
+    def compile_hash_literal(self, node: ast.HashLiteral) -> Code:
+        pairs = [(self.compile_node(k), self.compile_node(v)) for k, v in node.pairs]
+        def hash_literal(env):
+            items = []
+            for key_code, value_code in pairs:
+                key = box(key_code(env))
+                if not isinstance(key, mobject.Hashable):
+                    raise ErrorSignal(new_error("unusable as hash key: {}", key.typ))
+                items.append((key, box(value_code(env))))
+            return mobject.Hash(storage=mobject.hash_storage(items))
+        return hash_literal
+
+    def compile_field_expression(self, node: ast.FieldExpression) -> Code:
+        left = self.compile_node(node.left)
+        name = node.name
+        cache = [None, 0]
+        def field(env):
+            record = left(env)
+            if type(record) is mobject.Record and record.record_type is cache[0]:
+                return unbox(record.values[cache[1]])
+            value = check(eval_field_expression(box(record), name))
+            cache[0] = record.record_type
+            cache[1] = record.record_type.offsets[name]
+            return unbox(value)
+        return field
+
+def infix(operator: str, left, right):
+    # Every case without a fast path, including errors, goes through the
+    # evaluator on boxed operands.
+    return unbox(check(eval_infix_expression(operator, box(left), box(right))))
+
+def apply_function(fn, args: List) -> object:
+    while True:
+        if type(fn) is ClosureFunction:
+            names = fn.parameter_names
+            if len(names) > len(args):
+                raise ErrorSignal(new_error("function call missing required arguments: {}", ', '.join(names[len(args):])))
+            try:
+                result = fn.code(mobject.Environment(store=dict(zip(names, args)), outer=fn.env))
+            except ReturnSignal as r:
+                result = r.value
+            if type(result) is not mobject.TailCall:
+                return result
+            fn, args = result.fn, result.args
+        elif type(fn) is mobject.Builtin:
+            return unbox(check(fn.fn(*[box(arg) for arg in args])))
+        elif type(fn) is mobject.RecordType:
+            return check(new_record(fn, [box(arg) for arg in args]))
+        else:
+            raise ErrorSignal(new_error("not a function: {}", box(fn).typ))
+
+def run(program: ast.Program, env: mobject.Environment) -> MonkeyObject:
+    c = UnboxedCompiler()
+    code = c.compile_program(program)
+    if len(c.errors) != 0:
+        return new_error(c.errors[0])
+    try:
+        result = code(env)
+    except ReturnSignal as r:
+        result = r.value
+    except ErrorSignal as e:
+        return e.error
+    except RecursionError:
+        return stack_overflow_error()
+    if program.statements and type(program.statements[-1]) == ast.LetStatement:
+        return None
+    return box(result)
@@ -0,0 +1,252 @@
+import monkey_object as mobject
+from monkey_object import MonkeyObject, NULL, TRUE, FALSE
+import monkey_ast as ast
+from monkey_builtins import builtins
+from evaluator_utils import new_error
+from evaluator import integer_operations as evaluator_integer_operations
+from evaluator import eval_infix_expression, eval_prefix_expression, eval_index_expression, eval_index_assignment, eval_bang_operator_expression, is_truthy
+from evaluator import eval_field_expression, new_record
+from compiler import (
+    Compiler, Bytecode, infix_opcodes,
+    OP_CONSTANT, OP_POP, OP_NULL, OP_NONE, OP_TRUE, OP_FALSE, OP_ADD, OP_SUB,
+    OP_MUL, OP_DIV, OP_EQUAL, OP_NOT_EQUAL, OP_GREATER_THAN, OP_LESS_THAN,
+    OP_MINUS, OP_BANG, OP_JUMP, OP_JUMP_NOT_TRUTHY, OP_GET_NAME, OP_SET_NAME,
+    OP_ASSIGN_NAME, OP_ARRAY, OP_HASH, OP_INDEX, OP_CLOSURE, OP_CALL,
+    OP_RETURN_VALUE, OP_PUSH_SCOPE, OP_POP_SCOPE, OP_SETUP_LOOP, OP_SETUP_FOR,
+    OP_POP_BLOCK, OP_GET_ITER, OP_FOR_ITER, OP_BREAK, OP_CONTINUE, OP_HALT,
+    OP_SET_INDEX, OP_GET_FIELD,
+)
+
+from dataclasses import dataclass
+from typing import List, Dict, Callable, Tuple
+
+operators: Dict[int, str] = {op: operator for operator, op in infix_opcodes.items()}
+
+integer_operations: Dict[int, Callable] = {op: evaluator_integer_operations[operator] for operator, op in infix_opcodes.items()}
+
+# Monkey calls push a Frame on the VM's own frame list instead of recursing in
+# Python, so the call depth is only bounded by this budget.
+DEFAULT_MAX_FRAMES = 100000
+
+@dataclass
+class Frame:
+    instructions: List[int]
+    constants: List[object]
+    ip: int
+    stack: List[MonkeyObject]
+    env: mobject.Environment
+    blocks: List[Tuple]
+
+class VM:
+    def __init__(self, bytecode: Bytecode, env: mobject.Environment, max_frames: int = DEFAULT_MAX_FRAMES):
+        self.bytecode = bytecode
+        self.env = env
+        self.max_frames = max_frames
+
+    def run(self) -> MonkeyObject:
+        Integer = mobject.Integer
+        Error = mobject.Error
+        Closure = mobject.Closure
+        Builtin = mobject.Builtin
+        Environment = mobject.Environment
+        max_frames = self.max_frames
+
+        frames: List[Frame] = []
+        ins = self.bytecode.instructions
+        constants = self.bytecode.constants
+        ip = 0
+        stack: List[MonkeyObject] = []
+        env = self.env
+        # Loop blocks: (break_address, continue_address, base_height, continue_height, env)
+        blocks: List[Tuple] = []
+
+        while True:
+            op = ins[ip]
+            ip += 1
+            if op == OP_GET_NAME:
+                name = constants[ins[ip]]
+                ip += 1
+                e = env
+                while True:
+                    val = e.store.get(name)
+                    if val is not None:
+                        break
+                    e = e.outer
+                    if e is None:
+                        val = builtins.get(name)
+                        if val is None:
+                            return new_error("identifier not found: {}", name)
+                        break
+                stack.append(val)
+            elif op == OP_CONSTANT:
+                stack.append(constants[ins[ip]])
+                ip += 1
+            elif OP_ADD <= op <= OP_LESS_THAN:
+                right = stack.pop()
+                left = stack[-1]
+                if type(left) is Integer and type(right) is Integer:
+                    stack[-1] = integer_operations[op](left.value, right.value)
+                else:
+                    result = eval_infix_expression(operators[op], left, right)
+                    if type(result) is Error:
+                        return result
+                    stack[-1] = result
+            elif op == OP_JUMP_NOT_TRUTHY:
+                if is_truthy(stack.pop()):
+                    ip += 1
+                else:
+                    ip = ins[ip]
+            elif op == OP_ASSIGN_NAME:
+                name = constants[ins[ip]]
+                ip += 1
+                if env.reset(name, stack[-1]) is None:
+                    return new_error("variable '{}' does not exist. Can't reassign", name)
+            elif op == OP_SET_NAME:
+                env.store[constants[ins[ip]]] = stack.pop()
+                ip += 1
+            elif op == OP_POP:
+                stack.pop()
+            elif op == OP_JUMP:
+                ip = ins[ip]
+            elif op == OP_CALL:
+                n = ins[ip]
+                ip += 1
+                fn = stack[-n-1]
+                args = stack[len(stack)-n:]
+                del stack[-n-1:]
+                if type(fn) is Closure:
+                    compiled = fn.fn
+                    names = compiled.parameter_names
+                    if len(names) > n:
+                        return new_error("function call missing required arguments: {}", ', '.join(names[n:]))
+                    if len(frames) >= max_frames:
+                        return new_error("stack overflow: more than {} nested calls", max_frames)
+                    frames.append(Frame(ins, constants, ip, stack, env, blocks))
+                    ins = compiled.instructions
+                    constants = compiled.constants
+                    ip = 0
+                    stack = []
+                    env = Environment(store=dict(zip(names, args)), outer=fn.env)
+                    blocks = []
+                elif type(fn) is Builtin:
+                    result = fn.fn(*args)
+                    if type(result) is Error:
+                        return result
+                    stack.append(result)
+                elif type(fn) is mobject.RecordType:
+                    result = new_record(fn, args)
+                    if type(result) is Error:
+                        return result
+                    stack.append(result)
+                else:
+                    return new_error("not a function: {}", fn.typ)
+            elif op == OP_RETURN_VALUE:
+                result = stack.pop()
+                if not frames:
+                    return result
+                frame = frames.pop()
+                ins, constants, ip, stack, env, blocks = frame.instructions, frame.constants, frame.ip, frame.stack, frame.env, frame.blocks
+                stack.append(result)
+            elif op == OP_FOR_ITER:
+                try:
+                    value = next(stack[-2])
+                except StopIteration:
+                    result = stack.pop()
+                    stack[-1] = result
+                    blocks.pop()
+                    ip = ins[ip+1]
+                    continue
+                stack.pop()
+                env = Environment(store={constants[ins[ip]]: value}, outer=env)
+                ip += 2
+            elif op == OP_POP_SCOPE:
+                env = env.outer
+            elif op == OP_PUSH_SCOPE:
+                env = Environment(outer=env)
+            elif op == OP_NULL:
+                stack.append(NULL)
+            elif op == OP_TRUE:
+                stack.append(TRUE)
+            elif op == OP_FALSE:
+                stack.append(FALSE)
+            elif op == OP_NONE:
+                stack.append(None)
+            elif op == OP_BANG:
+                stack[-1] = eval_bang_operator_expression(stack[-1])
+            elif op == OP_MINUS:
+                result = eval_prefix_expression("-", stack[-1])
+                if type(result) is Error:
+                    return result
+                stack[-1] = result
+            elif op == OP_INDEX:
+                index = stack.pop()
+                result = eval_index_expression(stack[-1], index)
+                if type(result) is Error:
+                    return result
+                stack[-1] = result
+            elif op == OP_SET_INDEX:
+                value = stack.pop()
+                index = stack.pop()
+                result = eval_index_assignment(stack[-1], index, value)
+                if type(result) is Error:
+                    return result
+                stack[-1] = result
+            elif op == OP_GET_FIELD:
+                result = eval_field_expression(stack[-1], constants[ins[ip]])
+                ip += 1
+                if type(result) is Error:
+                    return result
+                stack[-1] = result
+            elif op == OP_ARRAY:
+                n = ins[ip]
+                ip += 1
+                elements = stack[len(stack)-n:]
+                del stack[len(stack)-n:]
+                stack.append(mobject.Array(elements=elements))
+            elif op == OP_HASH:
+                n = ins[ip]
+                ip += 1
+                items = stack[len(stack)-2*n:]
+                del stack[len(stack)-2*n:]
+                for key in items[::2]:
+                    if not isinstance(key, mobject.Hashable):
+                        return new_error("unusable as hash key: {}", key.typ)
+                stack.append(mobject.Hash(storage=mobject.hash_storage(zip(items[::2], items[1::2]))))
+            elif op == OP_CLOSURE:
+                stack.append(Closure(fn=constants[ins[ip]], env=env))
+                ip += 1
+            elif op == OP_GET_ITER:
+                iterator = stack[-1]
+                elements = iterator.iterate()
+                if elements is None:
+                    return new_error("cannot iterate over {}", iterator.typ)
+                stack[-1] = iter(elements)
+            elif op == OP_SETUP_LOOP:
+                blocks.append((ins[ip], ins[ip+1], len(stack), len(stack), env))
+                ip += 2
+            elif op == OP_SETUP_FOR:
+                blocks.append((ins[ip], ins[ip+1], len(stack)-1, len(stack), env))
+                ip += 2
+            elif op == OP_POP_BLOCK:
+                blocks.pop()
+            elif op == OP_BREAK:
+                break_address, _, base, _, env = blocks.pop()
+                del stack[base:]
+                stack.append(NULL)
+                ip = break_address
+            elif op == OP_CONTINUE:
+                _, continue_address, _, height, env = blocks[-1]
+                del stack[height:]
+                stack.append(NULL)
+                ip = continue_address
+            elif op == OP_HALT:
+                return stack[-1] if stack else None
+            else:
+                return new_error("unknown opcode: {}", op)
+
+def run(program: ast.Program, env: mobject.Environment, max_frames: int = DEFAULT_MAX_FRAMES) -> MonkeyObject:
+    c = Compiler()
+    bytecode = c.compile_program(program)
+    if len(c.errors) != 0:
+        return new_error(c.errors[0])
+    return VM(bytecode, env, max_frames=max_frames).run()